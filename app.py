@@ -53,7 +53,6 @@ CONFIG = load_configuration()
 import pandas as pd
 import numpy as np
 import yaml
-import joblib
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import hashlib
@@ -67,14 +66,20 @@ import time
 # ============================================
 try:
     from scripts.generate_data import generate_data
-    from scripts.train_models import train_models
-    from scripts.data_validation import validate_sonelgaz_data, detect_data_quality_issues
+    from scripts.data_validation import DataValidator, load_validation_ranges, validate_sonelgaz_data
     
     from services.data_preprocessing import preprocess
-    from services.alert_engine import generate_alerts
     from services.scada_connector import get_scada_data
     from services.prediction_service import PredictionService
+    from services.training_jobs import TrainingJobManager
+    from services.model_registry import ModelRegistry
+    from services.inference_server import InferenceServer
+    from services.measurement_store import MeasurementStore
+    from services.grid_simulator import GridSimulator
+    from services.alert_engine import AlertEngine
+    from services.streaming_pipeline import StreamingPipeline, ReplaySource
     from services.visualization_service import VisualizationService
+    from services.figure_cache import FigureCache
     
     from security.auth import authenticate  # ⬅️ CORRIGÉ : sans require_role
     from security.audit_log import log_event
@@ -164,159 +169,221 @@ with st.sidebar:
         st.rerun()
 
 # ============================================
-# Chargement des données
+# Initialisation services
 # ============================================
-@st.cache_data(ttl=300)  # Cache 5 minutes
-def load_data(_mode, _role):
-    """Charge les données selon le mode et le rôle"""
-    
-    if _mode == "realtime":
-        if _role != "admin":
-            st.warning("🔒 Accès SCADA réservé aux administrateurs")
-            log_event(user, "Tentative d'accès SCADA non autorisée")
-            return pd.DataFrame()
-        
-        st.info("📡 Connexion au SCADA Sonelgaz...")
-        data = get_scada_data()
-        
-        if data.empty:
-            st.error("❌ Impossible de se connecter au SCADA")
-            log_event(user, "Échec connexion SCADA")
-            return pd.DataFrame()
-        
-        st.success(f"✅ {len(data)} mesures SCADA chargées")
-        log_event(user, "Accès données SCADA réussi")
-        return data
-    
-    # Mode simulation
-    st.info("🧪 Mode simulation - Données de démonstration")
-    
-    if not os.path.exists("data/data.csv"):
-        st.warning("Génération des données initiales...")
-        data = generate_data()
-    else:
-        data = pd.read_csv("data/data.csv")
-    
-    # Validation des données
-    try:
-        data = validate_sonelgaz_data(data)
-        
-        # Vérification qualité
-        issues = detect_data_quality_issues(data)
-        if issues:
-            st.warning(f"Problèmes détectés: {len(issues)}")
-            for issue in issues:
-                st.caption(f"⚠️ {issue}")
-    
-    except Exception as e:
-        st.error(f"Erreur validation: {e}")
-        return pd.DataFrame()
-    
-    return data
+MAX_HOURS_BACK = 72
+PIPELINE_MAX_ROWS = 200000  # Fenêtre matérialisée du pipeline (lignes)
+REPLAY_BATCH_ROWS = 10000  # Lignes par lot rejoué depuis le magasin
+DATA_WAIT_SECONDS = 2  # Intervalle de réaffichage en attente des premières mesures
 
-# Chargement
-raw_df = load_data(CONFIG["mode"], role)
-
-if raw_df.empty:
-    st.error("Aucune donnée disponible. Veuillez vérifier la configuration.")
-    st.stop()
+def load_csv_data():
+    """Charge les données de démonstration étiquetées (générées au besoin)"""
+    if not os.path.exists("data/data.csv"):
+        return generate_data()
+    return pd.read_csv("data/data.csv")
 
-# ============================================
-# Prétraitement
-# ============================================
-df = preprocess(raw_df)
+def get_store():
+    """Magasin de mesures historisées"""
+    return MeasurementStore(CONFIG.get("storage", {}).get("path", "data/store"))
 
-# Ajout timestamp si absent
-if "timestamp" not in df.columns:
-    df["timestamp"] = pd.date_range(
-        end=datetime.now(),
-        periods=len(df),
-        freq="5min"
-    )
+def load_simulation_data(hours=MAX_HOURS_BACK):
+    """
+    Charge les dernières heures du magasin de mesures (seules les
+    partitions des jours concernés sont lues)
+    """
+    return get_store().query_last(hours)
 
-# ============================================
-# Initialisation services
-# ============================================
 @st.cache_resource
 def init_services():
     """Initialise les services IA"""
-    # Chargement des modèles
-    try:
-        iso = joblib.load("models/anomaly_detector.pkl")
-        clf = joblib.load("models/classifier.pkl")
-    except:
-        st.warning("Réentraînement des modèles IA...")
-        iso, clf = train_models(df)
-    
-    # Initialisation services
-    pred_service = PredictionService()
+    # Les modèles sont chargés une seule fois, par le service, depuis la
+    # version active du registre (rechargée à chaud) ; un modèle absent ou
+    # illisible est signalé puis réentraîné en tâche de fond (voir plus bas)
+    # Moteur compilé : ses tableaux, projetés en mémoire depuis le registre,
+    # sont partagés entre processus (les arbres sklearn sont recopiés)
+    pred_service = PredictionService(
+        registry=ModelRegistry.from_config(CONFIG), hot_reload=True, use_compiled=True,
+        reload_interval=CONFIG.get("models", {}).get("reload_seconds", 2)
+    )
     vis_service = VisualizationService()
     
-    return iso, clf, pred_service, vis_service
-
-iso, clf, pred_service, vis_service = init_services()
+    return pred_service, vis_service
 
-# ============================================
-# Détection d'anomalies
-# ============================================
-FEATURES = ["tension", "courant", "puissance"]
+@st.cache_resource
+def get_training_manager():
+    """File des entraînements en tâche de fond (partagée par les sessions)"""
+    return TrainingJobManager(pred_service, **CONFIG.get("training", {}))
 
-if all(feat in df.columns for feat in FEATURES):
-    # Prédiction anomalies
-    df["anomalie_score"] = iso.score_samples(df[FEATURES])
-    df["anomalie"] = (df["anomalie_score"] < -0.5).astype(int)
-    
-    # Classification des pannes
-    df["panne_predite"] = "OK"
-    mask = df["anomalie"] == 1
-    
-    if mask.any():
+@st.cache_resource
+def get_inference_server():
+    """Endpoint HTTP local des clients externes, devant le même service"""
+    if not CONFIG.get("inference", {}).get("enabled", False):
+        return None
+    try:
+        return InferenceServer.from_config(pred_service, CONFIG).start()
+    except OSError as e:
+        print(f"Endpoint d'inférence indisponible: {e}")
+        return None
+
+pred_service, vis_service = init_services()
+training_manager = get_training_manager()
+inference_server = get_inference_server()
+
+if pred_service.anomaly_detector is None or pred_service.classifier is None:
+    # Entraînement initial visible : aucun réentraînement silencieux
+    st.warning("⚠️ Modèles IA absents ou illisibles : entraînement initial en cours")
+    job = training_manager.active()
+    if job is None:
         try:
-            df.loc[mask, "panne_predite"] = clf.predict(df.loc[mask, FEATURES])
-            
-            # Confiance des prédictions
-            if hasattr(clf, "predict_proba"):
-                probas = clf.predict_proba(df.loc[mask, FEATURES])
-                df.loc[mask, "confiance"] = probas.max(axis=1)
+            training_data = preprocess(validate_sonelgaz_data(load_csv_data(), load_validation_ranges(CONFIG)))
+            job = training_manager.status(training_manager.submit(training_data, warm_start=False))
+            log_event(user, "Entraînement initial des modèles IA")
         except Exception as e:
-            st.error(f"Erreur classification: {e}")
-            df.loc[mask, "panne_predite"] = "Inconnu"
+            st.error(f"❌ Impossible d'entraîner les modèles: {e}")
+            log_event(user, "Échec entraînement initial des modèles IA")
+            st.stop()
+    
+    progress = st.progress(0.0, text=job["message"] or "En attente")
+    while job["statut"] not in ("terminé", "échec"):
+        time.sleep(0.5)
+        job = training_manager.status(job["id"])
+        progress.progress(job["progression"], text=job["message"] or "En attente")
+    if job["statut"] == "échec":
+        st.error(f"❌ Échec de l'entraînement initial: {job['erreur']}")
+        log_event(user, "Échec entraînement initial des modèles IA")
+        st.stop()
+    progress.empty()
+
+# Règles de criticité des alertes (section alerts de config.yaml)
+alert_engine = AlertEngine.from_config(CONFIG)
+
+# ============================================
+# Pipeline d'ingestion et de scoring
+# ============================================
+# Lecture SCADA, validation, features, détection, classification et alertes
+# tournent en arrière-plan : le dashboard ne lit que les derniers résultats
+# matérialisés, aucune interaction ne relance l'inférence.
+@st.cache_resource
+def init_pipelines():
+    """Pipelines d'arrière-plan partagés par toutes les sessions"""
+    return {}
+
+def get_pipeline(mode):
+    """Retourne le pipeline du mode courant (les autres sont arrêtés)"""
+    pipelines = init_pipelines()
+    if mode not in pipelines:
+        for pipeline in pipelines.values():
+            pipeline.stop()
+        pipelines.clear()
+        
+        if mode == "realtime":
+            source = lambda: get_scada_data(CONFIG["scada"])
+        elif get_store().partitions():
+            # Rejeu par lots : la fenêtre matérialisée reste bornée, les
+            # agrégats du pipeline couvrent les MAX_HOURS_BACK heures
+            source = ReplaySource(load_simulation_data(), batch_size=REPLAY_BATCH_ROWS)
+        else:
+            # Simulateur : historique puis mesures au fil de l'horloge
+            source = GridSimulator.from_config(CONFIG).source()
+        
+        pipelines[mode] = StreamingPipeline(
+            source,
+            pred_service,
+            poll_interval=CONFIG["scada"].get("refresh_seconds", 5),
+            max_rows=PIPELINE_MAX_ROWS,
+            aggregate_hours=MAX_HOURS_BACK,
+            alert_engine=alert_engine,
+            episode_gap_seconds=CONFIG.get("alerts", {}).get("episode_gap_seconds", 300),
+            validator=DataValidator.from_config(CONFIG)
+        ).start()
+    return pipelines[mode]
+
+if CONFIG["mode"] == "realtime":
+    if role != "admin":
+        st.warning("🔒 Accès SCADA réservé aux administrateurs")
+        log_event(user, "Tentative d'accès SCADA non autorisée")
+        st.error("Aucune donnée disponible. Veuillez vérifier la configuration.")
+        st.stop()
+    st.info("📡 Flux SCADA Sonelgaz")
 else:
-    st.error("Colonnes de features manquantes")
-    df["anomalie"] = 0
-    df["panne_predite"] = "OK"
+    st.info("🧪 Mode simulation - Données de démonstration")
 
-# ============================================
-# Génération des alertes
-# ============================================
-alerts = generate_alerts(df)
+pipeline = get_pipeline(CONFIG["mode"])
+# Attente courte : sans mesure (SCADA injoignable, magasin vide), la page
+# se réaffiche toutes les DATA_WAIT_SECONDS sans bloquer la session
+if not pipeline.wait_for_data(timeout=1):
+    st.info("⏳ En attente des premières mesures du pipeline d'ingestion...")
+    source_error = pipeline.metrics["source"]["last_error"]
+    if source_error:
+        st.error(f"❌ Erreur de la source de mesures: {source_error}")
+        if not st.session_state.get("ingestion_error_logged"):
+            st.session_state.ingestion_error_logged = True
+            log_event(user, "Échec ingestion des données")
+    time.sleep(DATA_WAIT_SECONDS)
+    st.rerun()
+
+snapshot = pipeline.snapshot()
+df = snapshot.data
+# Alertes regroupées en épisodes (zone, type de panne) par le pipeline
+episodes = snapshot.episodes
+
+# Fenêtre affichée : les hours_back dernières heures de mesures
+if not df.empty and pd.api.types.is_datetime64_any_dtype(df["timestamp"]):
+    window_start = df["timestamp"].max() - timedelta(hours=hours_back)
+    in_window = df["timestamp"] > window_start
+    if not in_window.all():
+        df = df[in_window.to_numpy()]
+        if not episodes.empty:
+            episodes = episodes[episodes["fin"] > window_start]
+
+if df.empty:
+    st.error("Aucune donnée disponible. Veuillez vérifier la configuration.")
+    st.stop()
+
+if snapshot.issues:
+    st.warning(f"Problèmes détectés: {len(snapshot.issues)}")
+    for issue in snapshot.issues:
+        st.caption(f"⚠️ {issue}")
+
+st.caption(
+    f"Lot #{snapshot.sequence} - mis à jour à {snapshot.updated_at.strftime('%H:%M:%S')} - "
+    f"{len(df):,} mesures en mémoire"
+)
+
+FEATURES = ["tension", "courant", "puissance"]
 
 # ============================================
 # Dashboard Principal
 # ============================================
 st.markdown("## 📈 Tableau de Bord de Supervision")
 
-# KPI Principaux
+# KPI Principaux : agrégats glissants par minute tenus par le pipeline avec
+# chaque lot (y compris ceux sortis de la fenêtre matérialisée) ; la
+# session ne relit aucune mesure. Histogrammes et zones : agrégats
+# horaires du pipeline (pipeline.histogram, pipeline.zone_stats)
+kpi = pipeline.statistics(hours_back)
+n_mesures = kpi["total_predictions"]
+
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
     st.metric(
         "Mesures analysées",
-        f"{len(df):,}",
-        delta=f"+{len(df) - 500}" if len(df) > 500 else None
+        f"{n_mesures:,}",
+        delta=f"+{n_mesures - 500}" if n_mesures > 500 else None
     )
 
 with col2:
-    anomalies = df["anomalie"].sum()
+    anomalies = kpi["anomalies_detected"]
     st.metric(
         "Anomalies détectées",
         anomalies,
         delta_color="inverse",
-        delta=f"{anomalies/len(df)*100:.1f}%"
+        delta=f"{kpi['anomaly_rate']*100:.1f}%"
     )
 
 with col3:
-    pannes = len(df[df["panne_predite"] != "OK"])
+    pannes = n_mesures - kpi["panne_types"].get("OK", 0)
     st.metric(
         "Pannes identifiées",
         pannes,
@@ -325,7 +392,7 @@ with col3:
 
 with col4:
     if "confiance" in df.columns:
-        avg_conf = df["confiance"].mean() if not df["confiance"].isna().all() else 0
+        avg_conf = kpi["avg_confidence"]
         st.metric(
             "Confiance moyenne",
             f"{avg_conf*100:.1f}%",
@@ -339,6 +406,18 @@ with col4:
 # ============================================
 st.markdown("### 📊 Visualisations Temps Réel")
 
+VIS_CONFIG = CONFIG.get("visualization", {})
+
+@st.cache_resource
+def get_figure_cache():
+    """Cache de figures partagé par toutes les sessions"""
+    return FigureCache(max_bytes=VIS_CONFIG.get("figure_cache_mb", 64) * 1024 * 1024)
+
+# Version des données affichées : tant qu'aucun lot n'est arrivé et que la
+# fenêtre ne change pas, les figures sont reprises du cache
+figure_cache = get_figure_cache()
+data_version = (CONFIG["mode"], id(pipeline), snapshot.sequence, hours_back)
+
 tab1, tab2, tab3, tab4 = st.tabs(["📈 Évolution Temporelle", "📊 Distribution", "🗺️ Par Zone", "📋 Données"])
 
 with tab1:
@@ -346,19 +425,30 @@ with tab1:
     
     with col_v1:
         if "timestamp" in df.columns and "tension" in df.columns:
-            fig_tension = vis_service.create_timeseries_plot(
-                df.tail(100),  # Dernières 100 mesures
-                "timestamp",
-                "tension"
+            # Toute la fenêtre, sous-échantillonnée côté serveur
+            fig_tension = figure_cache.get_or_create(
+                ("timeseries", "tension") + data_version,
+                lambda: vis_service.create_timeseries_plot(
+                    df,
+                    "timestamp",
+                    "tension",
+                    max_points=VIS_CONFIG.get("max_points", 2000),
+                    use_webgl=VIS_CONFIG.get("webgl", True)
+                )
             )
             st.plotly_chart(fig_tension, use_container_width=True)
     
     with col_v2:
         if "timestamp" in df.columns and "courant" in df.columns:
-            fig_courant = vis_service.create_timeseries_plot(
-                df.tail(100),
-                "timestamp",
-                "courant"
+            fig_courant = figure_cache.get_or_create(
+                ("timeseries", "courant") + data_version,
+                lambda: vis_service.create_timeseries_plot(
+                    df,
+                    "timestamp",
+                    "courant",
+                    max_points=VIS_CONFIG.get("max_points", 2000),
+                    use_webgl=VIS_CONFIG.get("webgl", True)
+                )
             )
             st.plotly_chart(fig_courant, use_container_width=True)
 
@@ -367,17 +457,30 @@ with tab2:
     
     with col_d1:
         if "tension" in df.columns:
-            fig_dist_tension = vis_service.create_distribution_plot(df, "tension")
+            fig_dist_tension = figure_cache.get_or_create(
+                ("distribution", "tension") + data_version,
+                lambda: vis_service.create_distribution_plot(
+                    None, "tension", *pipeline.histogram("tension", hours_back)
+                )
+            )
             st.plotly_chart(fig_dist_tension, use_container_width=True)
     
     with col_d2:
         if "courant" in df.columns:
-            fig_dist_courant = vis_service.create_distribution_plot(df, "courant")
+            fig_dist_courant = figure_cache.get_or_create(
+                ("distribution", "courant") + data_version,
+                lambda: vis_service.create_distribution_plot(
+                    None, "courant", *pipeline.histogram("courant", hours_back)
+                )
+            )
             st.plotly_chart(fig_dist_courant, use_container_width=True)
 
 with tab3:
     if "zone" in df.columns:
-        fig_zone = vis_service.create_zone_comparison(df)
+        fig_zone = figure_cache.get_or_create(
+            ("zones",) + data_version,
+            lambda: vis_service.create_zone_comparison(zone_stats=pipeline.zone_stats(hours_back))
+        )
         if fig_zone:
             st.plotly_chart(fig_zone, use_container_width=True)
         else:
@@ -410,28 +513,25 @@ with tab4:
 # ============================================
 st.markdown("## 🚨 Alertes en Cours")
 
-if alerts.empty:
+if episodes.empty:
     st.success("✅ Aucune alerte critique - Système nominal")
 else:
-    st.error(f"⚠️ {len(alerts)} alerte(s) nécessitant intervention")
-    
-    # Tri par criticité
-    alerts_display = alerts.copy()
-    if "criticite" in alerts_display.columns:
-        crit_order = {"Critique": 0, "Élevée": 1, "Modérée": 2}
-        alerts_display["crit_order"] = alerts_display["criticite"].map(crit_order)
-        alerts_display = alerts_display.sort_values("crit_order").drop("crit_order", axis=1)
+    en_cours = int((episodes["statut"] == "En cours").sum())
+    st.error(
+        f"⚠️ {en_cours} incident(s) en cours, {len(episodes)} sur la période "
+        f"({int(episodes['nb_mesures'].sum()):,} mesures en anomalie)"
+    )
     
-    # Affichage avec coloration
-    def color_crit(row):
-        if row["criticite"] == "Critique":
-            return ['background-color: #ffcccc'] * len(row)
-        elif row["criticite"] == "Élevée":
-            return ['background-color: #fff3cd'] * len(row)
-        else:
-            return ['background-color: #d4edda'] * len(row)
+    # Épisodes déjà triés par criticité puis du plus récent au plus ancien
+    alerts_display = episodes
     
-    styled_alerts = alerts_display.style.apply(color_crit, axis=1)
+    # Affichage avec coloration : une couleur par niveau, appliquée en bloc
+    row_styles = "background-color: " + alert_engine.row_colors(alerts_display)
+    cell_styles = pd.DataFrame(
+        np.repeat(row_styles[:, None], alerts_display.shape[1], axis=1),
+        index=alerts_display.index, columns=alerts_display.columns
+    )
+    styled_alerts = alerts_display.style.apply(lambda _: cell_styles, axis=None)
     st.dataframe(styled_alerts, use_container_width=True)
     
     # Boutons d'action
@@ -459,7 +559,7 @@ if role == "admin":
     st.markdown("## 🔧 Maintenance Système")
     
     with st.expander("Configuration avancée"):
-        tab_conf, tab_model, tab_logs = st.tabs(["Config", "Modèles IA", "Journaux"])
+        tab_conf, tab_model, tab_logs, tab_perf = st.tabs(["Config", "Modèles IA", "Journaux", "Performance"])
         
         with tab_conf:
             st.json(CONFIG)
@@ -473,18 +573,42 @@ if role == "admin":
             col_m1, col_m2 = st.columns(2)
             
             with col_m1:
-                if st.button("Réentraîner les modèles", type="primary"):
-                    with st.spinner("Entraînement en cours..."):
-                        iso, clf = train_models(df)
-                        st.success("Modèles réentraînés avec succès")
-                        log_event(user, "Réentraînement modèles IA")
+                training_mode = st.radio("Mode d'entraînement", ["Incrémental", "Complet"], horizontal=True,
+                                         help="Incrémental : arbres ajoutés au classifieur et détecteur "
+                                              "réentraîné sur les mesures récentes")
+                if st.button("Réentraîner les modèles", type="primary",
+                             disabled=training_manager.active() is not None):
+                    if "panne" not in df.columns:
+                        st.error("Mesures non étiquetées : entraînement impossible")
+                    else:
+                        try:
+                            job_id = training_manager.submit(df, warm_start=training_mode == "Incrémental")
+                            st.success(f"Entraînement n°{job_id} lancé en arrière-plan")
+                            log_event(user, f"Réentraînement modèles IA ({training_mode.lower()})")
+                        except ValueError as e:
+                            st.error(f"❌ {e}")
             
             with col_m2:
                 if st.button("Tester les modèles"):
-                    # Test de prédiction
-                    test_data = df[FEATURES].iloc[:5]
-                    predictions = iso.predict(test_data)
+                    # Test de prédiction (même chemin que le pipeline et l'endpoint)
+                    predictions = pred_service.predict_batch(df[["tension", "courant"]].iloc[:5])
                     st.write("Test prédictions:", predictions)
+            
+            active_job = training_manager.active()
+            if active_job is not None:
+                st.progress(active_job["progression"],
+                            text=f"Entraînement n°{active_job['id']} : {active_job['message'] or active_job['statut']}")
+            st.caption(f"Version des modèles en service : {pred_service.registry_version or pred_service.model_version}")
+            if inference_server is not None:
+                batching = inference_server.batcher.summary()
+                st.caption(f"Endpoint d'inférence : {inference_server.url} — {batching['requests']} requêtes, "
+                           f"{batching['mean_batch_size']:.1f} points par appel au modèle")
+            registry_history = pred_service.registry.history()
+            if registry_history:
+                st.dataframe(pd.DataFrame(registry_history)[
+                    ["version", "active", "created_at", "source", "rows", "data_fingerprint", "metrics"]
+                ], use_container_width=True, hide_index=True)
+            st.dataframe(training_manager.jobs(), use_container_width=True, hide_index=True)
         
         with tab_logs:
             if os.path.exists("audit.log"):
@@ -493,6 +617,14 @@ if role == "admin":
                 st.text_area("Journaux d'audit", "\n".join(logs), height=300)
             else:
                 st.warning("Fichier audit.log non trouvé")
+        
+        with tab_perf:
+            cache_stats = figure_cache.stats()
+            col_p1, col_p2, col_p3, col_p4 = st.columns(4)
+            col_p1.metric("Figures en cache", cache_stats["entries"])
+            col_p2.metric("Taux de succès", f"{cache_stats['hit_rate']*100:.0f}%")
+            col_p3.metric("Succès / échecs", f"{cache_stats['hits']} / {cache_stats['misses']}")
+            col_p4.metric("Mémoire cache", f"{cache_stats['bytes'] / 1e6:.1f} Mo")
 
 # ============================================
 # Pied de page Sonelgaz
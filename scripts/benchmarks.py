@@ -0,0 +1,687 @@
+"""
+Benchmarks de performance de la plateforme Sonelgaz
+
+Usage : python -m scripts.benchmarks (depuis la racine du projet)
+"""
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+
+from scripts.generate_data import generate_data, generate_chunk, generate_to_disk
+from scripts.train_models import train_models, train_models_from_store, print_training_report
+from services.prediction_service import PredictionService
+from services.compiled_forest import CompiledIsolationForest, CompiledRandomForest
+from services.prediction_history import PredictionHistory
+from services.measurement_store import MeasurementStore
+from services.grid_simulator import GridSimulator
+from services.alert_engine import AlertEngine
+from services.alert_manager import AlertManager
+from services.visualization_service import VisualizationService, ChartAggregates
+from utils.helpers import DataFingerprint, generate_data_hash, calculate_statistics
+from utils.streaming_stats import StreamingStatistics
+from scripts.data_validation import DataValidator, validate_with_report, detect_data_quality_issues
+from services.streaming_pipeline import StreamingPipeline
+from services.inference_server import MicroBatcher
+
+
+def build_prediction_service(n_samples=5000, **service_options):
+    """
+    Entraîne des modèles sur des données synthétiques et retourne un
+    service de prédiction prêt à l'emploi
+
+    L'entraînement a lieu dans un dossier temporaire : les modèles et
+    données du projet (models/, data/data.csv) ne sont pas modifiés. Les
+    modèles sont chargés en mémoire avant la suppression du dossier.
+
+    Args:
+        service_options: Options de PredictionService (low_latency, use_compiled...)
+    """
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            train_models(generate_data(n_samples=n_samples, output=None))
+            return PredictionService(**service_options)
+        finally:
+            os.chdir(cwd)
+
+
+def make_measurements(n_rows, seed=0):
+    """Génère n_rows mesures tension/courant avec ~8% de pannes"""
+    rng = np.random.default_rng(seed)
+    tension = rng.normal(230, 5, n_rows)
+    courant = rng.normal(10, 2, n_rows)
+    panne = rng.random(n_rows) < 0.08
+    tension[panne] -= rng.uniform(30, 60, panne.sum())
+    courant[panne] += rng.uniform(4, 8, panne.sum())
+    return pd.DataFrame({"tension": tension, "courant": courant})
+
+
+def bench_predict_batch(service, sizes=(1000, 10000, 100000), loop_max_rows=2000):
+    """
+    Compare le débit (lignes/s) de predict_batch vectorisé avec la boucle
+    ligne par ligne sur predict()
+
+    La boucle n'est mesurée que sur loop_max_rows lignes, son débit étant
+    constant quelle que soit la taille du batch.
+    """
+    print("\n=== predict_batch : vectorisé vs boucle predict() ===")
+    print(f"{'lignes':>10} | {'vectorisé (l/s)':>16} | {'boucle (l/s)':>14} | {'gain':>8}")
+
+    for n_rows in sizes:
+        df = make_measurements(n_rows)
+
+        start = time.perf_counter()
+        service.predict_batch(df)
+        vectorized_rate = n_rows / (time.perf_counter() - start)
+
+        loop_df = df.head(loop_max_rows)
+        start = time.perf_counter()
+        for _, row in loop_df.iterrows():
+            service.predict(row.to_dict())
+        loop_rate = len(loop_df) / (time.perf_counter() - start)
+
+        print(f"{n_rows:>10} | {vectorized_rate:>16,.0f} | {loop_rate:>14,.0f} | "
+              f"{vectorized_rate / loop_rate:>7.1f}x")
+
+
+def bench_predict_latency(service, n_calls=2000):
+    """
+    Mesure la latence par appel (p50/p99) de predict() en mode standard
+    et en mode faible latence
+    """
+    print("\n=== predict() : latence par point ===")
+    print(f"{'mode':>14} | {'p50 (µs)':>10} | {'p99 (µs)':>10}")
+
+    points = make_measurements(n_calls).to_dict("records")
+    initial_mode = service.low_latency
+
+    for low_latency in (False, True):
+        service.low_latency = low_latency
+        latencies = np.empty(n_calls)
+        for i, point in enumerate(points):
+            start = time.perf_counter()
+            service.predict(point)
+            latencies[i] = time.perf_counter() - start
+
+        p50, p99 = np.percentile(latencies * 1e6, [50, 99])
+        label = "faible latence" if low_latency else "standard"
+        print(f"{label:>14} | {p50:>10,.0f} | {p99:>10,.0f}")
+
+    service.low_latency = initial_mode
+
+
+def bench_micro_batching(service, concurrency=(1, 4, 16, 64), calls_per_thread=200,
+                         max_batch_size=256, max_latency_ms=2.0):
+    """
+    Charge concurrente sur predict() : débit et latence de queue (p50/p99)
+    selon le nombre de threads appelants, appels directs contre appels
+    regroupés par MicroBatcher
+    """
+    print(f"\n=== predict() concurrent : direct vs micro-batching ({max_latency_ms} ms) ===")
+    print(f"{'threads':>7} | {'mode':>8} | {'débit (req/s)':>13} | {'p50 (ms)':>8} | "
+          f"{'p99 (ms)':>8} | {'points/lot':>10}")
+
+    points = make_measurements(max(concurrency) * calls_per_thread).to_dict("records")
+    batcher = MicroBatcher(service, max_batch_size=max_batch_size, max_latency_ms=max_latency_ms).start()
+
+    def run(predict, n_threads):
+        latencies = np.empty(n_threads * calls_per_thread)
+        barrier = threading.Barrier(n_threads + 1)
+
+        def worker(index):
+            barrier.wait()
+            for i in range(index * calls_per_thread, (index + 1) * calls_per_thread):
+                start = time.perf_counter()
+                predict(points[i])
+                latencies[i] = time.perf_counter() - start
+
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(n_threads)]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        return len(latencies) / (time.perf_counter() - start), latencies
+
+    try:
+        for n_threads in concurrency:
+            for mode, predict in (("direct", service.predict), ("batché", batcher.predict)):
+                before = batcher.summary()
+                throughput, latencies = run(predict, n_threads)
+                after = batcher.summary()
+                p50, p99 = np.percentile(latencies * 1000, [50, 99])
+                batches = after["batches"] - before["batches"]
+                per_batch = (after["points"] - before["points"]) / batches if batches else 1.0
+                print(f"{n_threads:>7} | {mode:>8} | {throughput:>13,.0f} | {p50:>8.2f} | "
+                      f"{p99:>8.2f} | {per_batch:>10.1f}")
+    finally:
+        batcher.stop()
+
+
+def bench_compiled_models(service, sizes=(1, 10, 100, 1000, 100000), n_repeats=20):
+    """
+    Compare sklearn et le moteur compilé (temps moyen par appel) sur
+    score_samples et predict_proba
+    """
+    print("\n=== Forêts : sklearn vs moteur compilé ===")
+    print(f"{'lignes':>8} | {'modèle':>10} | {'sklearn (ms)':>12} | {'compilé (ms)':>12} | {'gain':>8}")
+
+    iso, clf = service.anomaly_detector, service.classifier
+    models = [
+        ("iforest", iso.score_samples, CompiledIsolationForest.from_sklearn(iso).score_samples),
+        ("rforest", clf.predict_proba, CompiledRandomForest.from_sklearn(clf).predict_proba)
+    ]
+
+    for n_rows in sizes:
+        X = service.prepare_batch_features(make_measurements(n_rows))
+        repeats = n_repeats if n_rows <= 1000 else 1
+        for name, sklearn_fn, compiled_fn in models:
+            timings = []
+            for fn, data in ((sklearn_fn, X), (compiled_fn, X.to_numpy())):
+                fn(data)
+                start = time.perf_counter()
+                for _ in range(repeats):
+                    fn(data)
+                timings.append((time.perf_counter() - start) / repeats * 1000)
+            print(f"{n_rows:>8} | {name:>10} | {timings[0]:>12.3f} | {timings[1]:>12.3f} | "
+                  f"{timings[0] / timings[1]:>7.1f}x")
+
+
+def bench_prediction_history(capacity=1000000, n_appends=200000):
+    """
+    Mesure l'ajout unitaire et les requêtes par fenêtre sur un historique
+    rempli à capacity prédictions
+    """
+    print("\n=== Historique des prédictions (tampon circulaire) ===")
+    history = PredictionHistory(capacity)
+    now = datetime.now().timestamp()
+    timestamps = now - np.arange(capacity)[::-1]
+    history.extend(timestamps, np.full(capacity, 230.0), np.full(capacity, 10.0),
+                   np.random.normal(-0.45, 0.05, capacity), np.random.rand(capacity) < 0.08,
+                   np.full(capacity, "OK", dtype=object), np.zeros(capacity))
+
+    moment = datetime.now()
+    start = time.perf_counter()
+    for _ in range(n_appends):
+        history.append(moment, 230.0, 10.0, -0.45, False, "OK", 0.0)
+    append_us = (time.perf_counter() - start) / n_appends * 1e6
+    print(f"append (historique plein de {capacity:,}) : {append_us:.2f} µs")
+
+    for hours in (1, 24, 72):
+        since = datetime.now() - timedelta(hours=hours)
+        start = time.perf_counter()
+        history.statistics(since=since)
+        print(f"statistics({hours:>2} h) : {(time.perf_counter() - start) * 1000:.2f} ms")
+
+
+def bench_scada_polling(station_counts=(10, 100, 500), n_servers=4, n_cycles=5):
+    """
+    Mesure la durée d'un cycle de collecte multi-postes contre des
+    serveurs OPC-UA locaux
+    """
+    from opcua import Server, ua
+    from services.scada_connector import ScadaPoller
+
+    print("\n=== Collecte SCADA multi-postes ===")
+    print(f"{'postes':>8} | {'cycle moyen (ms)':>16} | {'cycle max (ms)':>14}")
+
+    servers, endpoints = [], []
+    for i in range(n_servers):
+        endpoint = f"opc.tcp://127.0.0.1:{48400 + i}"
+        server = Server()
+        server.set_endpoint(endpoint)
+        idx = server.register_namespace("urn:sonelgaz:bench")
+        poste = server.get_objects_node().add_object(idx, "Postes")
+        for node in range(max(station_counts) // n_servers + 1):
+            poste.add_variable(ua.NodeId(10000 + 2 * node, idx), f"tension_{node}", 230.0)
+            poste.add_variable(ua.NodeId(10001 + 2 * node, idx), f"courant_{node}", 10.0)
+        server.start()
+        servers.append(server)
+        endpoints.append((endpoint, idx))
+
+    try:
+        for n_stations in station_counts:
+            stations = []
+            for i in range(n_stations):
+                endpoint, idx = endpoints[i % n_servers]
+                node = i // n_servers
+                stations.append({
+                    "name": f"Poste_{i:04d}", "zone": f"Zone_{i % 5}", "endpoint": endpoint,
+                    "tension": f"ns={idx};i={10000 + 2 * node}",
+                    "courant": f"ns={idx};i={10001 + 2 * node}"
+                })
+
+            poller = ScadaPoller(stations)
+            poller.poll()  # Ouverture des sessions
+            durations = []
+            for _ in range(n_cycles):
+                poller.poll()
+                durations.append(poller.last_cycle_seconds * 1000)
+            poller.close()
+
+            print(f"{n_stations:>8} | {np.mean(durations):>16.1f} | {np.max(durations):>14.1f}")
+    finally:
+        for server in servers:
+            server.stop()
+
+
+def bench_measurement_store(n_rows=10000000, n_zones=10, period_seconds=5, windows=(1, 24, 72)):
+    """
+    Compare le chargement d'une fenêtre de hours_back heures depuis le
+    magasin Parquet partitionné et depuis un CSV relu en entier
+    """
+    print(f"\n=== Magasin de mesures vs CSV ({n_rows:,} lignes) ===")
+
+    zones = np.array([f"Zone_{i}" for i in range(n_zones)])
+    rng = np.random.default_rng(0)
+    # Un relevé par zone toutes les period_seconds secondes
+    steps = np.arange(n_rows) // n_zones * period_seconds
+    df = pd.DataFrame({
+        "timestamp": pd.Timestamp("2024-01-01") + pd.to_timedelta(steps, unit="s"),
+        "zone": zones[np.arange(n_rows) % n_zones],
+        "tension": rng.normal(230, 5, n_rows).round(2),
+        "courant": rng.normal(10, 2, n_rows).round(2)
+    })
+    end = df["timestamp"].max()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "data.csv")
+        store = MeasurementStore(root=os.path.join(tmp, "store"))
+
+        start = time.perf_counter()
+        df.to_csv(csv_path, index=False)
+        csv_write = time.perf_counter() - start
+
+        start = time.perf_counter()
+        store.append(df)
+        store_write = time.perf_counter() - start
+
+        store_size = sum(os.path.getsize(os.path.join(root, name))
+                         for root, _, names in os.walk(store.root) for name in names)
+        print(f"écriture : CSV {csv_write:.1f} s ({os.path.getsize(csv_path) / 1e6:.0f} Mo) | "
+              f"Parquet {store_write:.1f} s ({store_size / 1e6:.0f} Mo)")
+
+        print(f"{'fenêtre':>8} | {'CSV (s)':>8} | {'magasin (s)':>11} | {'lignes':>10} | {'gain':>7}")
+        for hours in windows:
+            since = end - timedelta(hours=hours)
+
+            start = time.perf_counter()
+            csv_df = pd.read_csv(csv_path, parse_dates=["timestamp"])
+            csv_df = csv_df[csv_df["timestamp"] > since]
+            csv_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            store_df = store.query_last(hours)
+            store_time = time.perf_counter() - start
+
+            print(f"{hours:>6} h | {csv_time:>8.2f} | {store_time:>11.3f} | {len(store_df):>10,} | "
+                  f"{csv_time / store_time:>6.0f}x")
+
+
+def bench_generate_data(sizes=(100000, 1000000, 10000000), disk_rows=20000000, n_jobs=4):
+    """
+    Débit du générateur vectorisé, en mémoire puis en écriture par blocs
+    vers le magasin de mesures (séquentiel et multi-processus)
+    """
+    print("\n=== Génération de données synthétiques ===")
+    for n_rows in sizes:
+        start = time.perf_counter()
+        generate_chunk(n_rows, np.random.default_rng(0), start="2024-01-01")
+        elapsed = time.perf_counter() - start
+        print(f"mémoire {n_rows:>11,} lignes : {elapsed:6.2f} s ({n_rows / elapsed:,.0f} l/s)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for jobs in (1, n_jobs):
+            start = time.perf_counter()
+            generate_to_disk(disk_rows, os.path.join(tmp, f"store_{jobs}"), n_jobs=jobs)
+            elapsed = time.perf_counter() - start
+            print(f"disque  {disk_rows:>11,} lignes, {jobs} processus : {elapsed:6.1f} s "
+                  f"({disk_rows / elapsed:,.0f} l/s)")
+
+
+def bench_streaming_pipeline(service, n_stations=1000, steps_per_batch=(1, 10, 50), duration=10.0):
+    """
+    Débit de bout en bout du pipeline alimenté par le simulateur de réseau
+    à cadence maximale (sans attente entre deux lectures)
+    """
+    print(f"\n=== Pipeline en flux, simulateur {n_stations} postes ===")
+    print(f"{'lignes/lot':>10} | {'débit (l/s)':>12} | {'étape la plus chargée':>24}")
+
+    simulator = GridSimulator(n_stations=n_stations, sample_seconds=1, seed=0)
+    start = time.perf_counter()
+    simulator.step(3600)
+    print(f"simulateur seul : {3600 * n_stations / (time.perf_counter() - start):,.0f} l/s")
+
+    for steps in steps_per_batch:
+        pipeline = StreamingPipeline(simulator.source(steps_per_batch=steps), service,
+                                     poll_interval=0, max_rows=100000).start()
+        time.sleep(duration)
+        pipeline.stop()
+
+        rows = pipeline.metrics["alertes"]["rows"]
+        busiest = max(pipeline.metrics, key=lambda name: pipeline.metrics[name]["busy_seconds"])
+        print(f"{steps * n_stations:>10,} | {rows / duration:>12,.0f} | {busiest:>24}")
+
+
+def bench_alert_engine(n_rows=1000000):
+    """
+    Compare, sur n_rows anomalies, l'ancienne criticité (apply ligne par
+    ligne, tri par map, style par ligne) avec le moteur à table de règles
+    """
+    print(f"\n=== Moteur d'alertes ({n_rows:,} anomalies) ===")
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "zone": rng.choice(["Nord", "Sud", "Est", "Ouest", "Centre"], n_rows),
+        "panne_predite": rng.choice(["Court-circuit", "Surcharge", "Ligne coupée"], n_rows),
+        "anomalie": np.ones(n_rows, dtype=int),
+        "confiance": rng.random(n_rows)
+    })
+
+    def criticite(row):
+        if row["panne_predite"] == "Court-circuit":
+            return "Critique"
+        elif row["panne_predite"] == "Surcharge":
+            return "Élevée"
+        return "Modérée"
+
+    start = time.perf_counter()
+    legacy = df[df["anomalie"] == 1].copy()
+    legacy["criticite"] = legacy.apply(criticite, axis=1)
+    legacy["crit_order"] = legacy["criticite"].map({"Critique": 0, "Élevée": 1, "Modérée": 2})
+    legacy = legacy.sort_values("crit_order", kind="stable")
+    colors = {"Critique": "#ffcccc", "Élevée": "#fff3cd", "Modérée": "#d4edda"}
+    legacy_styles = [[f"background-color: {colors[c]}"] * 3 for c in legacy["criticite"]]
+    legacy_time = time.perf_counter() - start
+
+    engine = AlertEngine()
+    start = time.perf_counter()
+    alerts = engine.sort(engine.generate(df))
+    styles = "background-color: " + engine.row_colors(alerts)
+    engine_time = time.perf_counter() - start
+
+    assert (alerts["criticite"].astype(str).to_numpy() == legacy["criticite"].to_numpy()).all()
+    assert list(styles) == [row[0] for row in legacy_styles]
+    print(f"apply + map + style par ligne : {legacy_time:6.2f} s")
+    print(f"table de règles vectorisée    : {engine_time:6.3f} s ({legacy_time / engine_time:.0f}x)")
+
+
+def bench_alert_manager(n_stations=200, hours=24, batch_steps=60):
+    """
+    Regroupement en épisodes de mesures simulées (5 s) au fil des lots :
+    volume d'alertes ligne à ligne vs nombre d'épisodes
+    """
+    print(f"\n=== Épisodes d'alerte ({n_stations} postes, {hours} h) ===")
+    simulator = GridSimulator(n_stations=n_stations, sample_seconds=5, seed=0,
+                              start="2024-01-01", fault_rate_per_hour=0.2)
+    manager = AlertManager(gap_seconds=300)
+
+    n_rows, n_anomalies, elapsed = 0, 0, 0.0
+    for _ in range(int(hours * 3600 / 5 / batch_steps)):
+        batch = simulator.step(batch_steps).rename(columns={"type_panne": "panne_predite",
+                                                            "panne": "anomalie"})
+        batch["anomalie_score"] = np.where(batch["anomalie"] == 1, -0.6, 0.1)
+        start = time.perf_counter()
+        manager.update(batch)
+        elapsed += time.perf_counter() - start
+        n_rows += len(batch)
+        n_anomalies += int(batch["anomalie"].sum())
+
+    print(f"{n_rows:,} mesures, {n_anomalies:,} alertes ligne à ligne -> "
+          f"{manager.total_opened:,} épisodes")
+    print(f"mise à jour : {elapsed:.2f} s ({n_rows / elapsed:,.0f} mesures/s)")
+
+
+def bench_timeseries_plot(sizes=(100000, 1000000, 5000000), raw_max_rows=500000, max_points=2000):
+    """
+    Temps de construction et taille sérialisée (JSON envoyé au navigateur)
+    d'une courbe temporelle, brute et sous-échantillonnée
+    """
+    print("\n=== Courbes temporelles : brut vs sous-échantillonné ===")
+    print(f"{'lignes':>10} | {'méthode':>12} | {'figure (s)':>10} | {'JSON (Mo)':>9} | {'points':>8}")
+    vis = VisualizationService()
+    rng = np.random.default_rng(0)
+
+    for n_rows in sizes:
+        df = pd.DataFrame({
+            "timestamp": pd.date_range("2024-01-01", periods=n_rows, freq="50ms"),
+            "tension": 230 + rng.normal(0, 3, n_rows),
+            "anomalie": (rng.random(n_rows) < 0.001).astype(int)
+        })
+        variants = [("lttb", dict(method="lttb")), ("minmax", dict(method="minmax"))]
+        if n_rows <= raw_max_rows:
+            variants.insert(0, ("brut", dict(max_points=n_rows)))
+
+        for name, kwargs in variants:
+            params = dict(max_points=max_points, use_webgl=True)
+            params.update(kwargs)
+            start = time.perf_counter()
+            fig = vis.create_timeseries_plot(df, **params)
+            payload = fig.to_json()
+            elapsed = time.perf_counter() - start
+            print(f"{n_rows:>10,} | {name:>12} | {elapsed:>10.2f} | {len(payload) / 1e6:>9.1f} | "
+                  f"{len(fig.data[0].x):>8,}")
+
+
+def bench_chart_aggregates(sizes=(100000, 1000000)):
+    """
+    Histogramme et comparaison par zone : figures construites sur les
+    données brutes (px.histogram, groupby) vs agrégats pré-calculés
+    (temps de figure + sérialisation, taille du JSON)
+    """
+    import plotly.express as px
+
+    print("\n=== Histogrammes et zones : brut vs agrégats ===")
+    print(f"{'lignes':>10} | {'figure':>12} | {'brut (s)':>8} | {'brut (Mo)':>9} | "
+          f"{'agrégé (s)':>10} | {'agrégé (ko)':>11}")
+    vis = VisualizationService()
+
+    for n_rows in sizes:
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({
+            "timestamp": pd.date_range("2024-01-01", periods=n_rows, freq="250ms"),
+            "zone": rng.choice(["Nord", "Sud", "Est", "Ouest", "Centre"], n_rows),
+            "tension": rng.normal(228, 6, n_rows),
+            "courant": rng.normal(10, 2, n_rows),
+            "anomalie": (rng.random(n_rows) < 0.08).astype(int)
+        })
+
+        aggregates = ChartAggregates(max_hours=72)
+        start = time.perf_counter()
+        aggregates.update(df)
+        update_time = time.perf_counter() - start
+
+        def legacy_histogram():
+            return px.histogram(df, x="tension", nbins=30, color_discrete_sequence=['#3498db'])
+
+        def binned_histogram():
+            counts, edges = aggregates.histogram("tension", 72)
+            return vis.create_distribution_plot(column="tension", counts=counts, edges=edges)
+
+        cases = [
+            ("histogramme", legacy_histogram, binned_histogram),
+            ("zones", lambda: vis.create_zone_comparison(df),
+             lambda: vis.create_zone_comparison(zone_stats=aggregates.zone_stats(72)))
+        ]
+        for name, legacy, binned in cases:
+            start = time.perf_counter()
+            legacy_json = legacy().to_json()
+            legacy_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            binned_json = binned().to_json()
+            binned_time = time.perf_counter() - start
+
+            print(f"{n_rows:>10,} | {name:>12} | {legacy_time:>8.3f} | {len(legacy_json) / 1e6:>9.2f} | "
+                  f"{binned_time:>10.4f} | {len(binned_json) / 1e3:>11.1f}")
+        print(f"{'':>10}   mise à jour des agrégats : {update_time:.3f} s")
+
+
+def bench_fingerprint(sizes=(100000, 1000000, 10000000), legacy_max_rows=1000000):
+    """
+    Empreinte des données : MD5 du JSON (generate_data_hash) vs CRC32 des
+    buffers de colonnes, et coût d'une mise à jour incrémentale
+    """
+    print("\n=== Empreinte des données ===")
+    print(f"{'lignes':>11} | {'MD5 JSON (s)':>12} | {'CRC32 (s)':>9} | {'ajout 1% (ms)':>13}")
+
+    for n_rows in sizes:
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({
+            "timestamp": pd.date_range("2024-01-01", periods=n_rows, freq="5s"),
+            "zone": rng.choice(["Nord", "Sud", "Est", "Ouest", "Centre"], n_rows),
+            "tension": rng.normal(230, 5, n_rows),
+            "courant": rng.normal(10, 2, n_rows),
+            "anomalie": rng.integers(0, 2, n_rows)
+        })
+
+        legacy = "-"
+        if n_rows <= legacy_max_rows:
+            start = time.perf_counter()
+            generate_data_hash(df.drop(columns="timestamp"))
+            legacy = f"{time.perf_counter() - start:.2f}"
+
+        start = time.perf_counter()
+        fingerprint = DataFingerprint().update(df)
+        fingerprint.hexdigest()
+        full_time = time.perf_counter() - start
+
+        appended = df.iloc[:max(n_rows // 100, 1)]
+        start = time.perf_counter()
+        fingerprint.update(appended).hexdigest()
+        append_time = time.perf_counter() - start
+
+        print(f"{n_rows:>11,} | {legacy:>12} | {full_time:>9.3f} | {append_time * 1000:>13.1f}")
+
+
+def bench_statistics(sizes=(1000000, 10000000), n_partitions=10):
+    """
+    Statistiques descriptives : cinq passes pandas par colonne vs une passe
+    par bloc (moments + t-digest), et calcul par partitions fusionnées
+    """
+    print("\n=== Statistiques descriptives ===")
+    columns = ["tension", "courant", "puissance"]
+
+    for n_rows in sizes:
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({
+            "tension": rng.normal(230, 5, n_rows),
+            "courant": rng.exponential(10, n_rows),
+            "puissance": rng.normal(2, 1, n_rows)
+        })
+
+        start = time.perf_counter()
+        legacy = {col: {"mean": df[col].mean(), "std": df[col].std(), "min": df[col].min(),
+                        "max": df[col].max(), "median": df[col].median()} for col in columns}
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        stats = calculate_statistics(df)
+        single_time = time.perf_counter() - start
+
+        # Partitions résumées séparément (ex. un jour du magasin) puis fusionnées
+        start = time.perf_counter()
+        merged = StreamingStatistics(columns)
+        for part in np.array_split(np.arange(n_rows), n_partitions):
+            merged.merge(StreamingStatistics(columns).update(df.iloc[part[0]:part[-1] + 1]))
+        merge_time = time.perf_counter() - start
+
+        median_error = max(abs(stats[col]["median"] - legacy[col]["median"]) / legacy[col]["std"]
+                           for col in columns)
+        print(f"{n_rows:>11,} lignes | pandas {legacy_time:.3f} s | une passe {single_time:.3f} s | "
+              f"{n_partitions} partitions fusionnées {merge_time:.3f} s | "
+              f"écart médiane {median_error:.4f} écart-type")
+
+
+def _legacy_validation(df):
+    """Ancienne validation : copie, affectations masquées, dropna, puis rapport séparé"""
+    df_valid = df.copy()
+    mask_tension = (df_valid["tension"] >= 180) & (df_valid["tension"] <= 250)
+    df_valid.loc[~mask_tension, "tension"] = np.nan
+    mask_courant = (df_valid["courant"] >= 0) & (df_valid["courant"] <= 30)
+    df_valid.loc[~mask_courant, "courant"] = np.nan
+    df_valid["puissance"] = df_valid["tension"] * df_valid["courant"] / 1000
+    df_valid = df_valid.dropna(subset=["tension", "courant"])
+    return df_valid, detect_data_quality_issues(df_valid)
+
+
+def bench_validation(sizes=(1000000, 10000000), chunk_rows=1000000):
+    """
+    Validation + rapport de qualité : ancienne chaîne vs passe fusionnée,
+    en une fois et par blocs (flux)
+    """
+    print("\n=== Validation des données ===")
+    for n_rows in sizes:
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({
+            "timestamp": pd.date_range("2024-01-01", periods=n_rows, freq="5s"),
+            "zone": rng.choice(["Nord", "Sud", "Est", "Ouest", "Centre"], n_rows),
+            "tension": rng.normal(225, 15, n_rows),
+            "courant": rng.normal(12, 8, n_rows)
+        })
+
+        start = time.perf_counter()
+        legacy, _ = _legacy_validation(df)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        fused, report = validate_with_report(df)
+        fused_time = time.perf_counter() - start
+        assert len(fused) == len(legacy)
+
+        start = time.perf_counter()
+        validator = DataValidator()
+        for offset in range(0, n_rows, chunk_rows):
+            validator.validate(df.iloc[offset:offset + chunk_rows])
+        chunked_time = time.perf_counter() - start
+
+        print(f"{n_rows:>11,} lignes | ancienne {legacy_time:.3f} s | fusionnée {fused_time:.3f} s | "
+              f"par blocs de {chunk_rows:,} {chunked_time:.3f} s | rejetées {report['rejected_rows']:,}")
+
+
+def bench_training_from_store(n_rows=1000000, in_memory_max_rows=1000000):
+    """
+    Entraînement en mémoire (DataFrame complet) vs par lots depuis le
+    magasin avec échantillons par réservoir, détail par phase
+    """
+    print("\n=== Entraînement depuis le magasin de mesures ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MeasurementStore(os.path.join(tmp, "store"))
+        generate_to_disk(n_rows, store.root, chunk_size=500000, period_seconds=5)
+
+        if n_rows <= in_memory_max_rows:
+            start = time.perf_counter()
+            train_models(store.query(), n_jobs=-1, models_dir=None)
+            print(f"en mémoire ({n_rows:,} lignes) : {time.perf_counter() - start:.2f} s")
+
+        start = time.perf_counter()
+        _, _, report = train_models_from_store(store, models_dir=None)
+        print(f"par lots ({n_rows:,} lignes) : {time.perf_counter() - start:.2f} s")
+        print_training_report(report)
+
+
+if __name__ == "__main__":
+    service = build_prediction_service()
+    bench_predict_batch(service)
+    bench_predict_latency(service)
+    bench_micro_batching(service)
+    bench_compiled_models(service)
+    bench_predict_latency(build_prediction_service(low_latency=True, use_compiled=True))
+    bench_prediction_history()
+    bench_scada_polling()
+    bench_measurement_store()
+    bench_generate_data()
+    bench_streaming_pipeline(service)
+    bench_alert_engine()
+    bench_alert_manager()
+    bench_timeseries_plot()
+    bench_chart_aggregates()
+    bench_fingerprint()
+    bench_statistics()
+    bench_validation()
+    bench_training_from_store()
@@ -5,44 +5,186 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 
-def validate_sonelgaz_data(df):
+from utils.streaming_stats import StreamingStatistics
+
+REQUIRED_COLUMNS = ["tension", "courant", "zone"]
+
+# Plages acceptées (bornes incluses) : tension 180-250 V (tolérance réseau),
+# courant 0-30 A (selon disjoncteurs standards)
+DEFAULT_RANGES = {"tension": (180, 250), "courant": (0, 30)}
+
+# Écart-type en dessous duquel une mesure est jugée constante
+DEFAULT_MIN_STD = 0.1
+
+
+def load_validation_ranges(config):
+    """
+    Plages de la section validation de config.yaml
+
+    Les clés <colonne>_min / <colonne>_max remplacent les bornes par
+    défaut ; une colonne nouvelle sans l'une des bornes n'est pas bornée
+    de ce côté.
+    """
+    section = (config or {}).get("validation") or {}
+    ranges = {col: list(bounds) for col, bounds in DEFAULT_RANGES.items()}
+    for key, value in section.items():
+        col, _, bound = key.rpartition("_")
+        if bound not in ("min", "max") or not col:
+            continue
+        bounds = ranges.setdefault(col, [-np.inf, np.inf])
+        bounds[0 if bound == "min" else 1] = value
+    return {col: tuple(bounds) for col, bounds in ranges.items()}
+
+
+class DataValidator:
+    """
+    Validation en une passe et rapport de qualité cumulé sur un flux
+
+    Pour chaque bloc : un seul masque de lignes valides est construit à
+    partir des colonnes bornées (valeur manquante ou hors plage = ligne
+    rejetée), les valeurs manquantes de toutes les colonnes sont comptées
+    au passage, et la variance des lignes retenues est obtenue par des
+    moments fusionnables. Le bloc nettoyé est extrait en une sélection,
+    sans copie préalable ni dropna. Les compteurs et moments s'accumulent
+    d'un bloc à l'autre : report() décrit tout le flux validé.
+    """
+
+    def __init__(self, ranges=None, min_std=DEFAULT_MIN_STD):
+        """
+        Args:
+            ranges (dict): Colonne -> (min, max) inclus (défaut : DEFAULT_RANGES)
+            min_std (float): Écart-type minimal attendu des mesures bornées
+        """
+        self.ranges = dict(ranges or DEFAULT_RANGES)
+        self.min_std = min_std
+        self.reset()
+
+    @classmethod
+    def from_config(cls, config):
+        """Construit le validateur depuis la section validation de config.yaml"""
+        section = (config or {}).get("validation") or {}
+        return cls(load_validation_ranges(config), section.get("min_std", DEFAULT_MIN_STD))
+
+    def reset(self):
+        """Remet à zéro le rapport cumulé"""
+        self.rows = 0
+        self.valid_rows = 0
+        self.missing = {}
+        self.out_of_range = {col: 0 for col in self.ranges}
+        self.stats = StreamingStatistics(list(self.ranges), compression=None)
+
+    def _check(self, df):
+        """Masque des lignes valides et compteurs du bloc"""
+        if df.empty:
+            raise ValueError("DataFrame vide")
+        for col in REQUIRED_COLUMNS:
+            if col not in df.columns:
+                raise ValueError(f"Colonne manquante: {col}")
+
+        keep = np.ones(len(df), dtype=bool)
+        missing, out_of_range = {}, {}
+        for col in df.columns:
+            if col in self.ranges:
+                values = df[col].to_numpy(dtype=float)
+                low, high = self.ranges[col]
+                is_missing = np.isnan(values)
+                in_range = (values >= low) & (values <= high)  # False pour NaN
+                missing[col] = int(is_missing.sum())
+                out_of_range[col] = len(values) - int(in_range.sum()) - missing[col]
+                keep &= in_range
+            else:
+                missing[col] = int(df[col].isna().sum())
+        return keep, missing, out_of_range
+
+    def validate(self, df):
+        """
+        Valide un bloc de mesures
+
+        Args:
+            df (pd.DataFrame): Mesures brutes (au moins tension, courant, zone)
+
+        Returns:
+            tuple: (DataFrame nettoyé, rapport du bloc)
+        """
+        keep, missing, out_of_range = self._check(df)
+        # Copie propre (pas une vue de df) : les colonnes ajoutées ci-dessous
+        # ne déclenchent ni SettingWithCopyWarning ni perte en copy-on-write
+        df_valid = df.copy(deep=False) if keep.all() else df.loc[keep].copy()
+
+        # Calcul de la puissance
+        if "puissance" not in df_valid.columns:
+            df_valid["puissance"] = df_valid["tension"] * df_valid["courant"] / 1000
+
+        # Ajout timestamp si absent
+        if "timestamp" not in df_valid.columns:
+            df_valid["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        stats = StreamingStatistics(list(self.ranges), compression=None).update(df_valid)
+        report = self._report(len(df), len(df_valid), missing, out_of_range, stats)
+
+        self.rows += len(df)
+        self.valid_rows += len(df_valid)
+        for col, count in missing.items():
+            self.missing[col] = self.missing.get(col, 0) + count
+        for col, count in out_of_range.items():
+            self.out_of_range[col] = self.out_of_range.get(col, 0) + count
+        self.stats.merge(stats)
+
+        return df_valid, report
+
+    def _report(self, rows, valid_rows, missing, out_of_range, stats):
+        std = {col: values["std"] for col, values in stats.summary().items()}
+        return {
+            "rows": rows,
+            "valid_rows": valid_rows,
+            "rejected_rows": rows - valid_rows,
+            "missing": dict(missing),
+            "out_of_range": dict(out_of_range),
+            "std": std,
+            "issues": quality_issues(missing, std, self.min_std)
+        }
+
+    def report(self):
+        """Rapport cumulé de tous les blocs validés depuis reset()"""
+        return self._report(self.rows, self.valid_rows, self.missing, self.out_of_range, self.stats)
+
+
+def quality_issues(missing, std, min_std=DEFAULT_MIN_STD):
+    """
+    Problèmes de qualité (libellés) à partir des compteurs d'un rapport
+
+    Args:
+        missing (dict): Colonne -> nombre de valeurs manquantes
+        std (dict): Colonne -> écart-type des lignes retenues
+        min_std (float): Écart-type en dessous duquel la mesure est constante
+    """
+    issues = []
+    for col, count in missing.items():
+        if count > 0:
+            issues.append(f"{col}: {count} valeurs manquantes")
+    for col in ["tension", "courant"]:
+        if col in std and std[col] < min_std:
+            issues.append(f"{col}: variance trop faible ({std[col]:.2f})")
+    return issues
+
+
+def validate_with_report(df, ranges=None, min_std=DEFAULT_MIN_STD):
+    """
+    Validation et rapport de qualité en une passe
+
+    Returns:
+        tuple: (DataFrame nettoyé, rapport {"rows", "valid_rows",
+            "rejected_rows", "missing", "out_of_range", "std", "issues"})
+    """
+    return DataValidator(ranges, min_std).validate(df)
+
+
+def validate_sonelgaz_data(df, ranges=None):
     """
     Validation des données selon les normes Sonelgaz
     """
-    if df.empty:
-        raise ValueError("DataFrame vide")
-    
-    # Vérification des colonnes obligatoires
-    required_cols = ["tension", "courant", "zone"]
-    for col in required_cols:
-        if col not in df.columns:
-            raise ValueError(f"Colonne manquante: {col}")
-    
-    # Validation des plages de valeurs
-    df_valid = df.copy()
-    
-    # Tension : 180-250V (tolérance réseau)
-    mask_tension = (df_valid["tension"] >= 180) & (df_valid["tension"] <= 250)
-    if not mask_tension.all():
-        df_valid.loc[~mask_tension, "tension"] = np.nan
-    
-    # Courant : 0-30A (selon disjoncteurs standards)
-    mask_courant = (df_valid["courant"] >= 0) & (df_valid["courant"] <= 30)
-    if not mask_courant.all():
-        df_valid.loc[~mask_courant, "courant"] = np.nan
-    
-    # Calcul de la puissance
-    if "puissance" not in df_valid.columns:
-        df_valid["puissance"] = df_valid["tension"] * df_valid["courant"] / 1000
-    
-    # Ajout timestamp si absent
-    if "timestamp" not in df_valid.columns:
-        df_valid["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    # Nettoyage des NaN
-    df_valid = df_valid.dropna(subset=["tension", "courant"])
-    
-    return df_valid
+    return validate_with_report(df, ranges)[0]
+
 
 def detect_data_quality_issues(df):
     """
@@ -1,36 +1,165 @@
 import pandas as pd
 import numpy as np
 import os
+from concurrent.futures import ProcessPoolExecutor
 
-def generate_data(n_samples=500):
-    zones = ["Nord", "Sud", "Est", "Ouest", "Centre"]
-    data = []
-
-    for _ in range(n_samples):
-        tension = np.random.normal(230, 5)
-        courant = np.random.normal(10, 2)
-        panne = np.random.rand() < 0.08
-        type_panne = "OK"
-
-        if panne:
-            type_panne = np.random.choice(
-                ["Court-circuit", "Surcharge", "Ligne coupée"]
-            )
-            tension -= np.random.uniform(30, 60)
-            courant += np.random.uniform(4, 8)
-
-        puissance = round(tension * courant / 1000, 2)
-
-        data.append({
-            "zone": np.random.choice(zones),
-            "tension": round(tension, 2),
-            "courant": round(courant, 2),
-            "puissance": puissance,
-            "panne": int(panne),
-            "type_panne": type_panne
-        })
-
-    df = pd.DataFrame(data)
-    os.makedirs("data", exist_ok=True)
-    df.to_csv("data/data.csv", index=False)
-    return df
\ No newline at end of file
+ZONES = ["Nord", "Sud", "Est", "Ouest", "Centre"]
+PANNE_TYPES = ["Court-circuit", "Surcharge", "Ligne coupée"]
+
+
+def generate_chunk(n_samples, rng=None, zones=None, fault_rate=0.08, start=None,
+                   period_seconds=5, offset=0):
+    """
+    Génère un bloc de mesures synthétiques de façon vectorisée
+
+    Args:
+        n_samples (int): Nombre de lignes
+        rng: np.random.Generator (défaut : nouveau générateur non initialisé)
+        zones (list): Zones tirées uniformément
+        fault_rate (float): Probabilité de panne par mesure
+        start (datetime): Si renseigné, ajoute une colonne timestamp
+        period_seconds (float): Intervalle entre deux mesures
+        offset (int): Rang de la première ligne (horodatage des blocs suivants)
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    zones = np.asarray(zones or ZONES, dtype=object)
+
+    tension = rng.normal(230, 5, n_samples)
+    courant = rng.normal(10, 2, n_samples)
+    panne = rng.random(n_samples) < fault_rate
+
+    n_pannes = int(panne.sum())
+    type_panne = np.full(n_samples, "OK", dtype=object)
+    type_panne[panne] = np.asarray(PANNE_TYPES, dtype=object)[rng.choice(len(PANNE_TYPES), n_pannes)]
+    tension[panne] -= rng.uniform(30, 60, n_pannes)
+    courant[panne] += rng.uniform(4, 8, n_pannes)
+
+    df = pd.DataFrame({
+        "zone": zones[rng.choice(len(zones), n_samples)],
+        "tension": tension.round(2),
+        "courant": courant.round(2),
+        "puissance": (tension * courant / 1000).round(2),
+        "panne": panne.astype(int),
+        "type_panne": type_panne
+    })
+
+    if start is not None:
+        steps = (offset + np.arange(n_samples)) * period_seconds
+        df.insert(0, "timestamp", pd.Timestamp(start) + pd.to_timedelta(steps, unit="s"))
+
+    return df
+
+
+def generate_data(n_samples=500, seed=None, zones=None, fault_rate=0.08, start=None,
+                  period_seconds=5, output="data/data.csv"):
+    """
+    Génère un jeu de mesures synthétiques et l'enregistre en CSV
+
+    Args:
+        n_samples (int): Nombre de lignes
+        seed (int): Graine (None = tirage non reproductible)
+        zones (list): Zones (défaut : ZONES)
+        fault_rate (float): Probabilité de panne
+        start (datetime): Premier horodatage (None = pas de colonne timestamp)
+        period_seconds (float): Intervalle entre deux mesures
+        output (str): Fichier CSV de sortie (None = pas d'écriture)
+    """
+    rng = np.random.default_rng(seed)
+    df = generate_chunk(n_samples, rng, zones, fault_rate, start, period_seconds)
+
+    if output:
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        df.to_csv(output, index=False)
+    return df
+
+
+def _generate_chunk_task(args):
+    """Tâche exécutée par un processus : un bloc à partir de sa graine"""
+    n_samples, seed_seq, zones, fault_rate, start, period_seconds, offset = args
+    return generate_chunk(n_samples, np.random.default_rng(seed_seq), zones, fault_rate,
+                          start, period_seconds, offset)
+
+
+def generate_to_disk(n_samples, output, chunk_size=1000000, seed=0, zones=None,
+                     fault_rate=0.08, start="2024-01-01", period_seconds=5, n_jobs=1):
+    """
+    Génère un grand volume de mesures par blocs écrits au fil de l'eau
+
+    La mémoire reste bornée par quelques blocs. Chaque bloc a sa propre
+    graine dérivée de seed : le résultat est identique quel que soit
+    n_jobs. Avec n_jobs > 1 les blocs sont générés dans des processus et
+    écrits dans l'ordre.
+
+    Args:
+        n_samples (int): Nombre total de lignes
+        output (str): Fichier .csv, ou dossier d'un MeasurementStore
+        chunk_size (int): Lignes par bloc
+        seed (int): Graine globale
+        n_jobs (int): Nombre de processus
+
+    Returns:
+        int: Nombre de lignes écrites
+    """
+    seeds = np.random.SeedSequence(seed).spawn((n_samples + chunk_size - 1) // chunk_size)
+    tasks = [
+        (min(chunk_size, n_samples - offset), seeds[i], zones, fault_rate, start,
+         period_seconds, offset)
+        for i, offset in enumerate(range(0, n_samples, chunk_size))
+    ]
+
+    if output.endswith(".csv"):
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        if os.path.exists(output):
+            os.remove(output)
+
+        def write(chunk, first):
+            chunk.to_csv(output, mode="a", header=first, index=False)
+    else:
+        from services.measurement_store import MeasurementStore
+        store = MeasurementStore(output)
+
+        def write(chunk, first):
+            store.append(chunk)
+
+    written = 0
+    if n_jobs <= 1:
+        for task in tasks:
+            chunk = _generate_chunk_task(task)
+            write(chunk, written == 0)
+            written += len(chunk)
+        return written
+
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        # Au plus 2 blocs en attente par processus
+        pending = []
+        for task in tasks:
+            pending.append(executor.submit(_generate_chunk_task, task))
+            if len(pending) >= 2 * n_jobs:
+                chunk = pending.pop(0).result()
+                write(chunk, written == 0)
+                written += len(chunk)
+        for future in pending:
+            chunk = future.result()
+            write(chunk, written == 0)
+            written += len(chunk)
+    return written
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Génération de mesures synthétiques")
+    parser.add_argument("n_samples", type=int)
+    parser.add_argument("output", help="Fichier .csv ou dossier du magasin de mesures")
+    parser.add_argument("--chunk-size", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fault-rate", type=float, default=0.08)
+    parser.add_argument("--start", default="2024-01-01")
+    parser.add_argument("--period", type=float, default=5)
+    parser.add_argument("--jobs", type=int, default=1)
+    args = parser.parse_args()
+
+    n_rows = generate_to_disk(args.n_samples, args.output, args.chunk_size, args.seed,
+                              fault_rate=args.fault_rate, start=args.start,
+                              period_seconds=args.period, n_jobs=args.jobs)
+    print(f"{n_rows:,} lignes écrites dans {args.output}")
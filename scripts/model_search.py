@@ -0,0 +1,223 @@
+"""
+Recherche d'hyperparamètres et évaluation des modèles de détection
+
+Chaque configuration de la grille est entraînée dans un pool de
+processus ; la qualité (précision/rappel des anomalies, F1 par type de
+panne) est mesurée sur un jeu de test stratifié. Les anomalies sont
+décidées comme en production : score_samples sous le seuil de
+PredictionService (ANOMALY_THRESHOLD), et non par l'offset de
+contamination de sklearn. La latence d'inférence et la taille des
+modèles sont ensuite mesurées séquentiellement dans le processus
+principal (mesures non perturbées par les entraînements), avec le moteur
+compilé (PredictionService(use_compiled=True)).
+
+Usage : python -m scripts.model_search [--store data/store] [--jobs 4]
+"""
+import itertools
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest, RandomForestClassifier
+from sklearn.metrics import accuracy_score, f1_score, precision_recall_fscore_support
+from sklearn.model_selection import train_test_split
+
+from scripts.train_models import FEATURES, StratifiedReservoir
+from services.compiled_forest import CompiledIsolationForest, CompiledRandomForest
+from services.prediction_service import ANOMALY_THRESHOLD
+
+# contamination ne modifie pas score_samples : sans effet au seuil fixe
+# du service, elle n'est pas dans la grille
+DETECTOR_GRID = {
+    "n_estimators": [50, 100, 200],
+    "max_samples": ["auto", 1024]
+}
+
+CLASSIFIER_GRID = {
+    "n_estimators": [25, 50, 100],
+    "max_depth": [8, 16, None],
+    "min_samples_leaf": [1, 5]
+}
+
+# Données partagées par les processus du pool (chargées une fois par processus)
+_worker_data = {}
+
+
+def expand_grid(grid):
+    """Liste des combinaisons d'une grille {paramètre: [valeurs]}"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def split_data(df, test_size=0.25, seed=42):
+    """
+    Découpe entraînement/test stratifiée par type de panne
+
+    Returns:
+        tuple: (DataFrame d'entraînement, DataFrame de test)
+    """
+    return train_test_split(df, test_size=test_size, random_state=seed, stratify=df["type_panne"])
+
+
+def sample_store(store, n_rows, seed=42, batch_rows=500000):
+    """Échantillon uniforme de n_rows mesures étiquetées du magasin (lecture par lots)"""
+    columns = FEATURES + ["panne", "type_panne"]
+    reservoir = StratifiedReservoir(n_rows, seed=seed)
+    for batch in store.iter_batches(columns=columns, batch_rows=batch_rows):
+        reservoir.update(batch[columns].dropna().to_numpy(dtype=object))
+
+    rows, _ = reservoir.sample()
+    df = pd.DataFrame(rows, columns=columns)
+    df[FEATURES] = df[FEATURES].astype(float)
+    df["panne"] = df["panne"].astype(int)
+    return df
+
+
+def _init_worker(train, test, anomaly_threshold=ANOMALY_THRESHOLD):
+    _worker_data["train"] = train
+    _worker_data["test"] = test
+    _worker_data["anomaly_threshold"] = anomaly_threshold
+
+
+def _fit_detector(params):
+    """Entraîne un détecteur et mesure sa qualité sur le jeu de test (règle du service)"""
+    train, test = _worker_data["train"], _worker_data["test"]
+    model = IsolationForest(random_state=42, **params).fit(train[FEATURES])
+
+    is_anomaly = model.score_samples(test[FEATURES]) < _worker_data["anomaly_threshold"]
+    precision, recall, f1, _ = precision_recall_fscore_support(
+        test["panne"].to_numpy() == 1, is_anomaly, average="binary", zero_division=0
+    )
+    quality = {"precision": precision, "recall": recall, "f1": f1}
+    return params, quality, pickle.dumps(model)
+
+
+def _fit_classifier(params):
+    """Entraîne un classifieur sur les pannes et mesure le F1 par type"""
+    train, test = _worker_data["train"], _worker_data["test"]
+    train, test = train[train["panne"] == 1], test[test["panne"] == 1]
+    model = RandomForestClassifier(random_state=42, **params).fit(train[FEATURES], train["type_panne"])
+
+    predicted = model.predict(test[FEATURES])
+    labels = list(model.classes_)
+    per_class = f1_score(test["type_panne"], predicted, labels=labels, average=None, zero_division=0)
+    quality = {
+        "accuracy": accuracy_score(test["type_panne"], predicted),
+        "f1": f1_score(test["type_panne"], predicted, average="macro", zero_division=0),
+        **{f"f1_{label}": score for label, score in zip(labels, per_class)}
+    }
+    return params, quality, pickle.dumps(model)
+
+
+def measure_latency(predict, X, latency_rows=10, repeats=20):
+    """
+    Latence médiane (ms) d'un appel sur latency_rows lignes
+
+    Args:
+        predict (callable): Fonction d'inférence
+        X (pd.DataFrame): Lignes de test (les latency_rows premières sont utilisées)
+    """
+    batch = X.iloc[:latency_rows]
+    predict(batch)  # Préchauffage
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(batch)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1000
+
+
+def _compiled_size(compiled):
+    """Octets des tableaux du moteur compilé"""
+    return sum(array.nbytes for array in compiled.trees.to_arrays("m").values())
+
+
+def search_models(df, detector_grid=None, classifier_grid=None, n_jobs=1, test_size=0.25,
+                  latency_rows=10, seed=42, anomaly_threshold=ANOMALY_THRESHOLD):
+    """
+    Évalue toutes les configurations des deux grilles
+
+    Args:
+        df (pd.DataFrame): Mesures étiquetées (FEATURES, panne, type_panne)
+        detector_grid (dict): Grille IsolationForest (défaut : DETECTOR_GRID)
+        classifier_grid (dict): Grille RandomForestClassifier (défaut : CLASSIFIER_GRID)
+        n_jobs (int): Processus d'entraînement (chaque modèle sur un cœur)
+        test_size (float): Part du jeu de test
+        latency_rows (int): Lignes par appel pour la latence (mesures d'un
+            cycle SCADA, par exemple le nombre de postes)
+        seed (int): Graine de la découpe entraînement/test
+        anomaly_threshold (float): Seuil sur score_samples (celui de PredictionService)
+
+    Returns:
+        tuple: (résultats détecteurs, résultats classifieurs), DataFrames
+            triés par F1 par milliseconde décroissant
+    """
+    train, test = split_data(df, test_size, seed)
+    detector_configs = expand_grid(detector_grid or DETECTOR_GRID)
+    classifier_configs = expand_grid(classifier_grid or CLASSIFIER_GRID)
+
+    tasks = ([(_fit_detector, params) for params in detector_configs]
+             + [(_fit_classifier, params) for params in classifier_configs])
+    if n_jobs > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                 initargs=(train, test, anomaly_threshold)) as executor:
+            futures = [executor.submit(function, params) for function, params in tasks]
+            results = [future.result() for future in futures]
+    else:
+        _init_worker(train, test, anomaly_threshold)
+        results = [function(params) for function, params in tasks]
+    _worker_data.clear()
+
+    # Latence et taille mesurées séquentiellement
+    X_test = test[FEATURES]
+    rows = {"détecteur": [], "classifieur": []}
+    for (function, _), (params, quality, payload) in zip(tasks, results):
+        model = pickle.loads(payload)
+        if function is _fit_detector:
+            kind, compiled = "détecteur", CompiledIsolationForest.from_sklearn(model)
+            predict = compiled.score_samples
+        else:
+            kind, compiled = "classifieur", CompiledRandomForest.from_sklearn(model)
+            predict = compiled.predict_proba
+
+        latency = measure_latency(predict, X_test, latency_rows)
+        rows[kind].append({
+            **params,
+            **quality,
+            "latence_ms": latency,
+            "taille_ko": len(payload) / 1024,
+            "taille_compilee_ko": _compiled_size(compiled) / 1024,
+            "f1_par_ms": quality["f1"] / latency if latency > 0 else np.nan
+        })
+
+    return tuple(
+        pd.DataFrame(rows[kind]).sort_values("f1_par_ms", ascending=False, ignore_index=True)
+        for kind in ["détecteur", "classifieur"]
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+    from scripts.generate_data import generate_data
+    from services.measurement_store import MeasurementStore
+
+    parser = argparse.ArgumentParser(description="Recherche d'hyperparamètres des modèles")
+    parser.add_argument("--store", help="Magasin de mesures (défaut : données synthétiques)")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument("--latency-rows", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.store:
+        data = sample_store(MeasurementStore(args.store), args.rows)
+    else:
+        data = generate_data(n_samples=args.rows, seed=0, output=None)
+
+    detectors, classifiers = search_models(data, n_jobs=args.jobs, latency_rows=args.latency_rows)
+    with pd.option_context("display.width", 200, "display.max_columns", None,
+                           "display.float_format", "{:.3f}".format):
+        print("=== Détecteur d'anomalies ===")
+        print(detectors)
+        print("\n=== Classifieur de pannes ===")
+        print(classifiers)
@@ -1,20 +1,280 @@
 import pandas as pd
+import numpy as np
 import joblib
 import os
+import time
+import threading
+from contextlib import contextmanager
 from sklearn.ensemble import IsolationForest, RandomForestClassifier
+from services.compiled_forest import export_compiled_models
 
 FEATURES = ["tension", "courant", "puissance"]
 
-def train_models(df):
-    os.makedirs("models", exist_ok=True)
+def _rss_mb():
+    """Mémoire résidente du processus (Mo), None hors Linux"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return None
 
-    iso = IsolationForest(contamination=0.08, random_state=42)
-    iso.fit(df[FEATURES])
-    joblib.dump(iso, "models/anomaly_detector.pkl")
+@contextmanager
+def _phase(report, name, measure_memory=False, interval=0.02):
+    """
+    Durée et pic de mémoire résidente d'une phase d'entraînement
 
+    Le pic est relevé par un thread qui échantillonne la mémoire du
+    processus toutes les interval secondes (sans ralentir la phase,
+    contrairement à tracemalloc) ; il inclut les allocations natives
+    de scikit-learn.
+    """
+    if report is None:
+        yield
+        return
+
+    peak = [_rss_mb() if measure_memory else None]
+    stop = threading.Event()
+
+    def sample():
+        while not stop.wait(interval):
+            rss = _rss_mb()
+            if rss is not None and rss > peak[0]:
+                peak[0] = rss
+
+    sampler = threading.Thread(target=sample, daemon=True) if peak[0] is not None else None
+    if sampler is not None:
+        sampler.start()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stop.set()
+        if sampler is not None:
+            sampler.join()
+            peak[0] = max(peak[0], _rss_mb() or 0)
+        report["phases"][name] = {"seconds": elapsed, "peak_rss_mb": peak[0]}
+
+def _fit_models(X, X_pannes, y_pannes, n_jobs=None, report=None, measure_memory=False,
+                models_dir="models"):
+    """Entraîne les deux forêts ; les écrit dans models_dir (None = pas d'écriture)"""
+    if models_dir is not None:
+        os.makedirs(models_dir, exist_ok=True)
+
+    with _phase(report, "détecteur", measure_memory):
+        iso = IsolationForest(contamination=0.08, random_state=42, n_jobs=n_jobs)
+        iso.fit(X)
+        if models_dir is not None:
+            joblib.dump(iso, os.path.join(models_dir, "anomaly_detector.pkl"))
+
+    with _phase(report, "classifieur", measure_memory):
+        clf = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=n_jobs)
+        clf.fit(X_pannes, y_pannes)
+        if models_dir is not None:
+            joblib.dump(clf, os.path.join(models_dir, "classifier.pkl"))
+
+    # Export des forêts aplaties pour le moteur d'inférence compilé
+    if models_dir is not None:
+        with _phase(report, "export", measure_memory):
+            export_compiled_models(iso, clf, os.path.join(models_dir, "compiled_models.npz"))
+
+    return iso, clf
+
+def train_models(df, n_jobs=None, registry=None, models_dir="models"):
     df_pannes = df[df["panne"] == 1]
-    clf = RandomForestClassifier(n_estimators=100, random_state=42)
-    clf.fit(df_pannes[FEATURES], df_pannes["type_panne"])
-    joblib.dump(clf, "models/classifier.pkl")
+    iso, clf = _fit_models(df[FEATURES], df_pannes[FEATURES], df_pannes["type_panne"], n_jobs,
+                           models_dir=models_dir)
+
+    # Nouvelle version active du registre (ModelRegistry), en plus de models/
+    if registry is not None:
+        registry.publish(iso, clf, data=df[FEATURES + ["panne", "type_panne"]], features=FEATURES,
+                         source="train_models")
+    return iso, clf
+
+class StratifiedReservoir:
+    """
+    Échantillon uniforme sans remise, par strate, alimenté lot par lot
+
+    Chaque ligne reçoit une clé aléatoire ; une strate conserve les
+    capacity lignes de plus petites clés vues jusqu'ici, ce qui équivaut
+    à un échantillonnage par réservoir mais se calcule par lot avec
+    np.argpartition. Une strate rare (moins de capacity lignes) est
+    conservée en entier. Les lignes sont stockées en tableaux NumPy.
+    """
+
+    def __init__(self, capacity, seed=None):
+        """
+        Args:
+            capacity (int): Lignes conservées par strate
+            seed (int): Graine du tirage
+        """
+        self.capacity = capacity
+        self.rng = np.random.default_rng(seed)
+        self.samples = {}  # strate -> (lignes, clés)
+        self.seen = {}
+
+    def update(self, values, strata=None):
+        """
+        Args:
+            values (np.ndarray): Lignes du lot (n x colonnes)
+            strata (array-like): Strate de chaque ligne (None = une seule strate)
+        """
+        values = np.asarray(values)
+        if strata is None:
+            groups = [(None, values)] if len(values) else []
+        else:
+            codes, uniques = pd.factorize(np.asarray(strata))
+            groups = [(key, values[codes == code]) for code, key in enumerate(uniques)]
+
+        for key, rows in groups:
+            keys = self.rng.random(len(rows))
+            self.seen[key] = self.seen.get(key, 0) + len(rows)
+
+            current = self.samples.get(key)
+            if current is not None:
+                # Lignes dont la clé dépasse la plus grande conservée : jamais retenues
+                if len(current[1]) >= self.capacity:
+                    candidates = keys < current[1].max()
+                    rows, keys = rows[candidates], keys[candidates]
+                rows = np.concatenate([current[0], rows])
+                keys = np.concatenate([current[1], keys])
+
+            if len(rows) > self.capacity:
+                kept = np.argpartition(keys, self.capacity - 1)[:self.capacity]
+                rows, keys = rows[kept], keys[kept]
+            self.samples[key] = (rows, keys)
+        return self
+
+    def sample(self):
+        """
+        Returns:
+            tuple: (lignes échantillonnées de toutes les strates, strate de chaque ligne)
+        """
+        if not self.samples:
+            return np.empty((0, 0)), np.empty(0, dtype=object)
+        rows = np.concatenate([rows for rows, _ in self.samples.values()])
+        labels = np.concatenate([np.full(len(rows), key, dtype=object)
+                                 for key, (rows, _) in self.samples.items()])
+        return rows, labels
+
+    def counts(self):
+        """Strate -> (lignes conservées, lignes vues)"""
+        return {key: (len(self.samples[key][0]), seen) for key, seen in self.seen.items()}
+
+def train_models_from_store(store, start=None, end=None, zones=None, anomaly_sample_size=200000,
+                            class_sample_size=50000, batch_rows=500000, n_jobs=-1, seed=42,
+                            validator=None, measure_memory=True, registry=None, models_dir="models"):
+    """
+    Entraînement hors mémoire depuis le magasin de mesures
+
+    Les mesures sont lues par lots (MeasurementStore.iter_batches) et
+    validées au fil de l'eau ; seuls deux échantillons restent en mémoire :
+    un réservoir uniforme pour le détecteur d'anomalies (proportion de
+    pannes conservée, cohérente avec contamination) et un réservoir
+    stratifié par type de panne pour le classifieur (les types rares sont
+    gardés en entier, les fréquents plafonnés à class_sample_size). Les
+    forêts sont ensuite entraînées sur n_jobs cœurs.
+
+    Args:
+        store (MeasurementStore): Magasin de mesures étiquetées (panne, type_panne)
+        start (datetime): Début de la période d'entraînement (None = tout)
+        end (datetime): Fin exclue (None = jusqu'à la dernière mesure)
+        zones (list): Zones retenues (None = toutes)
+        anomaly_sample_size (int): Taille de l'échantillon du détecteur
+        class_sample_size (int): Lignes maximales par type de panne
+        batch_rows (int): Lignes par lot lu
+        n_jobs (int): Cœurs utilisés par les forêts (-1 = tous)
+        seed (int): Graine des échantillonnages
+        validator (DataValidator): Plages de validation (défaut : plages intégrées)
+        measure_memory (bool): Relève le pic de mémoire résidente par phase
+        registry (ModelRegistry): Registre où publier les modèles (optionnel)
+        models_dir (str): Dossier où écrire les modèles (None = pas d'écriture) ;
+            ignoré avec un registre, les modèles n'étant alors publiés que là
+
+    Returns:
+        tuple: (IsolationForest, RandomForestClassifier, rapport) ; le
+            rapport contient les volumes lus et échantillonnés et, par
+            phase, la durée (s) et le pic de mémoire résidente (Mo)
+    """
+    from scripts.data_validation import DataValidator
+
+    validator = validator or DataValidator()
+    validator.reset()
+    seeds = np.random.SeedSequence(seed).spawn(2)
+    anomaly_reservoir = StratifiedReservoir(anomaly_sample_size, seed=seeds[0])
+    class_reservoir = StratifiedReservoir(class_sample_size, seed=seeds[1])
+    report = {"phases": {}}
+
+    columns = ["zone", "tension", "courant", "puissance", "panne", "type_panne"]
+    with _phase(report, "lecture et échantillonnage", measure_memory):
+        for batch in store.iter_batches(start, end, zones=zones, columns=columns,
+                                        batch_rows=batch_rows):
+            data = validator.validate(batch)[0].dropna(subset=FEATURES + ["panne", "type_panne"])
+            X = data[FEATURES].to_numpy(dtype=float)
+            pannes = data["panne"].to_numpy() == 1
+            anomaly_reservoir.update(X)
+            class_reservoir.update(X[pannes], data["type_panne"].to_numpy()[pannes])
+
+    quality = validator.report()
+    report.update({
+        "rows_read": quality["rows"],
+        "rows_valid": quality["valid_rows"],
+        "anomaly_sample": anomaly_reservoir.counts().get(None, (0, 0))[0],
+        "class_samples": class_reservoir.counts()
+    })
+    if report["anomaly_sample"] == 0 or not report["class_samples"]:
+        raise ValueError("Aucune mesure étiquetée exploitable dans le magasin")
+
+    X = pd.DataFrame(anomaly_reservoir.sample()[0], columns=FEATURES)
+    X_pannes, y_pannes = class_reservoir.sample()
+    iso, clf = _fit_models(X, pd.DataFrame(X_pannes, columns=FEATURES), y_pannes,
+                           n_jobs, report, measure_memory,
+                           models_dir=None if registry is not None else models_dir)
+
+    if registry is not None:
+        report["version"] = registry.publish(
+            iso, clf, data=X, features=FEATURES, source="train_models_from_store",
+            metrics={"rows_read": report["rows_read"], "rows_valid": report["rows_valid"]}
+        )
+
+    return iso, clf, report
+
+def print_training_report(report):
+    """Affiche les volumes et le coût de chaque phase d'entraînement"""
+    print(f"Mesures lues : {report['rows_read']:,} (valides : {report['rows_valid']:,})")
+    print(f"Échantillon détecteur : {report['anomaly_sample']:,} lignes")
+    for panne_type, (kept, seen) in sorted(report["class_samples"].items()):
+        print(f"  {panne_type:<15} {kept:>10,} / {seen:,}")
+    for name, phase in report["phases"].items():
+        memory = f"{phase['peak_rss_mb']:.0f} Mo" if phase["peak_rss_mb"] is not None else "-"
+        print(f"{name:<28} {phase['seconds']:>8.2f} s   pic {memory}")
+
+if __name__ == "__main__":
+    import argparse
+    from datetime import timedelta
+    from services.measurement_store import MeasurementStore, STORE_PATH
+    from services.model_registry import ModelRegistry, REGISTRY_PATH
+
+    parser = argparse.ArgumentParser(description="Entraînement des modèles depuis le magasin de mesures")
+    parser.add_argument("--store", default=STORE_PATH)
+    parser.add_argument("--days", type=float, help="Derniers jours utilisés (défaut : tout)")
+    parser.add_argument("--anomaly-sample", type=int, default=200000)
+    parser.add_argument("--class-sample", type=int, default=50000)
+    parser.add_argument("--batch-rows", type=int, default=500000)
+    parser.add_argument("--jobs", type=int, default=-1)
+    parser.add_argument("--registry", default=REGISTRY_PATH,
+                        help="Registre où publier la nouvelle version active")
+    args = parser.parse_args()
+
+    store = MeasurementStore(args.store)
+    start = None
+    if args.days is not None:
+        bounds = store.time_range()
+        start = bounds[1] - timedelta(days=args.days) if bounds else None
 
-    return iso, clf
\ No newline at end of file
+    _, _, report = train_models_from_store(store, start=start, anomaly_sample_size=args.anomaly_sample,
+                                           class_sample_size=args.class_sample,
+                                           batch_rows=args.batch_rows, n_jobs=args.jobs,
+                                           registry=ModelRegistry(args.registry))
+    print_training_report(report)
+    print(f"Version publiée : {report['version']}")
@@ -1,13 +1,151 @@
-def generate_alerts(df):
-    alerts = df[df["anomalie"] == 1].copy()
-
-    def criticite(row):
-        if row["panne_predite"] == "Court-circuit":
-            return "Critique"
-        elif row["panne_predite"] == "Surcharge":
-            return "Élevée"
-        else:
-            return "Modérée"
-
-    alerts["criticite"] = alerts.apply(criticite, axis=1)
-    return alerts[["zone", "panne_predite", "criticite"]]
\ No newline at end of file
+"""
+Moteur d'alertes : criticité évaluée par table de règles vectorisée
+"""
+import numpy as np
+import pandas as pd
+
+# Niveaux de criticité, du plus grave au moins grave (ordre d'affichage)
+DEFAULT_LEVELS = [
+    {"name": "Critique", "color": "#ffcccc"},
+    {"name": "Élevée", "color": "#fff3cd"},
+    {"name": "Modérée", "color": "#d4edda"}
+]
+
+# Règles évaluées dans l'ordre : la première qui correspond l'emporte
+DEFAULT_RULES = [
+    {"panne": "Court-circuit", "criticite": "Critique"},
+    {"panne": "Surcharge", "criticite": "Élevée"},
+    {"criticite": "Modérée"}
+]
+
+# Conditions catégorielles : clé de règle -> colonne
+CATEGORY_KEYS = {"panne": "panne_predite", "zone": "zone"}
+
+# Conditions de plage : clé de règle -> (colonne, borne)
+RANGE_KEYS = {
+    "confiance_min": ("confiance", "min"), "confiance_max": ("confiance", "max"),
+    "tension_min": ("tension", "min"), "tension_max": ("tension", "max"),
+    "courant_min": ("courant", "min"), "courant_max": ("courant", "max")
+}
+
+class AlertEngine:
+    """
+    Attribue une criticité aux anomalies à partir d'une table de règles
+
+    Une règle combine des conditions catégorielles (type de panne, zone ;
+    valeur unique ou liste) et des plages (confiance, tension, courant,
+    bornes min incluses et max exclues). Les colonnes catégorielles sont
+    codées une fois par batch ; chaque règle devient une table de
+    correspondance code -> booléen indexée par NumPy. La criticité
+    produite est un Categorical ordonné : trier les alertes revient à
+    trier des codes entiers.
+    """
+
+    def __init__(self, rules=None, levels=None):
+        """
+        Args:
+            rules (list): Règles {"panne", "zone", "<mesure>_min/_max", "criticite"}
+            levels (list): Niveaux {"name", "color"} du plus grave au moins grave
+        """
+        self.levels = [dict(level) for level in (levels or DEFAULT_LEVELS)]
+        self.level_names = [level["name"] for level in self.levels]
+        self.level_colors = np.array([level.get("color", "") for level in self.levels], dtype=object)
+        self.dtype = pd.CategoricalDtype(self.level_names, ordered=True)
+
+        self.rules = []
+        for rule in rules or DEFAULT_RULES:
+            unknown = set(rule) - set(CATEGORY_KEYS) - set(RANGE_KEYS) - {"criticite"}
+            if unknown:
+                raise ValueError(f"Condition inconnue dans la règle {rule}: {sorted(unknown)}")
+            if rule.get("criticite") not in self.level_names:
+                raise ValueError(f"Criticité inconnue: {rule.get('criticite')}")
+            self.rules.append(dict(rule))
+
+        # Sans règle par défaut, les alertes non couvertes sont du niveau le moins grave
+        self.default_code = len(self.level_names) - 1
+
+    @classmethod
+    def from_config(cls, config):
+        """Construit le moteur depuis la section alerts de config.yaml"""
+        section = config.get("alerts") or {}
+        return cls(section.get("rules"), section.get("levels"))
+
+    def _category_mask(self, values, accepted):
+        """Appartenance à une liste de valeurs via codes catégoriels et table de correspondance"""
+        accepted = accepted if isinstance(accepted, list) else [accepted]
+        codes, uniques = pd.factorize(values)
+        lookup = np.append(np.isin(uniques, accepted), False)  # Code -1 (NaN) -> False
+        return lookup[codes]
+
+    def evaluate(self, df):
+        """
+        Codes de criticité (0 = plus grave) de chaque ligne
+
+        Returns:
+            np.ndarray: Indices dans level_names
+        """
+        n_rows = len(df)
+        codes = np.full(n_rows, self.default_code, dtype=np.int8)
+        unassigned = np.ones(n_rows, dtype=bool)
+        category_cache = {}
+
+        for rule in self.rules:
+            match = unassigned.copy()
+
+            for key, column in CATEGORY_KEYS.items():
+                if key not in rule:
+                    continue
+                if column not in df.columns:
+                    match[:] = False
+                    break
+                cache_key = (key, repr(rule[key]))
+                if cache_key not in category_cache:
+                    category_cache[cache_key] = self._category_mask(df[column].to_numpy(), rule[key])
+                match &= category_cache[cache_key]
+
+            for key, (column, bound) in RANGE_KEYS.items():
+                if key not in rule or not match.any():
+                    continue
+                if column not in df.columns:
+                    match[:] = False
+                    break
+                values = df[column].to_numpy(dtype=float)
+                match &= values >= rule[key] if bound == "min" else values < rule[key]
+
+            codes[match] = self.level_names.index(rule["criticite"])
+            unassigned &= ~match
+            if not unassigned.any():
+                break
+
+        return codes
+
+    def generate(self, df):
+        """
+        Alertes des lignes en anomalie
+
+        Returns:
+            pd.DataFrame: zone, panne_predite, criticite (Categorical ordonné)
+        """
+        anomalies = df[df["anomalie"].to_numpy() == 1]
+        alerts = anomalies[["zone", "panne_predite"]].copy()
+        alerts["criticite"] = pd.Categorical.from_codes(self.evaluate(anomalies), dtype=self.dtype)
+        return alerts
+
+    def level_codes(self, alerts):
+        """Codes de criticité d'alertes déjà générées"""
+        return alerts["criticite"].astype(self.dtype).cat.codes.to_numpy()
+
+    def sort(self, alerts):
+        """Alertes triées du plus grave au moins grave (tri stable sur les codes)"""
+        return alerts.iloc[np.argsort(self.level_codes(alerts), kind="stable")]
+
+    def row_colors(self, alerts):
+        """Couleur de fond de chaque alerte (tableau aligné sur les lignes)"""
+        return self.level_colors[self.level_codes(alerts)]
+
+
+_default_engine = AlertEngine()
+
+
+def generate_alerts(df, engine=None):
+    return (engine or _default_engine).generate(df)
@@ -0,0 +1,152 @@
+"""
+Gestion des alertes par épisodes : anomalies consécutives regroupées
+"""
+from collections import deque
+import numpy as np
+import pandas as pd
+
+from services.alert_engine import AlertEngine
+
+EPISODE_COLUMNS = ["zone", "panne_predite", "criticite", "statut", "debut", "fin",
+                   "duree", "nb_mesures", "pic_score", "confiance_max"]
+
+
+class AlertManager:
+    """
+    Regroupe les anomalies en épisodes par zone et type de panne
+
+    Deux anomalies d'une même zone et d'un même type appartiennent au même
+    épisode si elles sont séparées de moins de gap_seconds. Un épisode est
+    clos quand aucune anomalie correspondante n'est arrivée depuis
+    gap_seconds (horloge = horodatage le plus récent reçu). Chaque batch
+    est découpé en séquences par tri et différences vectorisés ; seule la
+    fusion des séquences avec les épisodes ouverts est faite en Python,
+    ce qui coûte en fonction du nombre d'incidents et non de mesures.
+    """
+
+    def __init__(self, gap_seconds=300, max_closed=10000, engine=None):
+        """
+        Args:
+            gap_seconds (float): Silence au-delà duquel un épisode est clos
+            max_closed (int): Nombre d'épisodes clos conservés
+            engine (AlertEngine): Règles de criticité (pire niveau de l'épisode)
+        """
+        self.gap_seconds = gap_seconds
+        self.engine = engine or AlertEngine()
+        self.open = {}  # (zone, panne_predite) -> épisode en cours
+        self.closed = deque(maxlen=max_closed)
+        self.clock = None  # Horodatage le plus récent (secondes depuis l'epoch)
+        self.total_opened = 0
+
+    def _close(self, key):
+        episode = self.open.pop(key)
+        episode["statut"] = "Clos"
+        self.closed.append(episode)
+
+    def update(self, batch):
+        """
+        Intègre un batch de mesures scorées
+
+        Args:
+            batch (pd.DataFrame): timestamp, zone, anomalie, panne_predite,
+                et optionnellement anomalie_score, confiance
+
+        Returns:
+            int: Nombre d'épisodes ouverts par ce batch
+        """
+        if batch.empty:
+            return 0
+
+        seconds = pd.to_datetime(batch["timestamp"]).to_numpy().astype("datetime64[ns]").astype(np.int64) / 1e9
+        latest = float(seconds.max())
+        self.clock = latest if self.clock is None else max(self.clock, latest)
+        opened = 0
+
+        anomalous = batch["anomalie"].to_numpy() == 1
+        if anomalous.any():
+            rows = batch[anomalous]
+            times = seconds[anomalous]
+            n_rows = len(rows)
+
+            keys, uniques = pd.factorize(pd.MultiIndex.from_arrays([rows["zone"], rows["panne_predite"]]))
+            levels = self.engine.evaluate(rows)
+            scores = (rows["anomalie_score"].to_numpy(dtype=float) if "anomalie_score" in rows.columns
+                      else np.zeros(n_rows))
+            confidences = (rows["confiance"].to_numpy(dtype=float) if "confiance" in rows.columns
+                           else np.full(n_rows, np.nan))
+
+            # Séquences : même clé, écarts inférieurs à gap_seconds
+            order = np.lexsort((times, keys))
+            keys, times = keys[order], times[order]
+            new_run = np.ones(n_rows, dtype=bool)
+            new_run[1:] = (keys[1:] != keys[:-1]) | (np.diff(times) > self.gap_seconds)
+            starts = np.flatnonzero(new_run)
+
+            run_keys = keys[starts]
+            run_start = times[starts]
+            run_end = np.maximum.reduceat(times, starts)
+            run_count = np.diff(np.append(starts, n_rows))
+            run_level = np.minimum.reduceat(levels[order], starts)
+            run_score = np.minimum.reduceat(scores[order], starts)
+            run_confidence = np.fmax.reduceat(confidences[order], starts)
+
+            for i in range(len(starts)):
+                key = uniques[run_keys[i]]
+                episode = self.open.get(key)
+
+                if episode is not None and run_start[i] - episode["fin"] <= self.gap_seconds:
+                    episode["fin"] = max(episode["fin"], run_end[i])
+                    episode["nb_mesures"] += int(run_count[i])
+                    episode["level"] = min(episode["level"], int(run_level[i]))
+                    episode["pic_score"] = min(episode["pic_score"], float(run_score[i]))
+                    episode["confiance_max"] = np.fmax(episode["confiance_max"], run_confidence[i])
+                    continue
+
+                if episode is not None:
+                    self._close(key)
+                self.open[key] = {
+                    "zone": key[0],
+                    "panne_predite": key[1],
+                    "level": int(run_level[i]),
+                    "statut": "En cours",
+                    "debut": run_start[i],
+                    "fin": run_end[i],
+                    "nb_mesures": int(run_count[i]),
+                    "pic_score": float(run_score[i]),
+                    "confiance_max": float(run_confidence[i])
+                }
+                opened += 1
+
+        # Épisodes sans nouvelle anomalie depuis gap_seconds
+        for key in [k for k, e in self.open.items() if self.clock - e["fin"] > self.gap_seconds]:
+            self._close(key)
+
+        self.total_opened += opened
+        return opened
+
+    def episodes(self, include_closed=True, since=None):
+        """
+        Épisodes triés par criticité puis du plus récent au plus ancien
+
+        Args:
+            include_closed (bool): Inclut les épisodes clos conservés
+            since (datetime): Ne garde que les épisodes actifs après cette date
+
+        Returns:
+            pd.DataFrame: Colonnes EPISODE_COLUMNS
+        """
+        records = list(self.open.values()) + (list(self.closed) if include_closed else [])
+        if since is not None:
+            cutoff = pd.Timestamp(since).value / 1e9
+            records = [r for r in records if r["fin"] >= cutoff]
+        if not records:
+            return pd.DataFrame(columns=EPISODE_COLUMNS)
+
+        df = pd.DataFrame(records)
+        df["criticite"] = pd.Categorical.from_codes(df["level"].to_numpy(), dtype=self.engine.dtype)
+        df["debut"] = pd.to_datetime(df["debut"] * 1e9)
+        df["fin"] = pd.to_datetime(df["fin"] * 1e9)
+        df["duree"] = df["fin"] - df["debut"]
+
+        order = np.lexsort((-df["fin"].to_numpy().astype(np.int64), df["level"].to_numpy()))
+        return df.iloc[order][EPISODE_COLUMNS].reset_index(drop=True)
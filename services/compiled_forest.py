@@ -0,0 +1,381 @@
+"""
+Moteur d'inférence compilé pour les forêts d'arbres Sonelgaz
+
+Les arbres d'un IsolationForest ou d'un RandomForestClassifier entraînés
+sont aplatis dans des tableaux NumPy contigus (feature, seuil, enfants,
+valeurs des feuilles). L'évaluation parcourt tous les arbres pour tous les
+échantillons en même temps, niveau par niveau, sans la validation ni le
+dispatch Python arbre par arbre de sklearn. Les scores et classes obtenus
+sont identiques à ceux de sklearn (mêmes comparaisons en float32, même
+ordre d'accumulation).
+"""
+import os
+import numpy as np
+import pandas as pd
+
+COMPILED_MODELS_PATH = "models/compiled_models.npz"
+
+# Nombre maximal de lignes évaluées simultanément (mémoire = arbres x lignes)
+DEFAULT_CHUNK_SIZE = 4096
+
+
+def _average_path_length(n_samples_leaf):
+    """
+    Longueur moyenne de chemin d'un arbre d'isolation de n échantillons
+    (même formule que sklearn)
+    """
+    n_samples_leaf = np.asarray(n_samples_leaf, dtype=float)
+    average_path_length = np.zeros(n_samples_leaf.shape)
+
+    mask_1 = n_samples_leaf <= 1
+    mask_2 = n_samples_leaf == 2
+    not_mask = ~np.logical_or(mask_1, mask_2)
+
+    average_path_length[mask_1] = 0.0
+    average_path_length[mask_2] = 1.0
+    average_path_length[not_mask] = (
+        2.0 * (np.log(n_samples_leaf[not_mask] - 1.0) + np.euler_gamma)
+        - 2.0 * (n_samples_leaf[not_mask] - 1.0) / n_samples_leaf[not_mask]
+    )
+
+    return average_path_length
+
+
+def _node_depths(children_left, children_right):
+    """Profondeur de chaque nœud d'un arbre (racine = 1)"""
+    depths = np.zeros(len(children_left), dtype=np.int64)
+    depths[0] = 1
+    frontier = np.array([0])
+
+    while len(frontier):
+        children = np.concatenate([children_left[frontier], children_right[frontier]])
+        parents = np.concatenate([frontier, frontier])
+        is_child = children != -1
+        depths[children[is_child]] = depths[parents[is_child]] + 1
+        frontier = children[is_child]
+
+    return depths
+
+
+class CompiledTrees:
+    """
+    Ensemble d'arbres aplatis dans des tableaux de nœuds contigus
+
+    Les feuilles pointent sur elles-mêmes : après max_depth itérations,
+    chaque parcours est arrêté sur sa feuille.
+    """
+
+    def __init__(self, feature, threshold, left, right, missing_left, roots,
+                 max_depth, node_values, feature_names):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.node_values = node_values
+        self.feature_names = list(feature_names)
+
+    @classmethod
+    def from_estimators(cls, estimators, node_values, feature_names, estimators_features=None):
+        """
+        Aplatit une liste d'arbres sklearn
+
+        Args:
+            estimators (list): Arbres sklearn entraînés
+            node_values (list): Valeur de chaque nœud, par arbre
+            feature_names (list): Features dans l'ordre d'entraînement
+            estimators_features (list): Features vues par chaque arbre (bagging)
+        """
+        features, thresholds, lefts, rights, missing_lefts, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for i, estimator in enumerate(estimators):
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count) + offset
+            is_leaf = tree.children_left == -1
+
+            feature = tree.feature.astype(np.int64)
+            if estimators_features is not None:
+                feature = np.asarray(estimators_features[i])[np.where(is_leaf, 0, feature)]
+            feature = np.where(is_leaf, 0, feature)
+
+            missing_left = getattr(tree, "missing_go_to_left", None)
+            if missing_left is None:
+                missing_left = np.zeros(tree.node_count)
+
+            features.append(feature)
+            thresholds.append(tree.threshold)
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+            rights.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+            missing_lefts.append(np.asarray(missing_left).astype(bool))
+            roots.append(offset)
+
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features), dtype=np.int64),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+            left=np.ascontiguousarray(np.concatenate(lefts), dtype=np.int64),
+            right=np.ascontiguousarray(np.concatenate(rights), dtype=np.int64),
+            missing_left=np.concatenate(missing_lefts),
+            roots=np.array(roots, dtype=np.int64),
+            max_depth=max_depth,
+            node_values=np.ascontiguousarray(np.concatenate(node_values)),
+            feature_names=feature_names
+        )
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def to_arrays(self, prefix):
+        """Tableaux à sauvegarder, préfixés par le nom du modèle"""
+        return {
+            f"{prefix}_feature": self.feature,
+            f"{prefix}_threshold": self.threshold,
+            f"{prefix}_left": self.left,
+            f"{prefix}_right": self.right,
+            f"{prefix}_missing_left": self.missing_left,
+            f"{prefix}_roots": self.roots,
+            f"{prefix}_max_depth": np.array(self.max_depth),
+            f"{prefix}_node_values": self.node_values,
+            f"{prefix}_feature_names": np.array(self.feature_names)
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix):
+        return cls(
+            feature=arrays[f"{prefix}_feature"],
+            threshold=arrays[f"{prefix}_threshold"],
+            left=arrays[f"{prefix}_left"],
+            right=arrays[f"{prefix}_right"],
+            missing_left=arrays[f"{prefix}_missing_left"],
+            roots=arrays[f"{prefix}_roots"],
+            max_depth=arrays[f"{prefix}_max_depth"],
+            node_values=arrays[f"{prefix}_node_values"],
+            feature_names=arrays[f"{prefix}_feature_names"].tolist()
+        )
+
+    def prepare_input(self, X):
+        """Convertit l'entrée en float32, comme sklearn avant le parcours des arbres"""
+        if isinstance(X, pd.DataFrame):
+            X = X[self.feature_names].to_numpy()
+        X = np.asarray(X, dtype=np.float32)
+        n_features = len(self.feature_names)
+        if X.ndim == 1 and X.shape[0] == n_features:
+            # Un seul échantillon
+            X = X.reshape(1, n_features)
+        if X.ndim != 2 or X.shape[1] != n_features:
+            raise ValueError(f"Entrée de forme {X.shape} : {n_features} features attendues "
+                             f"({', '.join(self.feature_names)})")
+        return X
+
+    def apply(self, X):
+        """
+        Feuille atteinte dans chaque arbre pour chaque échantillon
+
+        Args:
+            X (np.ndarray): Échantillons en float32 (n_samples, n_features)
+
+        Returns:
+            np.ndarray: Indices de nœuds de forme (n_trees, n_samples)
+        """
+        n_samples = X.shape[0]
+        rows = np.arange(n_samples)[np.newaxis, :]
+        nodes = np.repeat(self.roots[:, np.newaxis], n_samples, axis=1)
+        has_missing = np.isnan(X).any()
+
+        for _ in range(self.max_depth):
+            values = X[rows, self.feature[nodes]]
+            go_left = values <= self.threshold[nodes]
+            if has_missing:
+                go_left |= np.isnan(values) & self.missing_left[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+        return nodes
+
+    def accumulate(self, X):
+        """
+        Somme des valeurs de feuilles sur les arbres, accumulée arbre par
+        arbre dans l'ordre de sklearn pour un résultat identique
+        """
+        leaves = self.apply(X)
+        total = np.zeros((X.shape[0],) + self.node_values.shape[1:])
+        for tree_leaves in leaves:
+            total += self.node_values[tree_leaves]
+        return total
+
+
+class CompiledIsolationForest:
+    """Évaluateur compilé équivalent à IsolationForest.score_samples"""
+
+    def __init__(self, trees, denominator, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.trees = trees
+        self.denominator = float(denominator)
+        self.chunk_size = chunk_size
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Compile un IsolationForest entraîné"""
+        node_values = []
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            depths = _node_depths(tree.children_left, tree.children_right)
+            node_values.append(depths + _average_path_length(tree.n_node_samples) - 1.0)
+
+        trees = CompiledTrees.from_estimators(
+            model.estimators_,
+            node_values,
+            feature_names=getattr(model, "feature_names_in_", range(model.n_features_in_)),
+            estimators_features=model.estimators_features_
+        )
+        denominator = len(model.estimators_) * _average_path_length([model.max_samples_])[0]
+        return cls(trees, denominator)
+
+    def score_samples(self, X):
+        """Score d'anomalie (plus il est bas, plus l'échantillon est anormal)"""
+        X = self.trees.prepare_input(X)
+        scores = np.empty(X.shape[0])
+
+        for start in range(0, X.shape[0], self.chunk_size):
+            depths = self.trees.accumulate(X[start:start + self.chunk_size])
+            scores[start:start + len(depths)] = -2 ** (
+                -np.divide(
+                    depths, self.denominator,
+                    out=np.ones_like(depths), where=self.denominator != 0
+                )
+            )
+
+        return scores
+
+
+class CompiledRandomForest:
+    """Évaluateur compilé équivalent à RandomForestClassifier"""
+
+    def __init__(self, trees, classes, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.trees = trees
+        self.classes_ = classes
+        self.chunk_size = chunk_size
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Compile un RandomForestClassifier entraîné (mono-sortie)"""
+        node_values = []
+        for estimator in model.estimators_:
+            proba = estimator.tree_.value[:, 0, :model.n_classes_]
+            normalizer = proba.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            node_values.append(proba / normalizer)
+
+        trees = CompiledTrees.from_estimators(
+            model.estimators_,
+            node_values,
+            feature_names=getattr(model, "feature_names_in_", range(model.n_features_in_))
+        )
+        return cls(trees, np.asarray(model.classes_))
+
+    def predict_proba(self, X):
+        """Probabilités moyennes des arbres, par classe"""
+        X = self.trees.prepare_input(X)
+        probas = np.empty((X.shape[0], len(self.classes_)))
+
+        for start in range(0, X.shape[0], self.chunk_size):
+            chunk = self.trees.accumulate(X[start:start + self.chunk_size])
+            chunk /= self.trees.n_trees
+            probas[start:start + len(chunk)] = chunk
+
+        return probas
+
+    def predict(self, X):
+        """Classe la plus probable"""
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+
+def _compiled_arrays(compiled_iso, compiled_clf):
+    """Tableaux représentant les deux modèles compilés"""
+    return {
+        "anomaly_denominator": np.array(compiled_iso.denominator),
+        "classifier_classes": compiled_clf.classes_.astype(str),
+        **compiled_iso.trees.to_arrays("anomaly"),
+        **compiled_clf.trees.to_arrays("classifier")
+    }
+
+
+def _compiled_from_arrays(arrays):
+    """Reconstruit les deux modèles compilés depuis leurs tableaux"""
+    compiled_iso = CompiledIsolationForest(
+        CompiledTrees.from_arrays(arrays, "anomaly"),
+        arrays["anomaly_denominator"]
+    )
+    compiled_clf = CompiledRandomForest(
+        CompiledTrees.from_arrays(arrays, "classifier"),
+        np.asarray(arrays["classifier_classes"]).astype(object)
+    )
+    return compiled_iso, compiled_clf
+
+
+def export_compiled_models(anomaly_detector, classifier, path=COMPILED_MODELS_PATH):
+    """
+    Compile les modèles sklearn et les sauvegarde dans une archive .npz
+
+    Returns:
+        tuple: (CompiledIsolationForest, CompiledRandomForest)
+    """
+    compiled_iso = CompiledIsolationForest.from_sklearn(anomaly_detector)
+    compiled_clf = CompiledRandomForest.from_sklearn(classifier)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    np.savez(path, **_compiled_arrays(compiled_iso, compiled_clf))
+
+    return compiled_iso, compiled_clf
+
+
+def load_compiled_models(path=COMPILED_MODELS_PATH):
+    """
+    Charge les modèles compilés depuis une archive .npz
+
+    Returns:
+        tuple: (CompiledIsolationForest, CompiledRandomForest)
+    """
+    with np.load(path, allow_pickle=False) as arrays:
+        return _compiled_from_arrays(arrays)
+
+
+def save_compiled_arrays(compiled, directory):
+    """
+    Sauvegarde les modèles compilés, un fichier .npy par tableau
+
+    Contrairement à l'archive .npz, chaque tableau peut ensuite être
+    projeté en mémoire (load_compiled_arrays).
+
+    Args:
+        compiled (tuple): (CompiledIsolationForest, CompiledRandomForest)
+        directory (str): Dossier de destination
+    """
+    os.makedirs(directory, exist_ok=True)
+    for name, array in _compiled_arrays(*compiled).items():
+        np.save(os.path.join(directory, f"{name}.npy"), array, allow_pickle=False)
+
+
+def load_compiled_arrays(directory, mmap_mode="r"):
+    """
+    Charge les modèles compilés sauvegardés par save_compiled_arrays
+
+    Avec mmap_mode="r", les tableaux de nœuds sont des projections en
+    lecture seule des fichiers : les processus qui chargent la même
+    version partagent les mêmes pages mémoire (cache du système).
+
+    Returns:
+        tuple: (CompiledIsolationForest, CompiledRandomForest)
+    """
+    # np.asarray : vue ndarray sur la projection (sans la sous-classe memmap)
+    arrays = {
+        name[:-len(".npy")]: np.asarray(np.load(os.path.join(directory, name), mmap_mode=mmap_mode,
+                                                allow_pickle=False))
+        for name in os.listdir(directory) if name.endswith(".npy")
+    }
+    return _compiled_from_arrays(arrays)
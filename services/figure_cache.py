@@ -0,0 +1,88 @@
+"""
+Cache des figures du dashboard, indexé par version des données
+"""
+from collections import OrderedDict
+import threading
+
+
+class FigureCache:
+    """
+    Cache LRU de figures Plotly borné en nombre d'entrées et en mémoire
+
+    La clé combine le nom de la figure, une version des données (numéro
+    de lot du pipeline, fenêtre affichée) et les paramètres d'affichage :
+    tant que la version ne change pas, les reruns réutilisent la figure
+    déjà construite. La taille d'une entrée est celle de sa sérialisation
+    JSON (ce qui est envoyé au navigateur), mesurée une fois à l'insertion.
+    Partagé entre sessions : les accès sont protégés par un verrou.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_entries=256):
+        """
+        Args:
+            max_bytes (int): Taille cumulée maximale des figures (octets)
+            max_entries (int): Nombre maximal de figures
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # clé -> (figure, taille)
+        self._lock = threading.Lock()
+
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_create(self, key, builder):
+        """
+        Figure en cache, ou construite par builder() puis mise en cache
+
+        Args:
+            key (tuple): Nom, version des données et paramètres
+            builder (callable): Construit la figure (ou None)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Construction hors verrou : les autres sessions ne sont pas bloquées
+        figure = builder()
+        size = len(figure.to_json()) if figure is not None else 0
+
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key)[1]
+            if size <= self.max_bytes:
+                self._entries[key] = (figure, size)
+                self.bytes += size
+                self._evict()
+        return figure
+
+    def _evict(self):
+        """Retire les figures les moins récemment utilisées au-delà des limites"""
+        while self._entries and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+            _, (_, size) = self._entries.popitem(last=False)
+            self.bytes -= size
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """Compteurs du cache"""
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / requests if requests else 0.0
+            }
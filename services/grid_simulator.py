@@ -0,0 +1,374 @@
+"""
+Simulateur de réseau électrique : séries temporelles corrélées par poste
+"""
+from datetime import datetime, timedelta
+import threading
+import time
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+ZONES = ["Nord", "Sud", "Est", "Ouest", "Centre"]
+FAULT_TYPES = ["Court-circuit", "Surcharge", "Ligne coupée"]
+COLUMNS = ["timestamp", "station", "zone", "tension", "courant", "puissance", "panne", "type_panne"]
+
+# Durées des épisodes de panne (secondes, bornes min/max)
+FAULT_DURATIONS = {
+    "Court-circuit": (5, 60),
+    "Surcharge": (300, 1800),
+    "Ligne coupée": (600, 7200)
+}
+
+
+def daily_load_curve(hours):
+    """
+    Facteur de charge selon l'heure de la journée
+
+    Creux nocturne (~0.6), pointe du matin vers 8 h 30 et pointe du soir
+    vers 20 h ; la courbe est continue à minuit.
+    """
+    hours = np.asarray(hours, dtype=float) % 24
+
+    def peak(center, width):
+        distance = (hours - center + 12) % 24 - 12
+        return np.exp(-0.5 * (distance / width) ** 2)
+
+    return 0.6 + 0.25 * peak(8.5, 2.0) + 0.45 * peak(20.0, 2.5)
+
+
+class GridSimulator:
+    """
+    Génère des mesures tension/courant par poste à pas de temps fixe
+
+    Le courant suit la courbe de charge journalière du poste, perturbée
+    par un bruit AR(1) (corrélé dans le temps) ; la tension baisse avec le
+    courant (chute dans l'impédance de ligne). Des épisodes de panne
+    démarrent selon un processus de Poisson par poste et durent plusieurs
+    pas : court-circuit (surintensité brève, creux de tension), surcharge
+    (courant +50 à 80 %), ligne coupée (courant quasi nul). Toutes les
+    opérations sont vectorisées sur les postes et sur les pas d'un bloc.
+    """
+
+    def __init__(self, stations=None, n_stations=10, zones=None, sample_seconds=5, start=None,
+                 seed=None, fault_rate_per_hour=0.1, fault_weights=(0.3, 0.4, 0.3),
+                 fault_durations=None, correlation_seconds=600):
+        """
+        Args:
+            stations (list): Postes {"name", "zone"} (défaut : n_stations générés)
+            n_stations (int): Nombre de postes générés si stations est vide
+            zones (list): Zones des postes générés
+            sample_seconds (float): Pas d'échantillonnage
+            start (datetime): Horodatage de la première mesure (défaut : maintenant)
+            seed (int): Graine du générateur
+            fault_rate_per_hour (float): Nombre moyen de pannes par poste et par heure
+            fault_weights (tuple): Probabilités des types de FAULT_TYPES
+            fault_durations (dict): Bornes de durée par type (secondes)
+            correlation_seconds (float): Temps de corrélation du bruit
+        """
+        zones = zones or ZONES
+        if not stations:
+            stations = [{"name": f"Poste_{zones[i % len(zones)]}_{i // len(zones) + 1:02d}",
+                         "zone": zones[i % len(zones)]}
+                        for i in range(n_stations)]
+        self.stations = [dict(station) for station in stations]
+        for station in self.stations:
+            station.setdefault("zone", station["name"])
+        self.n_stations = len(self.stations)
+
+        self.sample_seconds = sample_seconds
+        self.fault_rate_per_hour = fault_rate_per_hour
+        self.fault_weights = np.asarray(fault_weights, dtype=float) / np.sum(fault_weights)
+        self.fault_durations = dict(FAULT_DURATIONS, **(fault_durations or {}))
+        self.rng = np.random.default_rng(seed)
+
+        start = pd.Timestamp(start if start is not None else datetime.now())
+        self.clock = start.value / 1e9  # Secondes depuis l'epoch (heure locale naïve)
+
+        # Caractéristiques propres à chaque poste
+        n = self.n_stations
+        self.base_courant = self.rng.uniform(7, 12, n)
+        self.nominal_tension = 230 + self.rng.uniform(-3, 3, n)
+        self.impedance = self.rng.uniform(0.3, 0.6, n)  # Chute de tension (V/A)
+
+        # Bruit AR(1) tension/courant : coefficient et état du filtre
+        self.phi = np.exp(-sample_seconds / correlation_seconds)
+        self._noise_state = self.phi * self.rng.standard_normal((1, n, 2))
+
+        # Épisodes de panne : en cours (par poste) et historique complet
+        self.episodes = []
+        self._active = {}
+        self._fault_end = np.full(n, -np.inf)
+
+        self.station_names = np.array([s["name"] for s in self.stations], dtype=object)
+        self.station_zones = np.array([s["zone"] for s in self.stations], dtype=object)
+        self._type_labels = np.array(["OK"] + FAULT_TYPES, dtype=object)
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Construit le simulateur depuis config.yaml
+
+        Les postes sont ceux de scada.stations s'ils sont nombreux, sinon
+        simulation.n_stations postes générés ; l'horloge démarre
+        history_hours avant maintenant.
+        """
+        sim = config.get("simulation", {})
+        stations = config.get("scada", {}).get("stations") or []
+        n_stations = sim.get("n_stations", 10)
+        return cls(
+            stations=stations if len(stations) >= n_stations else None,
+            n_stations=n_stations,
+            sample_seconds=sim.get("sample_seconds", 5),
+            start=datetime.now() - timedelta(hours=sim.get("history_hours", 0)),
+            seed=sim.get("seed"),
+            fault_rate_per_hour=sim.get("fault_rate_per_hour", 0.1)
+        )
+
+    @property
+    def current_time(self):
+        """Horodatage du prochain pas"""
+        return pd.Timestamp(int(self.clock * 1e9))
+
+    # ------------------------------------------------------------------
+    # Épisodes de panne
+    # ------------------------------------------------------------------
+    def _start_faults(self, times):
+        """Tire les débuts de panne du bloc (au plus une panne à la fois par poste)"""
+        probability = self.fault_rate_per_hour * self.sample_seconds / 3600
+        candidates = np.argwhere(self.rng.random((len(times), self.n_stations)) < probability)
+
+        for step, station in candidates:
+            start = times[step]
+            if self._fault_end[station] > start:
+                continue
+
+            code = int(self.rng.choice(len(FAULT_TYPES), p=self.fault_weights))
+            low, high = self.fault_durations[FAULT_TYPES[code]]
+            episode = {
+                "station": self.stations[station]["name"],
+                "zone": self.stations[station]["zone"],
+                "type_panne": FAULT_TYPES[code],
+                "start": start,
+                "end": start + self.rng.uniform(low, high),
+                "severity": self.rng.random(),
+                "_index": station,
+                "_code": code
+            }
+            self._fault_end[station] = episode["end"]
+            self._active.setdefault(station, []).append(episode)
+            self.episodes.append(episode)
+
+    def _fault_matrix(self, times):
+        """Codes de panne (-1 = aucune) et sévérités par pas et par poste"""
+        codes = np.full((len(times), self.n_stations), -1, dtype=np.int64)
+        severity = np.zeros((len(times), self.n_stations))
+
+        for station, episodes in list(self._active.items()):
+            for episode in episodes:
+                first = int(np.searchsorted(times, episode["start"], side="left"))
+                last = int(np.searchsorted(times, episode["end"], side="left"))
+                codes[first:last, station] = episode["_code"]
+                severity[first:last, station] = episode["severity"]
+
+            # Les épisodes terminés avant le pas suivant sont retirés
+            remaining = [e for e in episodes if e["end"] > times[-1] + self.sample_seconds]
+            if remaining:
+                self._active[station] = remaining
+            else:
+                del self._active[station]
+
+        return codes, severity
+
+    def fault_episodes(self):
+        """Épisodes de panne simulés (début, fin, type, poste)"""
+        if not self.episodes:
+            return pd.DataFrame(columns=["station", "zone", "type_panne", "start", "end"])
+        episodes = pd.DataFrame(self.episodes)[["station", "zone", "type_panne", "start", "end"]]
+        episodes["start"] = pd.to_datetime(episodes["start"] * 1e9)
+        episodes["end"] = pd.to_datetime(episodes["end"] * 1e9)
+        return episodes
+
+    # ------------------------------------------------------------------
+    # Génération
+    # ------------------------------------------------------------------
+    def step(self, n_steps=1):
+        """
+        Avance l'horloge de n_steps pas
+
+        Returns:
+            pd.DataFrame: n_steps x n_stations lignes (ordre chronologique)
+                timestamp, station, zone, tension, courant, puissance,
+                panne, type_panne
+        """
+        n = self.n_stations
+        times = self.clock + np.arange(n_steps) * self.sample_seconds
+        self.clock = times[-1] + self.sample_seconds
+
+        # Charge journalière et bruit corrélé
+        load = daily_load_curve((times % 86400) / 3600)[:, None]
+        innovations = self.rng.standard_normal((n_steps, n, 2))
+        noise, self._noise_state = lfilter([np.sqrt(1 - self.phi ** 2)], [1, -self.phi],
+                                           innovations, axis=0, zi=self._noise_state)
+
+        courant = self.base_courant * load * (1 + 0.06 * noise[..., 1])
+        courant += self.rng.normal(0, 0.1, (n_steps, n))
+        tension = (self.nominal_tension + 4 - self.impedance * courant
+                   + 1.5 * noise[..., 0] + self.rng.normal(0, 0.3, (n_steps, n)))
+
+        # Pannes
+        self._start_faults(times)
+        codes, severity = self._fault_matrix(times)
+
+        short_circuit = codes == 0
+        courant[short_circuit] += 6 + 4 * severity[short_circuit]
+        tension[short_circuit] -= 40 + 20 * severity[short_circuit]
+
+        overload = codes == 1
+        courant[overload] *= 1.5 + 0.3 * severity[overload]
+        tension[overload] -= 15 + 15 * severity[overload]
+
+        line_cut = codes == 2
+        courant[line_cut] *= 0.05
+        tension[line_cut] -= 30 + 15 * severity[line_cut]
+
+        courant = np.clip(courant, 0, None)
+
+        return pd.DataFrame({
+            "timestamp": pd.to_datetime(np.repeat(times, n) * 1e9),
+            "station": np.tile(self.station_names, n_steps),
+            "zone": np.tile(self.station_zones, n_steps),
+            "tension": tension.ravel().round(2),
+            "courant": courant.ravel().round(2),
+            "puissance": (tension * courant / 1000).ravel().round(2),
+            "panne": (codes >= 0).astype(int).ravel(),
+            "type_panne": self._type_labels[codes.ravel() + 1]
+        })
+
+    def run(self, seconds, max_steps_per_block=10000):
+        """Simule une durée donnée (par blocs) et retourne toutes les mesures"""
+        n_steps = int(seconds // self.sample_seconds)
+        blocks = []
+        while n_steps > 0:
+            block = min(n_steps, max_steps_per_block)
+            blocks.append(self.step(block))
+            n_steps -= block
+        return pd.concat(blocks, ignore_index=True) if blocks else pd.DataFrame(columns=COLUMNS)
+
+    def source(self, steps_per_batch=None, speed=1.0, catch_up=True):
+        """
+        Source pour StreamingPipeline
+
+        Args:
+            steps_per_batch (int): Pas fixes par appel (débit maximal, pour
+                les benchmarks) ; None = cadencé sur l'horloge murale
+            speed (float): Accélération du temps simulé en mode cadencé
+            catch_up (bool): Au premier appel, rattrape le retard de
+                l'horloge simulée sur maintenant (historique)
+
+        Returns:
+            callable: Retourne un DataFrame de nouvelles mesures (ou None)
+        """
+        if steps_per_batch is not None:
+            return lambda: self.step(steps_per_batch)
+
+        state = {"wall": None, "carry": 0.0}
+
+        def next_batch():
+            now = time.time()
+            if state["wall"] is None:
+                state["wall"] = now
+                lag = (pd.Timestamp(datetime.now()) - self.current_time).total_seconds()
+                if catch_up and lag > self.sample_seconds:
+                    return self.run(lag)
+
+            state["carry"] += (now - state["wall"]) * speed / self.sample_seconds
+            state["wall"] = now
+            n_steps = int(state["carry"])
+            if n_steps == 0:
+                return None
+            state["carry"] -= n_steps
+            return self.step(n_steps)
+
+        return next_batch
+
+
+class SimulatedScadaServer:
+    """
+    Serveur OPC-UA local alimenté par le simulateur (remplaçant du SCADA)
+
+    Chaque poste expose deux variables tension/courant ; un thread avance
+    le simulateur d'un pas toutes les sample_seconds / speed secondes et
+    publie les nouvelles valeurs. stations_config() retourne la table des
+    postes à utiliser avec ScadaPoller (ou dans scada.stations).
+    """
+
+    def __init__(self, simulator, endpoint="opc.tcp://127.0.0.1:4840", speed=1.0):
+        """
+        Args:
+            simulator (GridSimulator): Source des mesures
+            endpoint (str): URL opc.tcp d'écoute
+            speed (float): Accélération du temps simulé
+        """
+        self.simulator = simulator
+        self.endpoint = endpoint
+        self.speed = speed
+        self.server = None
+        self.variables = []
+        self.node_ids = []
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Démarre le serveur et la publication des mesures"""
+        from opcua import Server, ua
+
+        self.server = Server()
+        self.server.set_endpoint(self.endpoint)
+        idx = self.server.register_namespace("urn:sonelgaz:simulateur")
+        root = self.server.get_objects_node().add_object(idx, "Postes")
+
+        first = self.simulator.step(1)
+        self.variables, self.node_ids = [], []
+        for i, station in enumerate(self.simulator.stations):
+            poste = root.add_object(idx, station["name"])
+            pair = []
+            for j, measure in enumerate(["tension", "courant"]):
+                node_id = (ua.NodeId.from_string(station[measure]) if measure in station
+                           else ua.NodeId(10000 + 2 * i + j, idx))
+                variable = poste.add_variable(node_id, measure, float(first[measure].iloc[i]))
+                pair.append(variable)
+                self.node_ids.append(node_id.to_string())
+            self.variables.append(pair)
+
+        self.server.start()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._publish, name="scada-simulateur", daemon=True)
+        self._thread.start()
+        return self
+
+    def _publish(self):
+        interval = self.simulator.sample_seconds / self.speed
+        while not self._stop_event.wait(interval):
+            values = self.simulator.step(1)
+            tension, courant = values["tension"].to_numpy(), values["courant"].to_numpy()
+            for i, (tension_var, courant_var) in enumerate(self.variables):
+                tension_var.set_value(float(tension[i]))
+                courant_var.set_value(float(courant[i]))
+
+    def stations_config(self):
+        """Table des postes exposés (format de scada.stations)"""
+        return [
+            {"name": station["name"], "zone": station["zone"], "endpoint": self.endpoint,
+             "tension": self.node_ids[2 * i], "courant": self.node_ids[2 * i + 1]}
+            for i, station in enumerate(self.simulator.stations)
+        ]
+
+    def stop(self):
+        """Arrête la publication et le serveur"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(5)
+            self._thread = None
+        if self.server is not None:
+            self.server.stop()
+            self.server = None
@@ -0,0 +1,368 @@
+"""
+Point d'accès unique à l'inférence : micro-batching et endpoint HTTP local
+
+Le dashboard et les clients externes (scripts, autres processus)
+interrogent le même PredictionService. Les requêtes concurrentes sont
+regroupées en un seul appel vectorisé à predict_batch, dans la limite
+d'un budget de latence.
+
+Usage : python -m services.inference_server (depuis la racine du projet)
+"""
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import queue
+import threading
+import time
+import urllib.request
+import pandas as pd
+
+INFERENCE_HOST = "127.0.0.1"
+INFERENCE_PORT = 8502
+
+
+class MicroBatcher:
+    """
+    Regroupe les requêtes concurrentes en appels vectorisés
+
+    Chaque requête (un ou plusieurs points) est placée dans une file et
+    reçoit un Future. Un thread dédié prend la première requête en
+    attente puis accumule les suivantes jusqu'à max_batch_size points ou
+    jusqu'à max_latency_ms après l'arrivée de la première ; le lot est
+    scoré par un seul appel à predict_batch et chaque Future reçoit ses
+    résultats (même format que PredictionService.predict).
+    """
+
+    def __init__(self, prediction_service, max_batch_size=256, max_latency_ms=5.0, queue_size=10000):
+        """
+        Args:
+            prediction_service (PredictionService): Service de prédiction partagé
+            max_batch_size (int): Points maximum par appel au modèle
+            max_latency_ms (float): Attente maximale d'une requête avant scoring
+            queue_size (int): Requêtes en attente au plus (au-delà, submit bloque)
+        """
+        self.service = prediction_service
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self.stats = {"requests": 0, "points": 0, "batches": 0, "flush_size": 0,
+                      "flush_deadline": 0, "errors": 0}
+
+    @classmethod
+    def from_config(cls, prediction_service, config):
+        """Construit le regroupeur depuis la section inference de config.yaml"""
+        inference_config = (config or {}).get("inference", {})
+        return cls(
+            prediction_service,
+            max_batch_size=inference_config.get("max_batch_size", 256),
+            max_latency_ms=inference_config.get("max_latency_ms", 5.0)
+        )
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+    def submit(self, data_points):
+        """
+        Place des points en file de scoring
+
+        Args:
+            data_points (list): Points {"tension", "courant"}
+
+        Returns:
+            Future: Liste des résultats, dans l'ordre des points
+        """
+        future = Future()
+        if not data_points:
+            future.set_result([])
+            return future
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+        self._queue.put((list(data_points), future, time.perf_counter()))
+        return future
+
+    def predict(self, data_point, timeout=None):
+        """Prédiction d'un point (bloquante)"""
+        return self.submit([data_point]).result(timeout)[0]
+
+    def predict_many(self, data_points, timeout=None):
+        """Prédictions de plusieurs points (bloquante)"""
+        return self.submit(data_points).result(timeout)
+
+    def summary(self):
+        """Compteurs et taille moyenne des lots"""
+        stats = dict(self.stats)
+        stats["mean_batch_size"] = stats["points"] / stats["batches"] if stats["batches"] else 0.0
+        stats["pending"] = self._queue.qsize()
+        return stats
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    # ------------------------------------------------------------------
+    # Exécution
+    # ------------------------------------------------------------------
+    def _collect(self):
+        """Attend une requête puis regroupe celles qui arrivent avant l'échéance"""
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return None
+
+        requests, n_points = [first], len(first[0])
+        deadline = first[2] + self.max_latency
+        while n_points < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                self.stats["flush_deadline"] += 1
+                return requests
+            requests.append(request)
+            n_points += len(request[0])
+
+        self.stats["flush_size"] += 1
+        return requests
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                requests = self._collect()
+                if requests is not None:
+                    self._process(requests)
+            except Exception as e:
+                # Le thread ne doit jamais s'arrêter : les appels suivants resteraient bloqués
+                self.stats["errors"] += 1
+                print(f"Erreur du regroupeur d'inférence: {e}")
+
+    def _process(self, requests):
+        # Les requêtes annulées par leur appelant ne sont pas scorées
+        requests = [request for request in requests if request[1].set_running_or_notify_cancel()]
+        if not requests:
+            return
+        points = [point for data_points, _, _ in requests for point in data_points]
+        self.stats["requests"] += len(requests)
+        self.stats["points"] += len(points)
+        self.stats["batches"] += 1
+
+        try:
+            results = self._score(points)
+        except Exception as e:
+            self.stats["errors"] += 1
+            for _, future, _ in requests:
+                future.set_exception(e)
+            return
+
+        start = 0
+        for data_points, future, _ in requests:
+            future.set_result(results[start:start + len(data_points)])
+            start += len(data_points)
+
+    def _score(self, points):
+        """Un appel predict_batch pour tous les points valides ; erreurs isolées par point"""
+        results = [None] * len(points)
+        valid, tension, courant = [], [], []
+        for i, point in enumerate(points):
+            try:
+                point_tension = float(point.get("tension", 0))
+                point_courant = float(point.get("courant", 0))
+            except (AttributeError, TypeError, ValueError) as e:
+                results[i] = self.service.create_error_result(f"Erreur préparation features: {e}")
+                continue
+            valid.append(i)
+            tension.append(point_tension)
+            courant.append(point_courant)
+
+        if not valid:
+            return results
+
+        batch = self.service.predict_batch(pd.DataFrame({"tension": tension, "courant": courant}))
+
+        timestamp = batch["timestamp"].iloc[0].to_pydatetime()
+        errors = batch["error_message"].tolist() if "error_message" in batch.columns else [None] * len(valid)
+        for i, score, is_anomaly, panne_type, confidence, status, error in zip(
+                valid, batch["anomaly_score"].tolist(), batch["is_anomaly"].tolist(),
+                batch["panne_type"].tolist(), batch["confidence"].tolist(), batch["status"].tolist(), errors):
+            result = {
+                "timestamp": timestamp,
+                "data_point": points[i],
+                "anomaly_score": score,
+                "is_anomaly": bool(is_anomaly),
+                "panne_type": str(panne_type),
+                "confidence": confidence,
+                "status": status
+            }
+            if status != "success":
+                result["error_message"] = error
+            results[i] = result
+        return results
+
+
+class _InferenceHandler(BaseHTTPRequestHandler):
+    """POST /predict (un point ou {"points": [...]}) et GET /health"""
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/health":
+            self._send_json(404, {"error": f"Route inconnue: {self.path}"})
+            return
+        service = self.server.batcher.service
+        self._send_json(200, {
+            "status": "ok" if service.anomaly_detector is not None else "no_model",
+            "model_version": service.model_version,
+            "registry_version": service.registry_version,
+            "batching": self.server.batcher.summary()
+        })
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send_json(404, {"error": f"Route inconnue: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"null")
+        except (ValueError, UnicodeDecodeError) as e:
+            self._send_json(400, {"error": f"JSON invalide: {e}"})
+            return
+
+        single = isinstance(payload, dict) and "points" not in payload
+        points = [payload] if single else payload.get("points") if isinstance(payload, dict) else None
+        if not isinstance(points, list):
+            self._send_json(400, {"error": "Attendu : un point ou {\"points\": [...]}"})
+            return
+
+        try:
+            results = self.server.batcher.predict_many(points, timeout=self.server.request_timeout)
+        except Exception as e:
+            self._send_json(503, {"error": f"Inférence indisponible: {e}"})
+            return
+        self._send_json(200, results[0] if single else {"results": results})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class InferenceServer:
+    """
+    Endpoint HTTP local devant un MicroBatcher
+
+    Chaque connexion est servie par son propre thread ; toutes les
+    requêtes aboutissent dans le même regroupeur, donc dans les mêmes
+    modèles que le dashboard.
+    """
+
+    def __init__(self, batcher, host=INFERENCE_HOST, port=INFERENCE_PORT, request_timeout=5.0):
+        """
+        Args:
+            batcher (MicroBatcher): Regroupeur des requêtes
+            host (str): Adresse d'écoute (locale par défaut)
+            port (int): Port d'écoute (0 = port libre choisi par le système)
+            request_timeout (float): Attente maximale d'un résultat (secondes)
+        """
+        self.batcher = batcher
+        self.host = host
+        self.port = port
+        self.request_timeout = request_timeout
+        self._httpd = None
+        self._thread = None
+
+    @classmethod
+    def from_config(cls, prediction_service, config):
+        """Construit le serveur depuis la section inference de config.yaml"""
+        inference_config = (config or {}).get("inference", {})
+        return cls(
+            MicroBatcher.from_config(prediction_service, config),
+            host=inference_config.get("host", INFERENCE_HOST),
+            port=inference_config.get("port", INFERENCE_PORT),
+            request_timeout=inference_config.get("request_timeout", 5.0)
+        )
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        """Démarre le regroupeur et le serveur HTTP en arrière-plan"""
+        self.batcher.start()
+        if self._httpd is None:
+            self._httpd = ThreadingHTTPServer((self.host, self.port), _InferenceHandler)
+            self._httpd.daemon_threads = True
+            self._httpd.batcher = self.batcher
+            self._httpd.request_timeout = self.request_timeout
+            self.port = self._httpd.server_address[1]
+            self._thread = threading.Thread(target=self._httpd.serve_forever, name="inference-http",
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._thread.join()
+            self._httpd = None
+        self.batcher.stop()
+
+
+class InferenceClient:
+    """Client de l'endpoint HTTP local"""
+
+    def __init__(self, url=f"http://{INFERENCE_HOST}:{INFERENCE_PORT}", timeout=10.0):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, path, payload=None):
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        request = urllib.request.Request(self.url + path, data=data,
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+    def predict(self, data_point):
+        """Prédiction d'un point (dict tension, courant)"""
+        return self._request("/predict", data_point)
+
+    def predict_many(self, data_points):
+        """Prédictions de plusieurs points en une requête"""
+        return self._request("/predict", {"points": list(data_points)})["results"]
+
+    def health(self):
+        """Versions des modèles en service et compteurs du regroupeur"""
+        return self._request("/health")
+
+
+if __name__ == "__main__":
+    from services.model_registry import ModelRegistry
+    from services.prediction_service import PredictionService
+    from utils.helpers import load_config
+
+    config = load_config()
+    service = PredictionService(
+        registry=ModelRegistry.from_config(config), hot_reload=True,
+        reload_interval=config.get("models", {}).get("reload_seconds", 2)
+    )
+    server = InferenceServer.from_config(service, config).start()
+    print(f"Inférence disponible sur {server.url} (POST /predict, GET /health)")
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,249 @@
+"""
+Stockage colonnaire des mesures, partitionné par jour et par zone
+"""
+import os
+import uuid
+from datetime import datetime, timedelta
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+STORE_PATH = "data/store"
+
+
+class MeasurementStore:
+    """
+    Magasin de mesures en ajout seul au format Parquet
+
+    Arborescence : <root>/date=AAAA-MM-JJ/zone=<zone>/part-<id>.parquet.
+    Chaque ajout écrit de nouveaux fichiers (jamais de réécriture) ; une
+    requête ne lit que les partitions des jours et zones demandés, et
+    filtre les jours en bordure de fenêtre par groupes de lignes.
+    """
+
+    def __init__(self, root=STORE_PATH, row_group_size=256 * 1024):
+        """
+        Args:
+            root (str): Dossier racine du magasin
+            row_group_size (int): Lignes par groupe Parquet
+        """
+        self.root = root
+        self.row_group_size = row_group_size
+
+    def _partition_dir(self, day, zone):
+        return os.path.join(self.root, f"date={day}", f"zone={zone}")
+
+    def append(self, df):
+        """
+        Ajoute des mesures au magasin
+
+        Args:
+            df (pd.DataFrame): Mesures avec au moins timestamp et zone
+
+        Returns:
+            int: Nombre de fichiers écrits
+        """
+        if df.empty:
+            return 0
+        for col in ["timestamp", "zone"]:
+            if col not in df.columns:
+                raise ValueError(f"Colonne manquante: {col}")
+
+        data = df.copy()
+        data["timestamp"] = pd.to_datetime(data["timestamp"])
+        days = data["timestamp"].dt.floor("D")
+
+        written = 0
+        for (day, zone), part in data.groupby([days, data["zone"]], sort=False):
+            directory = self._partition_dir(day.strftime("%Y-%m-%d"), zone)
+            os.makedirs(directory, exist_ok=True)
+
+            table = pa.Table.from_pandas(part.sort_values("timestamp"), preserve_index=False)
+            name = f"part-{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet"
+
+            # Écriture atomique : un lecteur ne voit jamais de fichier partiel
+            tmp_path = os.path.join(directory, f".{name}.tmp")
+            pq.write_table(table, tmp_path, row_group_size=self.row_group_size)
+            os.replace(tmp_path, os.path.join(directory, name))
+            written += 1
+
+        return written
+
+    def import_csv(self, path, chunksize=500000):
+        """
+        Importe un fichier CSV horodaté par blocs (mémoire bornée)
+
+        Returns:
+            int: Nombre de lignes importées
+        """
+        n_rows = 0
+        for chunk in pd.read_csv(path, chunksize=chunksize):
+            self.append(chunk)
+            n_rows += len(chunk)
+        return n_rows
+
+    def partitions(self):
+        """
+        Partitions présentes
+
+        Returns:
+            list: Tuples (jour "AAAA-MM-JJ", zone)
+        """
+        if not os.path.isdir(self.root):
+            return []
+
+        partitions = []
+        for day_dir in sorted(os.listdir(self.root)):
+            if not day_dir.startswith("date="):
+                continue
+            day_path = os.path.join(self.root, day_dir)
+            for zone_dir in sorted(os.listdir(day_path)):
+                if zone_dir.startswith("zone="):
+                    partitions.append((day_dir[len("date="):], zone_dir[len("zone="):]))
+        return partitions
+
+    def zones(self):
+        """Zones présentes dans le magasin"""
+        return sorted({zone for _, zone in self.partitions()})
+
+    def _files(self, day, zone):
+        directory = self._partition_dir(day, zone)
+        return [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                if name.endswith(".parquet") and not name.startswith(".")]
+
+    def time_range(self):
+        """
+        Premier et dernier horodatage stockés (None si le magasin est vide)
+
+        Seuls les jours extrêmes sont lus.
+        """
+        days = sorted({day for day, _ in self.partitions()})
+        if not days:
+            return None
+
+        def day_bounds(day):
+            table = self._read_day(day, None, ["timestamp"], None)
+            return table["timestamp"].min(), table["timestamp"].max()
+
+        return day_bounds(days[0])[0], day_bounds(days[-1])[1]
+
+    def _read_day(self, day, zones, columns, filters):
+        tables = []
+        for partition_day, zone in self.partitions():
+            if partition_day != day or (zones is not None and zone not in zones):
+                continue
+            for path in self._files(day, zone):
+                tables.append(pq.read_table(path, columns=columns, filters=filters))
+        if not tables:
+            return pd.DataFrame(columns=columns)
+        return pa.concat_tables(tables).to_pandas()
+
+    def query(self, start=None, end=None, zones=None, columns=None):
+        """
+        Mesures d'une fenêtre temporelle
+
+        Args:
+            start (datetime): Début inclus (None = depuis le début)
+            end (datetime): Fin exclue (None = jusqu'à la fin)
+            zones (list): Zones à lire (None = toutes)
+            columns (list): Colonnes à lire (None = toutes)
+
+        Returns:
+            pd.DataFrame: Mesures triées par horodatage
+        """
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+        if columns is not None and "timestamp" not in columns:
+            columns = ["timestamp"] + list(columns)
+
+        start_day = start.strftime("%Y-%m-%d") if start is not None else None
+        end_day = (end - timedelta(microseconds=1)).strftime("%Y-%m-%d") if end is not None else None
+
+        frames = []
+        for day in sorted({day for day, _ in self.partitions()}):
+            if (start_day and day < start_day) or (end_day and day > end_day):
+                continue
+
+            # Filtre ligne à ligne uniquement sur les jours en bordure
+            filters = []
+            if start is not None and day == start_day:
+                filters.append(("timestamp", ">=", start.to_pydatetime()))
+            if end is not None and day == end_day:
+                filters.append(("timestamp", "<", end.to_pydatetime()))
+
+            frame = self._read_day(day, zones, columns, filters or None)
+            if not frame.empty:
+                frames.append(frame)
+
+        if not frames:
+            return pd.DataFrame(columns=columns) if columns else pd.DataFrame()
+
+        data = pd.concat(frames, ignore_index=True)
+        return data.sort_values("timestamp", kind="stable", ignore_index=True)
+
+    def iter_batches(self, start=None, end=None, zones=None, columns=None, batch_rows=500000):
+        """
+        Parcourt les mesures d'une fenêtre par lots (mémoire bornée)
+
+        Les fichiers des partitions retenues sont lus groupe de lignes par
+        groupe de lignes, jour après jour ; les petits fichiers sont
+        regroupés jusqu'à batch_rows lignes avant conversion en DataFrame.
+        L'ordre est chronologique par jour mais pas trié à l'intérieur
+        d'un jour.
+
+        Args:
+            start (datetime): Début inclus (None = depuis le début)
+            end (datetime): Fin exclue (None = jusqu'à la fin)
+            zones (list): Zones à lire (None = toutes)
+            columns (list): Colonnes à lire (None = toutes)
+            batch_rows (int): Lignes maximales par lot
+
+        Yields:
+            pd.DataFrame: Lot de mesures
+        """
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+        if columns is not None and "timestamp" not in columns:
+            columns = ["timestamp"] + list(columns)
+
+        start_day = start.strftime("%Y-%m-%d") if start is not None else None
+        end_day = (end - timedelta(microseconds=1)).strftime("%Y-%m-%d") if end is not None else None
+
+        pending, pending_rows = [], 0
+        for day, zone in self.partitions():
+            if (start_day and day < start_day) or (end_day and day > end_day):
+                continue
+            if zones is not None and zone not in zones:
+                continue
+
+            for path in self._files(day, zone):
+                for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_rows, columns=columns):
+                    # Filtre ligne à ligne uniquement sur les jours en bordure
+                    timestamps = batch.column("timestamp")
+                    if start is not None and day == start_day:
+                        bound = pa.scalar(start.to_pydatetime(), type=timestamps.type)
+                        batch = batch.filter(pc.greater_equal(timestamps, bound))
+                        timestamps = batch.column("timestamp")
+                    if end is not None and day == end_day:
+                        bound = pa.scalar(end.to_pydatetime(), type=timestamps.type)
+                        batch = batch.filter(pc.less(timestamps, bound))
+                    if batch.num_rows == 0:
+                        continue
+
+                    if pending_rows + batch.num_rows > batch_rows and pending:
+                        yield pa.Table.from_batches(pending).to_pandas()
+                        pending, pending_rows = [], 0
+                    pending.append(batch)
+                    pending_rows += batch.num_rows
+
+        if pending:
+            yield pa.Table.from_batches(pending).to_pandas()
+
+    def query_last(self, hours, zones=None, columns=None):
+        """Mesures des N dernières heures stockées (relativement à la plus récente)"""
+        bounds = self.time_range()
+        if bounds is None:
+            return pd.DataFrame()
+        end = pd.Timestamp(bounds[1]) + timedelta(microseconds=1)
+        return self.query(end - timedelta(hours=hours), end, zones=zones, columns=columns)
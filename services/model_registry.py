@@ -0,0 +1,264 @@
+"""
+Registre versionné des modèles IA
+
+Chaque version est un dossier immuable sous models/registry :
+
+    models/registry/
+        ACTIVE                  version en service (ex. "v0003")
+        v0003/
+            anomaly_detector.pkl
+            classifier.pkl
+            compiled/           tableaux des forêts compilées (.npy)
+            metadata.json       empreinte des données, métriques, features
+
+Une version est écrite dans un dossier temporaire puis renommée, et le
+pointeur ACTIVE est remplacé atomiquement : un lecteur voit toujours une
+version complète.
+"""
+from datetime import datetime
+import json
+import os
+import shutil
+import threading
+import uuid
+import joblib
+
+from services.compiled_forest import (
+    CompiledIsolationForest, CompiledRandomForest, load_compiled_arrays, save_compiled_arrays
+)
+from utils.helpers import fingerprint_dataframe
+
+REGISTRY_PATH = "models/registry"
+
+
+class ModelRegistry:
+    """
+    Versions des modèles, métadonnées et pointeur de version active
+
+    Les modèles sklearn sont sérialisés sans compression et rechargés avec
+    mmap_mode : les tableaux NumPy des modèles sont projetés en mémoire
+    plutôt que copiés. Les arbres sklearn recopiant leurs nœuds au
+    chargement, ce sont les forêts compilées (un .npy par tableau) qui
+    portent les nœuds partagés entre processus.
+    """
+
+    def __init__(self, path=REGISTRY_PATH, keep_versions=10):
+        """
+        Args:
+            path (str): Dossier du registre
+            keep_versions (int): Versions conservées (la version active l'est toujours)
+        """
+        self.path = path
+        self.keep_versions = keep_versions
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        """Construit le registre depuis la section models de config.yaml"""
+        models_config = (config or {}).get("models", {})
+        return cls(
+            models_config.get("registry_path", REGISTRY_PATH),
+            keep_versions=models_config.get("keep_versions", 10)
+        )
+
+    # ------------------------------------------------------------------
+    # Versions
+    # ------------------------------------------------------------------
+    def _version_path(self, version):
+        return os.path.join(self.path, version)
+
+    def versions(self):
+        """Versions enregistrées, de la plus ancienne à la plus récente"""
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(
+            name for name in os.listdir(self.path)
+            if name.startswith("v") and name[1:].isdigit()
+            and os.path.isfile(os.path.join(self.path, name, "metadata.json"))
+        )
+
+    def metadata(self, version):
+        """Métadonnées d'une version"""
+        with open(os.path.join(self._version_path(version), "metadata.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    def history(self):
+        """Métadonnées de toutes les versions, de la plus récente à la plus ancienne"""
+        active = self.active_version()
+        records = []
+        for version in reversed(self.versions()):
+            metadata = self.metadata(version)
+            metadata["active"] = version == active
+            records.append(metadata)
+        return records
+
+    def active_version(self):
+        """Version pointée par ACTIVE (None si le registre est vide)"""
+        try:
+            with open(os.path.join(self.path, "ACTIVE"), encoding="utf-8") as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return version or None
+
+    def activate(self, version):
+        """Fait de version la version active (remplacement atomique du pointeur)"""
+        if version not in self.versions():
+            raise ValueError(f"Version de modèle inconnue: {version}")
+        pointer = os.path.join(self.path, "ACTIVE")
+        staging = f"{pointer}.{uuid.uuid4().hex}.tmp"
+        with open(staging, "w", encoding="utf-8") as f:
+            f.write(version)
+        os.replace(staging, pointer)
+
+    # ------------------------------------------------------------------
+    # Écriture
+    # ------------------------------------------------------------------
+    def publish(self, anomaly_detector, classifier, data=None, metrics=None, features=None,
+                compiled=None, source=None, activate=True):
+        """
+        Enregistre une nouvelle version des modèles
+
+        Args:
+            anomaly_detector (IsolationForest): Détecteur entraîné
+            classifier (RandomForestClassifier): Classifieur entraîné
+            data (pd.DataFrame): Données d'entraînement (empreinte et volume)
+            metrics (dict): Métriques d'évaluation
+            features (list): Features d'entrée (défaut : celles du détecteur)
+            compiled (tuple): Forêts déjà compilées (sinon compilées ici)
+            source (str): Origine de la version (script, mode d'entraînement...)
+            activate (bool): Met la version en service
+
+        Returns:
+            str: Version créée
+        """
+        if features is None:
+            features = [str(f) for f in getattr(anomaly_detector, "feature_names_in_", [])]
+        if compiled is None:
+            compiled = (CompiledIsolationForest.from_sklearn(anomaly_detector),
+                        CompiledRandomForest.from_sklearn(classifier))
+
+        metadata = {
+            "version": None,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "source": source,
+            "features": list(features),
+            "data_fingerprint": fingerprint_dataframe(data) if data is not None else None,
+            "rows": len(data) if data is not None else None,
+            "classes": [str(c) for c in classifier.classes_],
+            "n_trees": {"anomaly_detector": len(anomaly_detector.estimators_),
+                        "classifier": len(classifier.estimators_)},
+            "metrics": metrics or {}
+        }
+
+        # Dossier temporaire propre à cet appel : plusieurs processus
+        # peuvent publier en même temps (application, scripts)
+        os.makedirs(self.path, exist_ok=True)
+        staging = os.path.join(self.path, f".staging-{uuid.uuid4().hex}")
+        os.makedirs(staging)
+        try:
+            # Sans compression : condition de la projection mémoire au chargement
+            joblib.dump(anomaly_detector, os.path.join(staging, "anomaly_detector.pkl"))
+            joblib.dump(classifier, os.path.join(staging, "classifier.pkl"))
+            save_compiled_arrays(compiled, os.path.join(staging, "compiled"))
+
+            with self._lock:
+                # Numéro réservé par création exclusive de son dossier : si un
+                # autre processus l'a déjà pris, le numéro suivant est essayé
+                versions = self.versions()
+                number = int(versions[-1][1:]) + 1 if versions else 1
+                while True:
+                    version = f"v{number:04d}"
+                    try:
+                        os.mkdir(self._version_path(version))
+                        break
+                    except FileExistsError:
+                        number += 1
+
+                metadata["version"] = version
+                with open(os.path.join(staging, "metadata.json"), "w", encoding="utf-8") as f:
+                    json.dump(metadata, f, ensure_ascii=False, indent=2, default=str)
+                # Le dossier réservé (vide) est remplacé atomiquement
+                os.replace(staging, self._version_path(version))
+
+                if activate:
+                    self.activate(version)
+                self.prune()
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        return version
+
+    def prune(self):
+        """Supprime les versions les plus anciennes au-delà de keep_versions"""
+        active = self.active_version()
+        versions = self.versions()
+        removable = [version for version in versions if version != active]
+        for version in removable[:max(0, len(versions) - self.keep_versions)]:
+            shutil.rmtree(self._version_path(version), ignore_errors=True)
+
+    # ------------------------------------------------------------------
+    # Lecture
+    # ------------------------------------------------------------------
+    def load(self, version=None, mmap_mode="r"):
+        """
+        Charge une version (la version active par défaut)
+
+        Args:
+            version (str): Version à charger
+            mmap_mode (str): Mode de projection mémoire (None = copie en mémoire)
+
+        Returns:
+            tuple: (détecteur, classifieur, (détecteur compilé, classifieur compilé), métadonnées)
+        """
+        version = version or self.active_version()
+        if version is None:
+            raise FileNotFoundError(f"Aucune version active dans {self.path}")
+
+        path = self._version_path(version)
+        anomaly_detector = joblib.load(os.path.join(path, "anomaly_detector.pkl"), mmap_mode=mmap_mode)
+        classifier = joblib.load(os.path.join(path, "classifier.pkl"), mmap_mode=mmap_mode)
+        compiled = load_compiled_arrays(os.path.join(path, "compiled"), mmap_mode=mmap_mode)
+        return anomaly_detector, classifier, compiled, self.metadata(version)
+
+    def watch(self, callback, interval=2.0):
+        """
+        Surveille le pointeur ACTIVE et appelle callback(version) à chaque changement
+
+        Le pointeur est relu toutes les interval secondes (un simple stat
+        tant qu'il n'est pas modifié). Un callback en erreur est rappelé à
+        la période suivante.
+
+        Returns:
+            threading.Event: Événement à positionner pour arrêter la surveillance
+        """
+        stop_event = threading.Event()
+        pointer = os.path.join(self.path, "ACTIVE")
+
+        def stamp():
+            try:
+                stat = os.stat(pointer)
+                return stat.st_mtime_ns, stat.st_ino
+            except FileNotFoundError:
+                return None
+
+        def run():
+            last_stamp, last_version = stamp(), self.active_version()
+            while not stop_event.wait(interval):
+                current = stamp()
+                if current == last_stamp:
+                    continue
+                version = self.active_version()
+                if version is not None and version != last_version:
+                    try:
+                        callback(version)
+                        last_version = version
+                    except Exception as e:
+                        # Pointeur non marqué comme lu : nouvelle tentative
+                        # à la période suivante
+                        print(f"Erreur rechargement modèles {version}: {e}")
+                        continue
+                last_stamp = current
+
+        threading.Thread(target=run, name="model-registry-watch", daemon=True).start()
+        return stop_event
@@ -0,0 +1,194 @@
+"""
+Historique des prédictions en tampon circulaire colonnaire
+"""
+from datetime import datetime
+import numpy as np
+
+
+class PredictionHistory:
+    """
+    Tampon circulaire de capacité fixe stocké colonne par colonne
+
+    Chaque colonne est un tableau NumPy préalloué : l'ajout d'une
+    prédiction est en O(1) et les plus anciennes sont écrasées une fois la
+    capacité atteinte. Les horodatages étant croissants, les requêtes par
+    fenêtre temporelle se font par recherche dichotomique.
+    """
+
+    def __init__(self, capacity=100000):
+        """
+        Args:
+            capacity (int): Nombre maximal de prédictions conservées
+        """
+        self.capacity = capacity
+        self.timestamp = np.zeros(capacity)  # Secondes depuis l'epoch
+        self.tension = np.zeros(capacity)
+        self.courant = np.zeros(capacity)
+        self.anomaly_score = np.zeros(capacity)
+        self.is_anomaly = np.zeros(capacity, dtype=bool)
+        self.class_code = np.zeros(capacity, dtype=np.int32)
+        self.confidence = np.zeros(capacity)
+
+        # Types de panne encodés : class_names[code] = type
+        self.class_names = []
+        self._class_codes = {}
+
+        self._head = 0  # Position de la plus ancienne prédiction
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _columns(self):
+        return (self.timestamp, self.tension, self.courant, self.anomaly_score,
+                self.is_anomaly, self.class_code, self.confidence)
+
+    def encode_class(self, panne_type):
+        """Code entier d'un type de panne (ajouté au besoin)"""
+        code = self._class_codes.get(panne_type)
+        if code is None:
+            code = len(self.class_names)
+            self._class_codes[panne_type] = code
+            self.class_names.append(panne_type)
+        return code
+
+    def append(self, timestamp, tension, courant, anomaly_score, is_anomaly,
+               panne_type, confidence):
+        """Ajoute une prédiction en O(1)"""
+        position = (self._head + self._size) % self.capacity
+        values = (timestamp.timestamp(), tension, courant, anomaly_score,
+                  is_anomaly, self.encode_class(panne_type), confidence)
+
+        for column, value in zip(self._columns(), values):
+            column[position] = value
+
+        if self._size < self.capacity:
+            self._size += 1
+        else:
+            self._head = (self._head + 1) % self.capacity
+
+    def extend(self, timestamps, tension, courant, anomaly_score, is_anomaly,
+               panne_types, confidence):
+        """
+        Ajoute un batch de prédictions (tableaux de même longueur)
+
+        Seules les capacity dernières lignes sont écrites.
+        """
+        n_rows = len(anomaly_score)
+        if n_rows == 0:
+            return
+
+        uniques, inverse = np.unique(np.asarray(panne_types, dtype=object), return_inverse=True)
+        codes = np.array([self.encode_class(u) for u in uniques], dtype=np.int32)[inverse]
+
+        timestamps = np.broadcast_to(np.asarray(timestamps, dtype=float), (n_rows,))
+        values = (timestamps, tension, courant, anomaly_score, is_anomaly, codes, confidence)
+
+        keep = min(n_rows, self.capacity)
+        positions = (self._head + self._size + np.arange(n_rows - keep, n_rows)) % self.capacity
+
+        for column, value in zip(self._columns(), values):
+            column[positions] = np.asarray(value)[n_rows - keep:]
+
+        overflow = max(0, self._size + n_rows - self.capacity)
+        self._size = min(self.capacity, self._size + n_rows)
+        self._head = (self._head + overflow) % self.capacity
+
+    def _segments(self):
+        """Tranches physiques (début, fin) dans l'ordre chronologique"""
+        end = self._head + self._size
+        if end <= self.capacity:
+            return [(self._head, end)]
+        return [(self._head, self.capacity), (0, end - self.capacity)]
+
+    def _window_indices(self, since=None):
+        """
+        Indices physiques des prédictions postérieures à since, trouvés
+        par recherche dichotomique sur chaque segment
+        """
+        indices = []
+        for start, stop in self._segments():
+            if since is not None:
+                start += np.searchsorted(self.timestamp[start:stop], since, side="right")
+            indices.append(np.arange(start, stop))
+
+        if not indices:
+            return np.arange(0)
+        return np.concatenate(indices)
+
+    def window(self, since=None):
+        """
+        Colonnes des prédictions strictement postérieures à since
+
+        Args:
+            since (datetime): Borne inférieure (None = tout l'historique)
+
+        Returns:
+            dict: Tableaux NumPy par colonne
+        """
+        cutoff = since.timestamp() if since is not None else None
+        indices = self._window_indices(cutoff)
+        return {
+            "timestamp": self.timestamp[indices],
+            "tension": self.tension[indices],
+            "courant": self.courant[indices],
+            "anomaly_score": self.anomaly_score[indices],
+            "is_anomaly": self.is_anomaly[indices],
+            "class_code": self.class_code[indices],
+            "confidence": self.confidence[indices]
+        }
+
+    def records(self, since=None):
+        """Prédictions postérieures à since, sous forme de dictionnaires"""
+        columns = self.window(since)
+        return [
+            {
+                "timestamp": datetime.fromtimestamp(timestamp),
+                "data_point": {"tension": tension, "courant": courant},
+                "anomaly_score": anomaly_score,
+                "is_anomaly": is_anomaly,
+                "panne_type": self.class_names[class_code],
+                "confidence": confidence,
+                "status": "success"
+            }
+            for timestamp, tension, courant, anomaly_score, is_anomaly, class_code, confidence
+            in zip(columns["timestamp"].tolist(), columns["tension"].tolist(),
+                   columns["courant"].tolist(), columns["anomaly_score"].tolist(),
+                   columns["is_anomaly"].tolist(), columns["class_code"].tolist(),
+                   columns["confidence"].tolist())
+        ]
+
+    def statistics(self, since=None):
+        """
+        Statistiques calculées directement sur les tableaux
+
+        Returns:
+            dict: total, anomalies, taux, répartition des types de panne,
+            confiance et score moyens
+        """
+        columns = self.window(since)
+        total = len(columns["timestamp"])
+
+        if total == 0:
+            return {
+                "total_predictions": 0,
+                "anomalies_detected": 0,
+                "anomaly_rate": 0.0,
+                "panne_types": {},
+                "avg_confidence": 0.0
+            }
+
+        class_counts = np.bincount(columns["class_code"], minlength=len(self.class_names))
+        anomalies = int(columns["is_anomaly"].sum())
+
+        return {
+            "total_predictions": total,
+            "anomalies_detected": anomalies,
+            "anomaly_rate": anomalies / total,
+            "panne_types": {
+                self.class_names[code]: int(count)
+                for code, count in enumerate(class_counts) if count > 0
+            },
+            "avg_confidence": float(columns["confidence"].mean()),
+            "avg_anomaly_score": float(columns["anomaly_score"].mean())
+        }
@@ -6,30 +6,202 @@ import joblib
 import numpy as np
 from datetime import datetime, timedelta
 import os
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from services.prediction_history import PredictionHistory
+from services.rolling_statistics import RollingStatistics
+from services.compiled_forest import (
+    COMPILED_MODELS_PATH, CompiledIsolationForest, CompiledRandomForest, load_compiled_models
+)
+from services.model_registry import ModelRegistry
+from services.inference_server import MicroBatcher
+
+# Seuil de détection sur score_samples (plus bas = plus anormal)
+ANOMALY_THRESHOLD = -0.5
 
 class PredictionService:
-    def __init__(self, model_path=None, classifier_path=None):
+    def __init__(self, model_path=None, classifier_path=None, low_latency=False,
+                 use_compiled=False, compiled_path=None, history_size=100000, registry=None,
+                 hot_reload=False, reload_interval=2.0, micro_batching=False, max_batch_size=256,
+                 max_latency_ms=2.0):
         """
         Initialisation du service de prédiction
         
         Args:
             model_path (str): Chemin vers le modèle d'anomalies
             classifier_path (str): Chemin vers le modèle de classification
+            low_latency (bool): Utilise le chemin rapide sans pandas pour predict()
+            use_compiled (bool): Évalue les forêts avec le moteur compilé
+            compiled_path (str): Chemin vers l'archive des modèles compilés
+            history_size (int): Nombre maximal de prédictions conservées
+            registry (ModelRegistry | str): Registre de modèles (version active
+                chargée à la place des chemins ci-dessus si elle existe)
+            hot_reload (bool): Recharge les modèles quand la version active change
+            reload_interval (float): Période de surveillance du registre (secondes)
+            micro_batching (bool): Regroupe les appels concurrents à predict()
+            max_batch_size (int): Points maximum par lot regroupé
+            max_latency_ms (float): Attente maximale d'un appel regroupé (un
+                appel sans résultat après 100 fois ce délai, 1 s au moins, est
+                servi par le chemin direct)
         """
         # Chemins par défaut
         self.anomaly_model_path = model_path or "models/anomaly_detector.pkl"
         self.classifier_path = classifier_path or "models/classifier.pkl"
         
-        # Charger les modèles
-        self.anomaly_detector = self.load_model(self.anomaly_model_path)
-        self.classifier = self.load_model(self.classifier_path)
+        # Charger les modèles. Les quatre modèles (sklearn et compilés) sont
+        # regroupés dans un seul tuple, remplacé d'un bloc par swap_models :
+        # une inférence voit toujours une génération cohérente de modèles.
+        self._models = (None, None, None, None)
+        self.model_version = 0
+        self.registry_version = None
+        
+        # Moteur d'inférence compilé (scores et classes identiques à sklearn).
+        # Plus rapide que sklearn sur les petits batchs uniquement : au-delà
+        # de compiled_max_rows lignes, les modèles sklearn sont utilisés.
+        self.use_compiled = use_compiled
+        self.compiled_path = compiled_path or COMPILED_MODELS_PATH
+        self.compiled_max_rows = 256
+        
+        # Registre versionné : les modèles de la version active sont
+        # projetés en mémoire (partagés entre processus). Sans version
+        # active, les fichiers historiques de models/ sont utilisés.
+        self.registry = ModelRegistry(registry) if isinstance(registry, str) else registry
+        self._watch_stop = None
+        if self.registry is not None and self.registry.active_version() is not None:
+            self.load_from_registry()
+        else:
+            self.anomaly_detector = self.load_model(self.anomaly_model_path)
+            self.classifier = self.load_model(self.classifier_path)
+            if use_compiled:
+                self.load_compiled_models()
+        if self.registry is not None and hot_reload:
+            self.watch_registry(reload_interval)
+        
+        # Historique des prédictions (tampon circulaire colonnaire)
+        self.history = PredictionHistory(history_size)
+        
+        # Agrégats par minute pour get_statistics (fenêtres jusqu'à 72 h)
+        self.rolling_stats = RollingStatistics(max_hours=72)
         
-        # Historique des prédictions
-        self.predictions_history = []
-        self.max_history_size = 1000
+        # Historique et agrégats partagés par tous les threads appelants
+        self._history_lock = threading.Lock()
         
         # Features utilisées
         self.features = ["tension", "courant", "puissance"]
+        
+        # Seuil de détection sur le score d'anomalie
+        self.anomaly_threshold = ANOMALY_THRESHOLD
+        
+        # Mode faible latence : buffer de features préalloué (un par
+        # thread appelant). Les modèles ayant été entraînés sur des
+        # DataFrames, une vue sans copie porte les noms de features
+        # attendus par sklearn.
+        self.low_latency = low_latency
+        self._local = threading.local()
+        
+        # Appels concurrents à predict() regroupés en un appel vectorisé
+        self.batcher = None
+        self.batch_timeout = max(1.0, 100 * max_latency_ms / 1000)
+        if micro_batching:
+            self.batcher = MicroBatcher(self, max_batch_size=max_batch_size,
+                                        max_latency_ms=max_latency_ms).start()
+    
+    def _fast_buffers(self):
+        """Buffer de features du thread courant et sa vue DataFrame"""
+        buffers = getattr(self._local, "buffers", None)
+        if buffers is None:
+            buffer = np.zeros((1, len(self.features)))
+            buffers = self._local.buffers = (
+                buffer, pd.DataFrame(buffer, columns=self.features, copy=False)
+            )
+        return buffers
+    
+    @property
+    def anomaly_detector(self):
+        return self._models[0]
+    
+    @anomaly_detector.setter
+    def anomaly_detector(self, model):
+        self._models = (model,) + self._models[1:]
+    
+    @property
+    def classifier(self):
+        return self._models[1]
+    
+    @classifier.setter
+    def classifier(self, model):
+        self._models = self._models[:1] + (model,) + self._models[2:]
+    
+    @property
+    def compiled_detector(self):
+        return self._models[2]
+    
+    @compiled_detector.setter
+    def compiled_detector(self, model):
+        self._models = self._models[:2] + (model,) + self._models[3:]
+    
+    @property
+    def compiled_classifier(self):
+        return self._models[3]
+    
+    @compiled_classifier.setter
+    def compiled_classifier(self, model):
+        self._models = self._models[:3] + (model,)
+    
+    def swap_models(self, anomaly_detector, classifier, compiled=None, registry_version=None):
+        """
+        Remplace les modèles en service sans interruption
+        
+        Les nouveaux modèles (et leurs versions compilées si le moteur
+        compilé est actif) sont préparés avant d'être publiés par une
+        seule affectation : les inférences en cours terminent avec
+        l'ancienne génération, les suivantes utilisent la nouvelle.
+        
+        Args:
+            anomaly_detector (IsolationForest): Nouveau détecteur
+            classifier (RandomForestClassifier): Nouveau classifieur
+            compiled (tuple): Versions compilées déjà construites (optionnel)
+            registry_version (str): Version du registre correspondante
+        """
+        compiled_detector, compiled_classifier = None, None
+        if self.use_compiled:
+            if compiled is not None:
+                compiled_detector, compiled_classifier = compiled
+            else:
+                compiled_detector = CompiledIsolationForest.from_sklearn(anomaly_detector)
+                compiled_classifier = CompiledRandomForest.from_sklearn(classifier)
+        
+        self._models = (anomaly_detector, classifier, compiled_detector, compiled_classifier)
+        self.registry_version = registry_version
+        self.model_version += 1
+    
+    def load_from_registry(self, version=None):
+        """
+        Met en service une version du registre (la version active par défaut)
+        
+        Sans effet si cette version est déjà en service.
+        
+        Returns:
+            str: Version en service
+        """
+        version = version or self.registry.active_version()
+        if version is not None and version == self.registry_version:
+            return version
+        
+        anomaly_detector, classifier, compiled, metadata = self.registry.load(version)
+        self.swap_models(anomaly_detector, classifier, compiled, registry_version=metadata["version"])
+        return metadata["version"]
+    
+    def watch_registry(self, interval=2.0):
+        """Recharge à chaud les modèles à chaque changement de version active"""
+        if self._watch_stop is None:
+            self._watch_stop = self.registry.watch(self.load_from_registry, interval)
+    
+    def stop_watching(self):
+        """Arrête la surveillance du registre"""
+        if self._watch_stop is not None:
+            self._watch_stop.set()
+            self._watch_stop = None
     
     def load_model(self, model_path):
         """
@@ -44,6 +216,56 @@ class PredictionService:
             print(f"Erreur chargement modèle {model_path}: {e}")
             return None
     
+    def load_compiled_models(self):
+        """
+        Charge les versions compilées des modèles
+        
+        L'archive exportée à l'entraînement est utilisée si elle existe,
+        sinon les modèles sklearn chargés sont compilés en mémoire.
+        """
+        try:
+            if os.path.exists(self.compiled_path):
+                self.compiled_detector, self.compiled_classifier = load_compiled_models(
+                    self.compiled_path
+                )
+            else:
+                if self.anomaly_detector is not None:
+                    self.compiled_detector = CompiledIsolationForest.from_sklearn(self.anomaly_detector)
+                if self.classifier is not None:
+                    self.compiled_classifier = CompiledRandomForest.from_sklearn(self.classifier)
+        except Exception as e:
+            print(f"Erreur chargement modèles compilés {self.compiled_path}: {e}")
+    
+    def current_models(self):
+        """
+        Génération de modèles en service, à passer à score_batch et
+        classify_batch pour qu'un même batch soit scoré et classifié par
+        les mêmes modèles malgré un swap_models concurrent
+        """
+        return self._models
+    
+    def get_models(self, n_rows=1, generation=None):
+        """
+        Modèles à utiliser pour un batch de n_rows lignes
+        
+        Args:
+            n_rows (int): Taille du batch
+            generation (tuple): Génération lue par current_models (défaut : l'actuelle)
+        
+        Returns:
+            tuple: (détecteur d'anomalies, classifieur)
+        """
+        anomaly_detector, classifier, compiled_detector, compiled_classifier = (
+            generation if generation is not None else self._models
+        )
+        if compiled_detector is None:
+            return anomaly_detector, classifier
+        
+        use_compiled = n_rows <= self.compiled_max_rows or anomaly_detector is None
+        if use_compiled:
+            return compiled_detector, compiled_classifier or classifier
+        return anomaly_detector, classifier
+    
     def predict(self, data_point):
         """
         Effectue une prédiction complète sur un point de données
@@ -54,32 +276,49 @@ class PredictionService:
         Returns:
             dict: Résultats de la prédiction
         """
+        if self.batcher is not None:
+            future = self.batcher.submit([data_point])
+            try:
+                return future.result(self.batch_timeout)[0]
+            except FutureTimeoutError:
+                # Lot non commencé : annulé et remplacé par le chemin direct ;
+                # lot en cours : son résultat sera historisé, pas de doublon
+                if future.cancel():
+                    return self.predict_fast(data_point)
+                return self.create_error_result("Délai de prédiction dépassé")
+            except Exception as e:
+                return self.create_error_result(f"Erreur prédiction: {str(e)}")
+        
+        if self.low_latency:
+            return self.predict_fast(data_point)
+        
         try:
             # Préparer les features
             features_df = self.prepare_features(data_point)
+            anomaly_detector, classifier = self.get_models()
             
-            if features_df is None or self.anomaly_detector is None:
+            if features_df is None or anomaly_detector is None:
                 return self.create_error_result("Modèle non disponible")
             
             # Détection d'anomalie
-            anomaly_score = self.anomaly_detector.score_samples(features_df)[0]
-            is_anomaly = anomaly_score < -0.5  # Seuil ajustable
+            anomaly_score = anomaly_detector.score_samples(features_df)[0]
+            is_anomaly = anomaly_score < self.anomaly_threshold
             
             # Classification si anomalie
             panne_type = "OK"
             confidence = 0.0
             
-            if is_anomaly and self.classifier is not None:
+            if is_anomaly and classifier is not None:
                 try:
-                    panne_type = self.classifier.predict(features_df)[0]
+                    panne_type = classifier.predict(features_df)[0]
                     
                     # Calculer la confiance
-                    if hasattr(self.classifier, "predict_proba"):
-                        probas = self.classifier.predict_proba(features_df)
+                    if hasattr(classifier, "predict_proba"):
+                        probas = classifier.predict_proba(features_df)
                         confidence = np.max(probas[0])
                     else:
                         confidence = 0.8  # Valeur par défaut
-                except Exception as e:
+                except Exception:
                     panne_type = "Inconnu"
                     confidence = 0.5
             
@@ -102,6 +341,78 @@ class PredictionService:
         except Exception as e:
             return self.create_error_result(f"Erreur prédiction: {str(e)}")
     
+    def predict_fast(self, data_point):
+        """
+        Prédiction faible latence sur un point de données
+        
+        Les features sont écrites dans un buffer NumPy préalloué (aucun
+        DataFrame construit par appel) et la classe comme la confiance
+        proviennent d'un seul appel à predict_proba.
+        
+        Args:
+            data_point (dict): Point de données avec tension, courant
+            
+        Returns:
+            dict: Résultats de la prédiction (même format que predict)
+        """
+        anomaly_detector, classifier = self.get_models()
+        if anomaly_detector is None:
+            return self.create_error_result("Modèle non disponible")
+        
+        try:
+            tension = float(data_point.get("tension", 0))
+            courant = float(data_point.get("courant", 0))
+        except (TypeError, ValueError) as e:
+            return self.create_error_result(f"Erreur préparation features: {e}")
+        
+        buffer, frame = self._fast_buffers()
+        buffer[0, 0] = tension
+        buffer[0, 1] = courant
+        buffer[0, 2] = tension * courant / 1000
+        
+        # Le moteur compilé lit directement le buffer NumPy
+        if isinstance(anomaly_detector, CompiledIsolationForest):
+            features = buffer
+        else:
+            features = frame
+        
+        try:
+            anomaly_score = anomaly_detector.score_samples(features)[0]
+            is_anomaly = anomaly_score < self.anomaly_threshold
+            
+            panne_type = "OK"
+            confidence = 0.0
+            
+            if is_anomaly and classifier is not None:
+                try:
+                    if hasattr(classifier, "predict_proba"):
+                        probas = classifier.predict_proba(features)[0]
+                        best = probas.argmax()
+                        panne_type = classifier.classes_[best]
+                        confidence = probas[best]
+                    else:
+                        panne_type = classifier.predict(features)[0]
+                        confidence = 0.8  # Valeur par défaut
+                except Exception:
+                    panne_type = "Inconnu"
+                    confidence = 0.5
+        except Exception as e:
+            return self.create_error_result(f"Erreur prédiction: {str(e)}")
+        
+        result = {
+            "timestamp": datetime.now(),
+            "data_point": data_point,
+            "anomaly_score": float(anomaly_score),
+            "is_anomaly": bool(is_anomaly),
+            "panne_type": panne_type,
+            "confidence": float(confidence),
+            "status": "success"
+        }
+        
+        self.add_to_history(result)
+        
+        return result
+    
     def prepare_features(self, data_point):
         """
         Prépare les features pour la prédiction
@@ -140,65 +451,234 @@ class PredictionService:
             "error_message": error_message
         }
     
+    @property
+    def max_history_size(self):
+        """Capacité de l'historique (lue sur le tampon, seule source de vérité)"""
+        return self.history.capacity
+    
+    @property
+    def predictions_history(self):
+        """Historique complet sous forme de dictionnaires (du plus ancien au plus récent)"""
+        with self._history_lock:
+            return self.history.records()
+    
     def add_to_history(self, prediction):
-        """Ajoute une prédiction à l'historique"""
-        self.predictions_history.append(prediction)
+        """
+        Ajoute une prédiction à l'historique en O(1)
         
-        # Limiter la taille de l'historique
-        if len(self.predictions_history) > self.max_history_size:
-            self.predictions_history = self.predictions_history[-self.max_history_size:]
+        L'horodatage de la prédiction est pris sous le verrou : les appels
+        concurrents sont historisés dans l'ordre chronologique, condition
+        des recherches par dichotomie sur les fenêtres de temps.
+        """
+        data_point = prediction["data_point"]
+        with self._history_lock:
+            prediction["timestamp"] = datetime.now()
+            self.history.append(
+                prediction["timestamp"],
+                float(data_point.get("tension", 0)),
+                float(data_point.get("courant", 0)),
+                prediction["anomaly_score"],
+                prediction["is_anomaly"],
+                prediction["panne_type"],
+                prediction["confidence"]
+            )
+            self.rolling_stats.update(
+                prediction["timestamp"],
+                prediction["is_anomaly"],
+                prediction["panne_type"],
+                prediction["confidence"],
+                prediction["anomaly_score"]
+            )
     
     def get_recent_predictions(self, minutes=60):
         """
         Récupère les prédictions des N dernières minutes
         """
         cutoff_time = datetime.now() - timedelta(minutes=minutes)
-        recent = [p for p in self.predictions_history 
-                 if p["timestamp"] > cutoff_time and p["status"] == "success"]
-        return recent
+        with self._history_lock:
+            return self.history.records(since=cutoff_time)
     
     def get_statistics(self, hours=24):
         """
         Calcule les statistiques sur les prédictions
+        
+        Les fenêtres couvertes par les agrégats glissants (72 h) sont
+        obtenues par fusion des seaux par minute ; au-delà, l'historique
+        brut est relu.
         """
-        recent = self.get_recent_predictions(hours * 60)
+        with self._history_lock:
+            if hours <= self.rolling_stats.max_hours:
+                stats = self.rolling_stats.statistics(hours, now=datetime.now())
+            else:
+                cutoff_time = datetime.now() - timedelta(hours=hours)
+                stats = self.history.statistics(since=cutoff_time)
         
-        if not recent:
-            return {
-                "total_predictions": 0,
-                "anomalies_detected": 0,
-                "anomaly_rate": 0.0,
-                "panne_types": {},
-                "avg_confidence": 0.0
-            }
+        if stats["total_predictions"] > 0:
+            stats["period_hours"] = hours
         
-        df = pd.DataFrame(recent)
+        return stats
+    
+    def prepare_batch_features(self, data_frame):
+        """
+        Prépare les features d'un batch en une seule opération vectorisée
         
-        # Compter les types de panne
-        panne_counts = df["panne_type"].value_counts().to_dict()
+        Même règle que prepare_features : colonne absente = 0 et puissance
+        recalculée à partir de la tension et du courant.
+        """
+        n_rows = len(data_frame)
         
-        # Calculer les statistiques
-        stats = {
-            "total_predictions": len(df),
-            "anomalies_detected": df["is_anomaly"].sum(),
-            "anomaly_rate": df["is_anomaly"].mean(),
-            "panne_types": panne_counts,
-            "avg_confidence": df["confidence"].mean(),
-            "avg_anomaly_score": df["anomaly_score"].mean(),
-            "period_hours": hours
-        }
+        if "tension" in data_frame.columns:
+            tension = data_frame["tension"].to_numpy(dtype=float)
+        else:
+            tension = np.zeros(n_rows)
         
-        return stats
+        if "courant" in data_frame.columns:
+            courant = data_frame["courant"].to_numpy(dtype=float)
+        else:
+            courant = np.zeros(n_rows)
+        
+        features = pd.DataFrame({
+            "tension": tension,
+            "courant": courant,
+            "puissance": tension * courant / 1000
+        })
+        
+        return features[self.features]
     
     def predict_batch(self, data_frame):
         """
-        Prédiction sur un batch de données
+        Prédiction vectorisée sur un batch de données
+        
+        Les features sont calculées une seule fois, le détecteur est appelé
+        une seule fois sur tout le batch et le classifieur une seule fois sur
+        les lignes anormales.
+        
+        Args:
+            data_frame (pd.DataFrame): Mesures avec tension, courant
+            
+        Returns:
+            pd.DataFrame: Une ligne par mesure (même index) avec
+            anomaly_score, is_anomaly, panne_type, confidence et status
+        """
+        n_rows = len(data_frame)
+        results = pd.DataFrame({
+            "timestamp": datetime.now(),
+            "anomaly_score": np.zeros(n_rows),
+            "is_anomaly": np.zeros(n_rows, dtype=bool),
+            "panne_type": "OK",
+            "confidence": np.zeros(n_rows),
+            "status": "success"
+        }, index=data_frame.index)
+        
+        if n_rows == 0:
+            return results
+        
+        try:
+            features_df = self.prepare_batch_features(data_frame)
+        except Exception as e:
+            return self.create_error_batch(results, f"Erreur préparation features: {e}")
+        
+        # Une seule lecture des modèles : un swap_models concurrent ne
+        # s'applique qu'aux batchs suivants
+        generation = self.current_models()
+        anomaly_detector, _ = self.get_models(n_rows, generation)
+        if anomaly_detector is None:
+            return self.create_error_batch(results, "Modèle non disponible")
+        
+        try:
+            scores, is_anomaly = self.score_batch(features_df, generation)
+            panne_types, confidences = self.classify_batch(features_df, is_anomaly, generation)
+            
+            results["anomaly_score"] = scores.astype(float)
+            results["is_anomaly"] = is_anomaly
+            results["panne_type"] = panne_types
+            results["confidence"] = confidences
+            
+        except Exception as e:
+            return self.create_error_batch(results, f"Erreur prédiction: {str(e)}")
+        
+        self.add_batch_to_history(features_df, results)
+        
+        return results
+    
+    def score_batch(self, features_df, generation=None):
         """
-        results = []
+        Détection d'anomalie en un seul appel sur un batch de features
         
-        for _, row in data_frame.iterrows():
-            data_point = row.to_dict()
-            result = self.predict(data_point)
-            results.append(result)
+        Args:
+            generation (tuple): Modèles lus par current_models (défaut : les actuels)
         
-        return results
\ No newline at end of file
+        Returns:
+            tuple: (scores, masque des anomalies)
+        """
+        anomaly_detector, _ = self.get_models(len(features_df), generation)
+        if anomaly_detector is None:
+            raise RuntimeError("Modèle non disponible")
+        
+        scores = anomaly_detector.score_samples(features_df)
+        return scores, scores < self.anomaly_threshold
+    
+    def classify_batch(self, features_df, is_anomaly, generation=None):
+        """
+        Classification des seules lignes anormales en un seul appel
+        
+        Args:
+            generation (tuple): Modèles lus par current_models (défaut : les actuels)
+        
+        Returns:
+            tuple: (types de panne, confiances), "OK" et 0 hors anomalies
+        """
+        n_rows = len(features_df)
+        panne_types = np.full(n_rows, "OK", dtype=object)
+        confidences = np.zeros(n_rows)
+        
+        _, classifier = self.get_models(int(is_anomaly.sum()), generation)
+        if not is_anomaly.any() or classifier is None:
+            return panne_types, confidences
+        
+        anomalies_df = features_df[is_anomaly]
+        try:
+            if hasattr(classifier, "predict_proba"):
+                probas = classifier.predict_proba(anomalies_df)
+                best = probas.argmax(axis=1)
+                panne_types[is_anomaly] = classifier.classes_[best]
+                confidences[is_anomaly] = probas[np.arange(len(best)), best]
+            else:
+                panne_types[is_anomaly] = classifier.predict(anomalies_df)
+                confidences[is_anomaly] = 0.8  # Valeur par défaut
+        except Exception:
+            panne_types[is_anomaly] = "Inconnu"
+            confidences[is_anomaly] = 0.5
+        
+        return panne_types, confidences
+    
+    def create_error_batch(self, results, error_message):
+        """Marque toutes les lignes d'un batch comme en erreur"""
+        results["panne_type"] = "Erreur"
+        results["status"] = "error"
+        results["error_message"] = error_message
+        return results
+    
+    def add_batch_to_history(self, features_df, results):
+        """Ajoute un batch à l'historique sans créer de dictionnaire par ligne"""
+        with self._history_lock:
+            # Horodaté sous le verrou, comme add_to_history
+            now = datetime.now()
+            results["timestamp"] = now
+            timestamp = now.timestamp()
+            self.rolling_stats.update_batch(
+                timestamp,
+                results["is_anomaly"].to_numpy(),
+                results["panne_type"].to_numpy(),
+                results["confidence"].to_numpy(),
+                results["anomaly_score"].to_numpy()
+            )
+            self.history.extend(
+                timestamp,
+                features_df["tension"].to_numpy(),
+                features_df["courant"].to_numpy(),
+                results["anomaly_score"].to_numpy(),
+                results["is_anomaly"].to_numpy(),
+                results["panne_type"].to_numpy(),
+                results["confidence"].to_numpy()
+            )
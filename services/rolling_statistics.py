@@ -0,0 +1,200 @@
+"""
+Statistiques glissantes incrémentales sur les prédictions
+"""
+import numpy as np
+
+
+class RollingStatistics:
+    """
+    Agrégats par minute mis à jour à chaque prédiction
+
+    Chaque minute correspond à un seau d'un anneau couvrant max_hours
+    heures : nombre de mesures, d'anomalies, sommes des confiances et des
+    scores, histogramme des types de panne. Une fenêtre de N heures est
+    obtenue en fusionnant ses N x 60 seaux, sans relire l'historique brut.
+    La granularité est la minute : la minute la plus ancienne de la
+    fenêtre est comptée en entier.
+    """
+
+    def __init__(self, max_hours=72, bucket_seconds=60):
+        """
+        Args:
+            max_hours (int): Fenêtre maximale interrogeable (heures)
+            bucket_seconds (int): Durée d'un seau (secondes)
+        """
+        self.max_hours = max_hours
+        self.bucket_seconds = bucket_seconds
+        self.n_buckets = int(max_hours * 3600 // bucket_seconds)
+
+        # Numéro absolu de la minute stockée dans chaque seau (-1 = vide)
+        self.bucket_id = np.full(self.n_buckets, -1, dtype=np.int64)
+        self.count = np.zeros(self.n_buckets, dtype=np.int64)
+        self.anomalies = np.zeros(self.n_buckets, dtype=np.int64)
+        self.confidence_sum = np.zeros(self.n_buckets)
+        self.confidence_count = np.zeros(self.n_buckets, dtype=np.int64)
+        self.score_sum = np.zeros(self.n_buckets)
+        self.class_counts = np.zeros((self.n_buckets, 4), dtype=np.int64)
+
+        self.class_names = []
+        self._class_codes = {}
+
+        # Horodatage le plus récent reçu (secondes depuis l'epoch)
+        self.last_timestamp = None
+
+    def encode_class(self, panne_type):
+        """Code entier d'un type de panne (colonne ajoutée au besoin)"""
+        code = self._class_codes.get(panne_type)
+        if code is None:
+            code = len(self.class_names)
+            self._class_codes[panne_type] = code
+            self.class_names.append(panne_type)
+            if code >= self.class_counts.shape[1]:
+                extra = np.zeros_like(self.class_counts)
+                self.class_counts = np.hstack([self.class_counts, extra])
+        return code
+
+    def _reset_slots(self, slots, bucket_ids):
+        """Vide les seaux occupés par une minute plus ancienne"""
+        stale = self.bucket_id[slots] != bucket_ids
+        if stale.any():
+            slots = slots[stale]
+            self.bucket_id[slots] = bucket_ids[stale]
+            self.count[slots] = 0
+            self.anomalies[slots] = 0
+            self.confidence_sum[slots] = 0.0
+            self.confidence_count[slots] = 0
+            self.score_sum[slots] = 0.0
+            self.class_counts[slots] = 0
+
+    def update(self, timestamp, is_anomaly, panne_type, confidence, anomaly_score=0.0):
+        """
+        Ajoute une prédiction en O(1)
+
+        Args:
+            timestamp (datetime): Horodatage de la prédiction
+            is_anomaly (bool): Anomalie détectée
+            panne_type (str): Type de panne prédit
+            confidence (float): Confiance (NaN = non renseignée)
+            anomaly_score (float): Score d'anomalie
+        """
+        seconds = timestamp.timestamp()
+        bucket = int(seconds // self.bucket_seconds)
+        slot = bucket % self.n_buckets
+
+        if self.bucket_id[slot] > bucket:
+            return  # Minute sortie de l'anneau
+        if self.bucket_id[slot] != bucket:
+            self._reset_slots(np.array([slot]), np.array([bucket]))
+
+        self.count[slot] += 1
+        self.anomalies[slot] += bool(is_anomaly)
+        if confidence == confidence:  # NaN exclu
+            self.confidence_sum[slot] += confidence
+            self.confidence_count[slot] += 1
+        self.score_sum[slot] += anomaly_score
+        self.class_counts[slot, self.encode_class(panne_type)] += 1
+
+        if self.last_timestamp is None or seconds > self.last_timestamp:
+            self.last_timestamp = seconds
+
+    def update_batch(self, timestamps, is_anomaly, panne_types, confidence, anomaly_score=None):
+        """
+        Ajoute un batch de prédictions
+
+        Args:
+            timestamps (array-like): Secondes depuis l'epoch (ou scalaire)
+            is_anomaly (array-like): Drapeaux d'anomalie
+            panne_types (array-like): Types de panne prédits
+            confidence (array-like): Confiances (NaN = non renseignée)
+            anomaly_score (array-like): Scores d'anomalie
+        """
+        n_rows = len(is_anomaly)
+        if n_rows == 0:
+            return
+
+        seconds = np.broadcast_to(np.asarray(timestamps, dtype=float), (n_rows,))
+        buckets = (seconds // self.bucket_seconds).astype(np.int64)
+
+        # Seules les minutes encore dans l'anneau sont retenues
+        newest = max(buckets.max(), self.bucket_id.max())
+        keep = buckets > newest - self.n_buckets
+        buckets = buckets[keep]
+        slots = buckets % self.n_buckets
+
+        # Une minute par seau : la plus récente l'emporte
+        newest_per_slot = self.bucket_id.copy()
+        np.maximum.at(newest_per_slot, slots, buckets)
+        unique_slots = np.unique(slots)
+        self._reset_slots(unique_slots, newest_per_slot[unique_slots])
+        current = self.bucket_id[slots] == buckets
+
+        slots = slots[current]
+        confidence = np.broadcast_to(np.asarray(confidence, dtype=float), (n_rows,))[keep][current]
+        has_confidence = ~np.isnan(confidence)
+
+        uniques, inverse = np.unique(np.asarray(panne_types, dtype=object)[keep][current],
+                                     return_inverse=True)
+        codes = np.array([self.encode_class(u) for u in uniques], dtype=np.int64)[inverse]
+
+        np.add.at(self.count, slots, 1)
+        np.add.at(self.anomalies, slots, np.asarray(is_anomaly, dtype=np.int64)[keep][current])
+        np.add.at(self.confidence_sum, slots[has_confidence], confidence[has_confidence])
+        np.add.at(self.confidence_count, slots[has_confidence], 1)
+        if anomaly_score is not None:
+            np.add.at(self.score_sum, slots, np.asarray(anomaly_score, dtype=float)[keep][current])
+        np.add.at(self.class_counts, (slots, codes), 1)
+
+        latest = float(seconds.max())
+        if self.last_timestamp is None or latest > self.last_timestamp:
+            self.last_timestamp = latest
+
+    def statistics(self, hours=24, now=None):
+        """
+        Statistiques des N dernières heures par fusion des seaux
+
+        Args:
+            hours (float): Taille de la fenêtre (au plus max_hours)
+            now (datetime): Fin de la fenêtre (défaut : dernière prédiction reçue)
+
+        Returns:
+            dict: Même format que PredictionHistory.statistics
+        """
+        if self.last_timestamp is None:
+            end_seconds = 0.0
+        else:
+            end_seconds = now.timestamp() if now is not None else self.last_timestamp
+
+        n_window = min(int(np.ceil(hours * 3600 / self.bucket_seconds)), self.n_buckets)
+        end_bucket = int(end_seconds // self.bucket_seconds)
+        bucket_ids = np.arange(end_bucket - n_window + 1, end_bucket + 1)
+        slots = bucket_ids % self.n_buckets
+        slots = slots[self.bucket_id[slots] == bucket_ids]
+
+        total = int(self.count[slots].sum())
+        if total == 0:
+            return {
+                "total_predictions": 0,
+                "anomalies_detected": 0,
+                "anomaly_rate": 0.0,
+                "panne_types": {},
+                "avg_confidence": 0.0
+            }
+
+        anomalies = int(self.anomalies[slots].sum())
+        class_counts = self.class_counts[slots].sum(axis=0)
+        confidence_count = self.confidence_count[slots].sum()
+
+        return {
+            "total_predictions": total,
+            "anomalies_detected": anomalies,
+            "anomaly_rate": anomalies / total,
+            "panne_types": {
+                name: int(class_counts[code])
+                for code, name in enumerate(self.class_names) if class_counts[code] > 0
+            },
+            "avg_confidence": (
+                float(self.confidence_sum[slots].sum() / confidence_count)
+                if confidence_count else 0.0
+            ),
+            "avg_anomaly_score": float(self.score_sum[slots].sum() / total)
+        }
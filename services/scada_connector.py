@@ -1,4 +1,7 @@
-from opcua import Client
+from opcua import Client, ua
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import threading
 import pandas as pd
 import time
 
@@ -12,31 +15,438 @@ OPCUA_ENDPOINT = "opc.tcp://127.0.0.1:4840"
 NODE_TENSION = "ns=2;i=1001"
 NODE_COURANT = "ns=2;i=1002"
 
-def get_scada_data():
+
+class _SubscriptionHandler:
+    """Reçoit les notifications OPC-UA et les pousse dans le buffer du connecteur"""
+
+    def __init__(self, connector):
+        self.connector = connector
+
+    def datachange_notification(self, node, val, data):
+        self.connector.push_value(node.nodeid.to_string(), val)
+
+    def event_notification(self, event):
+        pass
+
+    def status_change_notification(self, status):
+        # Session perdue côté serveur : reconnexion au prochain accès
+        self.connector.mark_disconnected()
+
+
+class ScadaConnector:
     """
-    Lecture sécurisée des données SCADA via OPC-UA
-    Retourne un DataFrame compatible IA
+    Connecteur OPC-UA à session persistante (lecture seule)
+
+    La session reste ouverte entre les lectures ; en cas d'échec, les
+    reconnexions sont espacées par un backoff exponentiel. Les lectures de
+    plusieurs NodeIds se font en un seul aller-retour, et les abonnements
+    (monitored items) poussent les nouvelles valeurs dans un buffer borné.
     """
 
-    try:
-        client = Client(OPCUA_ENDPOINT, timeout=2)
-        client.connect()
+    def __init__(self, endpoint=OPCUA_ENDPOINT, timeout=2, username=None, password=None,
+                 initial_backoff=1.0, max_backoff=30.0, buffer_size=10000):
+        """
+        Args:
+            endpoint (str): URL opc.tcp du serveur SCADA
+            timeout (float): Timeout des requêtes (secondes)
+            username (str): Identifiant OPC-UA (optionnel)
+            password (str): Mot de passe OPC-UA (optionnel)
+            initial_backoff (float): Délai avant la première reconnexion (secondes)
+            max_backoff (float): Délai maximal entre deux tentatives (secondes)
+            buffer_size (int): Nombre maximal de valeurs poussées conservées
+        """
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.username = username
+        self.password = password
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+
+        self.client = None
+        self.connected = False
+        self._nodes = {}
+        self._lock = threading.RLock()
+
+        # Backoff de reconnexion
+        self._backoff = initial_backoff
+        self._next_attempt = 0.0
+        self.connection_failures = 0
+
+        # Abonnements et valeurs poussées
+        self._subscription = None
+        self._subscription_period = None
+        self._subscribed_node_ids = []
+        self.buffer = deque(maxlen=buffer_size)
+        self.latest_values = {}
+
+    def connect(self):
+        """
+        Ouvre la session si nécessaire
+
+        Raises:
+            ConnectionError: Serveur injoignable ou backoff en cours
+        """
+        with self._lock:
+            if self.connected:
+                return
+            if self.client is not None:
+                self.disconnect()  # Session perdue : on repart de zéro
+
+            now = time.monotonic()
+            if now < self._next_attempt:
+                raise ConnectionError(
+                    f"Reconnexion SCADA dans {self._next_attempt - now:.1f}s"
+                )
+
+            client = Client(self.endpoint, timeout=self.timeout)
+            if self.username:
+                client.set_user(self.username)
+            if self.password:
+                client.set_password(self.password)
+
+            try:
+                client.connect()
+            except Exception as e:
+                self.connection_failures += 1
+                self._next_attempt = time.monotonic() + self._backoff
+                self._backoff = min(self._backoff * 2, self.max_backoff)
+                raise ConnectionError(f"Connexion SCADA impossible: {e}") from e
+
+            self.client = client
+            self.connected = True
+            self._nodes = {}
+            self._backoff = self.initial_backoff
+            self._next_attempt = 0.0
 
-        tension = client.get_node(NODE_TENSION).get_value()
-        courant = client.get_node(NODE_COURANT).get_value()
+            # Rétablir les abonnements après une reconnexion
+            if self._subscribed_node_ids:
+                node_ids = self._subscribed_node_ids
+                self._subscribed_node_ids = []
+                self._subscription = None
+                self.subscribe(node_ids, self._subscription_period)
 
-        client.disconnect()
+    def mark_disconnected(self):
+        """Marque la session comme perdue (fermée au prochain accès)"""
+        self.connected = False
 
-        data = {
+    def disconnect(self):
+        """Ferme la session"""
+        with self._lock:
+            if self.client is not None:
+                try:
+                    self.client.disconnect()
+                except Exception:
+                    pass
+            self.client = None
+            self.connected = False
+            self._subscription = None
+            self._nodes = {}
+            self.latest_values = {}  # Valeurs poussées potentiellement périmées
+
+    def _get_nodes(self, node_ids):
+        nodes = []
+        for node_id in node_ids:
+            node = self._nodes.get(node_id)
+            if node is None:
+                node = self.client.get_node(node_id)
+                self._nodes[node_id] = node
+            nodes.append(node)
+        return nodes
+
+    def read_values(self, node_ids, raise_on_error=True):
+        """
+        Lit plusieurs NodeIds en un seul aller-retour
+
+        Args:
+            node_ids (list): NodeIds au format "ns=2;i=1001"
+            raise_on_error (bool): Lève une erreur sur un statut invalide,
+                sinon la valeur correspondante vaut None
+
+        Returns:
+            list: Valeurs dans l'ordre des NodeIds
+        """
+        with self._lock:
+            self.connect()
+
+            try:
+                nodes = self._get_nodes(node_ids)
+                results = self.client.uaclient.get_attributes(
+                    [node.nodeid for node in nodes], ua.AttributeIds.Value
+                )
+            except Exception:
+                # Session probablement perdue : reconnexion au prochain appel
+                self.disconnect()
+                raise
+
+        values = []
+        for node_id, result in zip(node_ids, results):
+            if not result.StatusCode.is_good():
+                if raise_on_error:
+                    raise ValueError(f"Lecture {node_id} invalide: {result.StatusCode}")
+                values.append(None)
+            else:
+                values.append(result.Value.Value)
+        return values
+
+    def subscribe(self, node_ids, period_ms=500):
+        """
+        S'abonne aux changements de valeur des NodeIds
+
+        Les valeurs reçues sont poussées dans buffer et latest_values.
+        """
+        with self._lock:
+            self.connect()
+
+            if self._subscription is None:
+                self._subscription = self.client.create_subscription(
+                    period_ms, _SubscriptionHandler(self)
+                )
+                self._subscription_period = period_ms
+
+            new_ids = [n for n in node_ids if n not in self._subscribed_node_ids]
+            if new_ids:
+                self._subscription.subscribe_data_change(self._get_nodes(new_ids))
+                self._subscribed_node_ids.extend(new_ids)
+
+    @property
+    def subscribed(self):
+        return self._subscription is not None and self.connected
+
+    def fresh_value(self, node_id, max_age):
+        """
+        Dernière valeur poussée pour node_id, si reçue il y a moins de max_age secondes
+
+        Un abonnement ne notifie que les changements : une valeur trop
+        ancienne (abonnement silencieux ou valeur stable) est ignorée et
+        relue par l'appelant.
+
+        Returns:
+            Valeur, ou None si absente ou périmée
+        """
+        value, received_at = self.latest_values.get(node_id, (None, None))
+        if value is None or time.time() - received_at > max_age:
+            return None
+        return value
+
+    def push_value(self, node_id, value):
+        """Enregistre une valeur reçue par abonnement (avec son heure de réception)"""
+        timestamp = time.time()
+        self.latest_values[node_id] = (value, timestamp)
+        self.buffer.append((timestamp, node_id, value))
+
+    def drain(self):
+        """
+        Vide le buffer des valeurs poussées
+
+        Returns:
+            list: Tuples (horodatage, NodeId, valeur) dans l'ordre de réception
+        """
+        values = []
+        while self.buffer:
+            values.append(self.buffer.popleft())
+        return values
+
+
+class ScadaPoller:
+    """
+    Collecte multi-postes à partir d'une table de NodeIds
+
+    Les postes sont regroupés par endpoint : chaque serveur est lu en un
+    seul aller-retour sur sa session persistante, et les serveurs sont
+    interrogés en parallèle par un pool de threads borné. Chaque cycle
+    produit un DataFrame unique et met à jour les compteurs par poste et
+    la durée de lecture par serveur.
+    """
+
+    def __init__(self, stations, endpoint=OPCUA_ENDPOINT, max_workers=16, timeout=2,
+                 use_subscription=False, username=None, password=None, stale_seconds=30):
+        """
+        Args:
+            stations (list): Postes {"name", "zone", "tension", "courant"}
+                et optionnellement "endpoint"
+            endpoint (str): Endpoint par défaut des postes
+            max_workers (int): Nombre maximal de serveurs lus en parallèle
+            timeout (float): Timeout des requêtes OPC-UA (secondes)
+            use_subscription (bool): Utilise les valeurs poussées par abonnement
+            stale_seconds (float): Âge au-delà duquel une valeur poussée est
+                relue directement sur le serveur
+        """
+        self.stations = [dict(station) for station in stations]
+        self.use_subscription = use_subscription
+        self.stale_seconds = stale_seconds
+
+        self.groups = {}
+        for station in self.stations:
+            station.setdefault("endpoint", endpoint)
+            station.setdefault("zone", station["name"])
+            self.groups.setdefault(station["endpoint"], []).append(station)
+
+        self.connectors = {
+            group_endpoint: ScadaConnector(group_endpoint, timeout=timeout,
+                                           username=username, password=password)
+            for group_endpoint in self.groups
+        }
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, min(max_workers, len(self.groups))),
+            thread_name_prefix="scada-poll"
+        )
+
+        # Compteurs par poste ; durée de lecture par serveur (un aller-retour
+        # pour tous ses postes) et durée du dernier cycle
+        self.station_stats = {
+            station["name"]: {"reads": 0, "failures": 0, "last_error": None}
+            for station in self.stations
+        }
+        self.endpoint_stats = {
+            group_endpoint: {"stations": len(group), "last_duration_ms": None, "last_error": None}
+            for group_endpoint, group in self.groups.items()
+        }
+        self.cycles = 0
+        self.last_cycle_seconds = None
+
+    @classmethod
+    def from_config(cls, scada_config):
+        """
+        Construit le collecteur depuis la section scada de config.yaml
+
+        Sans liste de postes, le poste historique (NODE_TENSION/NODE_COURANT)
+        est utilisé.
+        """
+        stations = scada_config.get("stations") or [{
+            "name": "Poste_Nord_01",
             "zone": "Poste_Nord_01",
-            "tension": float(tension),
-            "courant": float(courant),
-            "puissance": round((tension * courant) / 1000, 2),
-            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+            "tension": NODE_TENSION,
+            "courant": NODE_COURANT
+        }]
+        return cls(
+            stations,
+            endpoint=scada_config.get("endpoint", OPCUA_ENDPOINT),
+            max_workers=scada_config.get("max_workers", 16),
+            timeout=scada_config.get("timeout", 2),
+            use_subscription=scada_config.get("use_subscription", False),
+            stale_seconds=scada_config.get("stale_seconds", 30),
+            username=scada_config.get("username"),
+            password=scada_config.get("password")
+        )
+
+    def _read_group(self, endpoint, stations):
+        """Lit tous les postes d'un serveur ; retourne (valeurs, durée, erreur)"""
+        connector = self.connectors[endpoint]
+        node_ids = [node for station in stations for node in (station["tension"], station["courant"])]
+        start = time.perf_counter()
+
+        try:
+            values = [None] * len(node_ids)
+            if self.use_subscription:
+                if not connector.subscribed:
+                    connector.subscribe(node_ids)
+                # Valeurs périmées : relues comme les valeurs manquantes
+                values = [connector.fresh_value(n, self.stale_seconds) for n in node_ids]
+
+            missing = [i for i, value in enumerate(values) if value is None]
+            if missing:
+                read = connector.read_values([node_ids[i] for i in missing], raise_on_error=False)
+                for i, value in zip(missing, read):
+                    values[i] = value
+
+            return values, time.perf_counter() - start, None
+
+        except Exception as e:
+            return [None] * len(node_ids), time.perf_counter() - start, str(e)
+
+    def poll(self):
+        """
+        Effectue un cycle de collecte sur tous les postes
+
+        Returns:
+            pd.DataFrame: Une ligne par poste lu avec succès (timestamp en datetime64)
+        """
+        cycle_start = time.perf_counter()
+        timestamp = pd.Timestamp.now().floor("s")
+
+        futures = {
+            endpoint: self.executor.submit(self._read_group, endpoint, stations)
+            for endpoint, stations in self.groups.items()
         }
 
-        return pd.DataFrame([data])
+        rows = []
+        for endpoint, future in futures.items():
+            values, duration, error = future.result()
+            self.endpoint_stats[endpoint]["last_duration_ms"] = duration * 1000
+            self.endpoint_stats[endpoint]["last_error"] = error
+            for i, station in enumerate(self.groups[endpoint]):
+                stats = self.station_stats[station["name"]]
+                stats["reads"] += 1
+
+                tension, courant = values[2 * i], values[2 * i + 1]
+                if tension is None or courant is None:
+                    stats["failures"] += 1
+                    stats["last_error"] = error or "Valeur invalide"
+                    continue
+
+                stats["last_error"] = None
+                rows.append({
+                    "station": station["name"],
+                    "zone": station["zone"],
+                    "tension": float(tension),
+                    "courant": float(courant),
+                    "timestamp": timestamp
+                })
+
+        self.cycles += 1
+        self.last_cycle_seconds = time.perf_counter() - cycle_start
+
+        data = pd.DataFrame(rows, columns=["station", "zone", "tension", "courant", "timestamp"])
+        data["timestamp"] = pd.to_datetime(data["timestamp"])
+        data.insert(4, "puissance", (data["tension"] * data["courant"] / 1000).round(2))
+        return data
+
+    def close(self):
+        """Ferme les sessions et le pool de threads"""
+        self.executor.shutdown(wait=False)
+        for connector in self.connectors.values():
+            connector.disconnect()
+
+
+# Collecteur partagé par le dashboard
+_poller = None
+_poller_key = None
+_poller_lock = threading.Lock()
+
+
+def get_poller(scada_config):
+    """Retourne le collecteur partagé (recréé si la configuration change)"""
+    global _poller, _poller_key
+    key = repr(sorted(scada_config.items()))
+    with _poller_lock:
+        if _poller is None or _poller_key != key:
+            if _poller is not None:
+                _poller.close()
+            _poller = ScadaPoller.from_config(scada_config)
+            _poller_key = key
+        return _poller
+
+
+def get_scada_data(scada_config=None):
+    """
+    Lecture sécurisée des données SCADA via OPC-UA
+    Retourne un DataFrame compatible IA
+
+    Tous les postes de la section scada de config.yaml sont lus en un
+    cycle ; les sessions sont conservées entre les appels.
+
+    Raises:
+        Exception: Échec du cycle de lecture (journalisé puis propagé :
+            le pipeline le compte dans ses métriques de source)
+    """
+
+    try:
+        if scada_config is None:
+            from utils.helpers import load_config
+            scada_config = load_config().get("scada", {})
+
+        return get_poller(scada_config).poll()
 
     except Exception as e:
-        # Sécurité DSI : aucune exception non gérée
-        return pd.DataFrame([])
\ No newline at end of file
+        print(f"Erreur lecture SCADA: {e}")
+        raise
@@ -0,0 +1,326 @@
+"""
+Pipeline de traitement en flux : SCADA -> alertes, hors du script Streamlit
+"""
+from collections import deque
+from datetime import datetime
+import queue
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+from scripts.data_validation import DataValidator
+from services.data_preprocessing import preprocess
+from services.alert_engine import generate_alerts
+from services.alert_manager import AlertManager
+from services.rolling_statistics import RollingStatistics
+from services.visualization_service import ChartAggregates
+
+
+class ReplaySource:
+    """Source rejouant un DataFrame par blocs (mode simulation)"""
+
+    def __init__(self, data, batch_size=None):
+        """
+        Args:
+            data (pd.DataFrame): Mesures à rejouer
+            batch_size (int): Lignes par lecture (None = tout en une fois)
+        """
+        self.data = data
+        self.batch_size = batch_size or max(len(data), 1)
+        self.position = 0
+
+    def __call__(self):
+        if self.position >= len(self.data):
+            return None
+        batch = self.data.iloc[self.position:self.position + self.batch_size].copy()
+        self.position += len(batch)
+        return batch
+
+
+class PipelineSnapshot:
+    """Derniers résultats matérialisés, lus par le dashboard"""
+
+    def __init__(self, data, alerts, sequence, updated_at, issues=None, episodes=None):
+        self.data = data
+        self.alerts = alerts
+        self.episodes = episodes if episodes is not None else pd.DataFrame()
+        self.sequence = sequence
+        self.updated_at = updated_at
+        self.issues = issues or []
+
+
+class StreamingPipeline:
+    """
+    Pipeline d'ingestion et de scoring exécuté en arrière-plan
+
+    Chaque étape (lecture, validation, features, détection, classification,
+    alertes) tourne dans son propre thread ; les étapes communiquent par
+    des files bornées. Une file pleine bloque l'étape amont, ce qui ralentit
+    la lecture de la source (backpressure). La dernière étape matérialise
+    une fenêtre glissante des mesures scorées et des alertes, que le
+    dashboard lit sans jamais déclencher d'inférence. Si aggregate_hours
+    est renseigné, elle tient aussi à jour les agrégats des KPI et des
+    graphiques avec chaque lot : ils couvrent des périodes plus longues
+    que la fenêtre matérialisée (max_rows).
+    """
+
+    def __init__(self, source, prediction_service, poll_interval=5.0, queue_size=8,
+                 max_rows=200000, alert_engine=None, episode_gap_seconds=300, validator=None,
+                 aggregate_hours=None):
+        """
+        Args:
+            source (callable): Retourne un DataFrame de nouvelles mesures
+                (vide ou None si rien de nouveau)
+            prediction_service (PredictionService): Modèles de détection
+            poll_interval (float): Intervalle entre deux lectures (secondes)
+            queue_size (int): Nombre maximal de batchs en attente par étape
+            max_rows (int): Taille de la fenêtre matérialisée (lignes)
+            alert_engine (AlertEngine): Règles de criticité (défaut : règles intégrées)
+            episode_gap_seconds (float): Silence clôturant un épisode d'alerte
+            validator (DataValidator): Plages de validation (défaut : plages intégrées)
+            aggregate_hours (float): Période couverte par les agrégats glissants
+                (KPI, histogrammes, zones) ; None = pas d'agrégats
+        """
+        self.source = source
+        self.prediction_service = prediction_service
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self.max_rows = max_rows
+        self.alert_engine = alert_engine
+        self.alert_manager = AlertManager(gap_seconds=episode_gap_seconds, engine=alert_engine)
+        self.validator = validator or DataValidator()
+
+        self.stages = [
+            ("validation", self._validate),
+            ("features", self._compute_features),
+            ("detection", self._score),
+            ("classification", self._classify),
+            ("alertes", self._generate_alerts)
+        ]
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in self.stages]
+        self.metrics = {
+            name: {"processed": 0, "rows": 0, "errors": 0, "last_error": None, "busy_seconds": 0.0}
+            for name in ["source"] + [name for name, _ in self.stages]
+        }
+
+        # Fenêtre matérialisée
+        self._frames = deque()
+        self._alert_frames = deque()
+        self._rows = 0
+        self._issues = []
+        self._sequence = 0
+        self._updated_at = None
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._data_ready = threading.Event()
+
+        # Agrégats alimentés par tous les lots, y compris ceux déjà sortis
+        # de la fenêtre matérialisée
+        self.kpi_stats = RollingStatistics(max_hours=aggregate_hours) if aggregate_hours else None
+        self.chart_stats = ChartAggregates(max_hours=aggregate_hours) if aggregate_hours else None
+
+        self._stop_event = threading.Event()
+        self._threads = []
+
+        # Modèles utilisés par la détection de chaque lot en attente de
+        # classification (clé : id du lot), pour un swap_models entre les étapes
+        self._generations = {}
+
+    # ------------------------------------------------------------------
+    # Étapes
+    # ------------------------------------------------------------------
+    def _validate(self, batch):
+        data, report = self.validator.validate(batch)
+        self._issues = report["issues"]
+        return data
+
+    def _compute_features(self, batch):
+        return preprocess(batch)
+
+    def _score(self, batch):
+        # Génération de modèles retenue pour la classification du même lot
+        generation = self.prediction_service.current_models()
+        features = self.prediction_service.prepare_batch_features(batch)
+        scores, is_anomaly = self.prediction_service.score_batch(features, generation)
+        batch["anomalie_score"] = scores
+        batch["anomalie"] = is_anomaly.astype(int)
+        self._generations[id(batch)] = generation
+        return batch
+
+    def _classify(self, batch):
+        generation = self._generations.pop(id(batch), None)
+        is_anomaly = batch["anomalie"].to_numpy() == 1
+        features = self.prediction_service.prepare_batch_features(batch)
+        panne_types, confidences = self.prediction_service.classify_batch(features, is_anomaly,
+                                                                          generation)
+        batch["panne_predite"] = panne_types
+        batch["confiance"] = np.where(is_anomaly, confidences, np.nan)
+        return batch
+
+    def _generate_alerts(self, batch):
+        alerts = generate_alerts(batch, self.alert_engine)
+
+        with self._lock:
+            self._frames.append(batch)
+            self._alert_frames.append(alerts)
+            self.alert_manager.update(batch)
+            if self.kpi_stats is not None and "timestamp" in batch.columns:
+                self._update_aggregates(batch)
+            self._rows += len(batch)
+
+            # Les lots les plus anciens sortent de la fenêtre
+            while self._rows - len(self._frames[0]) >= self.max_rows:
+                self._rows -= len(self._frames.popleft())
+                self._alert_frames.popleft()
+
+            self._sequence += 1
+            self._updated_at = datetime.now()
+            self._snapshot = None
+
+        self._data_ready.set()
+        return None
+
+    def _update_aggregates(self, batch):
+        seconds = pd.to_datetime(batch["timestamp"]).to_numpy().astype("datetime64[ns]").astype(np.int64) / 1e9
+        self.kpi_stats.update_batch(
+            seconds,
+            batch["anomalie"].to_numpy(),
+            batch["panne_predite"].to_numpy(),
+            batch["confiance"].to_numpy(dtype=float),
+            batch["anomalie_score"].to_numpy()
+        )
+        self.chart_stats.update(batch)
+
+    # ------------------------------------------------------------------
+    # Threads
+    # ------------------------------------------------------------------
+    def _put(self, out_queue, item):
+        """Dépose un élément en bloquant tant que la file est pleine"""
+        while not self._stop_event.is_set():
+            try:
+                out_queue.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run_source(self):
+        metrics = self.metrics["source"]
+        while not self._stop_event.is_set():
+            started = time.perf_counter()
+            try:
+                batch = self.source()
+            except Exception as e:
+                batch = None
+                metrics["errors"] += 1
+                metrics["last_error"] = str(e)
+
+            elapsed = time.perf_counter() - started
+            metrics["busy_seconds"] += elapsed
+
+            if batch is not None and not batch.empty:
+                metrics["processed"] += 1
+                metrics["rows"] += len(batch)
+                if not self._put(self.queues[0], batch):
+                    break
+
+            self._stop_event.wait(max(0.0, self.poll_interval - elapsed))
+
+    def _run_stage(self, index):
+        name, function = self.stages[index]
+        metrics = self.metrics[name]
+        in_queue = self.queues[index]
+        out_queue = self.queues[index + 1] if index + 1 < len(self.queues) else None
+
+        while not self._stop_event.is_set():
+            try:
+                batch = in_queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+
+            started = time.perf_counter()
+            try:
+                result = function(batch)
+            except Exception as e:
+                metrics["errors"] += 1
+                metrics["last_error"] = str(e)
+                continue
+            finally:
+                metrics["busy_seconds"] += time.perf_counter() - started
+
+            metrics["processed"] += 1
+            metrics["rows"] += len(batch)
+            if result is not None and out_queue is not None:
+                if not self._put(out_queue, result):
+                    break
+
+    def start(self):
+        """Démarre les threads du pipeline"""
+        if self._threads:
+            return self
+
+        self._stop_event.clear()
+        self._threads = [threading.Thread(target=self._run_source, name="pipeline-source",
+                                          daemon=True)]
+        for index, (name, _) in enumerate(self.stages):
+            self._threads.append(threading.Thread(
+                target=self._run_stage, args=(index,), name=f"pipeline-{name}", daemon=True
+            ))
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        """Arrête les threads du pipeline"""
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    @property
+    def running(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    # ------------------------------------------------------------------
+    # Lecture des résultats
+    # ------------------------------------------------------------------
+    def wait_for_data(self, timeout=None):
+        """Attend le premier batch matérialisé ; retourne False au timeout"""
+        return self._data_ready.wait(timeout)
+
+    def snapshot(self):
+        """
+        Derniers résultats matérialisés
+
+        La fenêtre n'est concaténée qu'une fois par nouveau batch, puis
+        partagée par tous les lecteurs.
+        """
+        with self._lock:
+            if self._snapshot is None:
+                data = pd.concat(self._frames, ignore_index=True) if self._frames else pd.DataFrame()
+                alerts = (pd.concat(self._alert_frames, ignore_index=True)
+                          if self._alert_frames else pd.DataFrame())
+                self._snapshot = PipelineSnapshot(data, alerts, self._sequence,
+                                                  self._updated_at, list(self._issues),
+                                                  self.alert_manager.episodes())
+            return self._snapshot
+
+    def statistics(self, hours=24):
+        """KPI des N dernières heures de mesures (RollingStatistics.statistics)"""
+        with self._lock:
+            return self.kpi_stats.statistics(hours)
+
+    def histogram(self, column, hours=24):
+        """Histogramme des N dernières heures (ChartAggregates.histogram)"""
+        with self._lock:
+            return self.chart_stats.histogram(column, hours)
+
+    def zone_stats(self, hours=24):
+        """Moyennes et anomalies par zone des N dernières heures (ChartAggregates.zone_stats)"""
+        with self._lock:
+            return self.chart_stats.zone_stats(hours)
+
+    def queue_depths(self):
+        """Nombre de batchs en attente devant chaque étape"""
+        return {name: q.qsize() for (name, _), q in zip(self.stages, self.queues)}
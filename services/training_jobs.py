@@ -0,0 +1,315 @@
+"""
+Entraînement des modèles en tâche de fond, sans interruption du service
+"""
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import copy
+import os
+import threading
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest, RandomForestClassifier
+
+from scripts.train_models import FEATURES
+from services.compiled_forest import export_compiled_models
+
+JOB_COLUMNS = ["id", "mode", "statut", "progression", "message", "lignes",
+               "soumis", "debut", "fin", "erreur"]
+
+
+class TrainingJob:
+    """État d'une tâche d'entraînement (lu par le dashboard)"""
+
+    def __init__(self, job_id, mode, n_rows):
+        self.id = job_id
+        self.mode = mode
+        self.n_rows = n_rows
+        self.status = "en attente"
+        self.progress = 0.0
+        self.message = ""
+        self.submitted_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+        self.result = {}
+        self.done = threading.Event()
+
+    @property
+    def finished(self):
+        return self.status in ("terminé", "échec")
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "mode": self.mode,
+            "statut": self.status,
+            "progression": self.progress,
+            "message": self.message,
+            "lignes": self.n_rows,
+            "soumis": self.submitted_at,
+            "debut": self.started_at,
+            "fin": self.finished_at,
+            "erreur": self.error,
+            **self.result
+        }
+
+
+class TrainingJobManager:
+    """
+    File de tâches d'entraînement exécutées hors du thread de l'interface
+
+    Les tâches passent une à une dans un thread dédié ; le service de
+    prédiction continue de répondre avec les modèles en place pendant
+    l'entraînement. Deux modes :
+
+    - incrémental : le RandomForest existant est copié puis complété de
+      extra_trees arbres entraînés sur les nouvelles pannes (warm_start),
+      les arbres les plus anciens au-delà de max_trees étant retirés ;
+      l'IsolationForest est réentraîné sur une fenêtre glissante des
+      window_rows mesures les plus récentes.
+    - complet : les deux forêts repartent de zéro sur les données fournies.
+
+    Le classifieur grandit par paquets de tree_step arbres, ce qui donne
+    une progression réelle. Si le service utilise un registre de modèles,
+    chaque entraînement y crée une version active ; sinon les modèles sont
+    écrits dans models/ par remplacement atomique. Ils sont ensuite
+    publiés dans le service par swap_models.
+    """
+
+    def __init__(self, prediction_service, models_dir="models", window_rows=200000, n_estimators=100,
+                 extra_trees=20, max_trees=300, tree_step=10, contamination=0.08, n_jobs=None,
+                 max_jobs=50):
+        """
+        Args:
+            prediction_service (PredictionService): Service dont les modèles sont remplacés
+            models_dir (str): Dossier des modèles sérialisés
+            window_rows (int): Mesures récentes utilisées par le détecteur
+            n_estimators (int): Arbres du classifieur en mode complet
+            extra_trees (int): Arbres ajoutés par une mise à jour incrémentale
+            max_trees (int): Arbres conservés au plus (les plus anciens sont retirés)
+            tree_step (int): Arbres entraînés entre deux mises à jour de la progression
+            contamination (float): Proportion d'anomalies attendue
+            n_jobs (int): Cœurs utilisés par les forêts
+            max_jobs (int): Tâches terminées conservées dans l'historique
+        """
+        self.service = prediction_service
+        self.models_dir = models_dir
+        self.window_rows = window_rows
+        self.n_estimators = n_estimators
+        self.extra_trees = extra_trees
+        self.max_trees = max_trees
+        self.tree_step = tree_step
+        self.contamination = contamination
+        self.n_jobs = n_jobs
+        self.max_jobs = max_jobs
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="entrainement")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_id = 1
+
+        # Fenêtre glissante du détecteur : blocs de features du plus ancien au plus récent
+        self._window = deque()
+        self._window_size = 0
+        self._window_end = None  # Horodatage le plus récent de la fenêtre
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+    def submit(self, data, warm_start=True):
+        """
+        Soumet un entraînement sur des mesures étiquetées
+
+        Args:
+            data (pd.DataFrame): tension, courant, puissance, panne, type_panne
+                et timestamp (optionnel : seules les mesures plus récentes que
+                la fenêtre du détecteur y sont alors ajoutées)
+            warm_start (bool): Mise à jour incrémentale (sinon complète)
+
+        Returns:
+            int: Identifiant de la tâche
+        """
+        missing = [col for col in FEATURES + ["panne", "type_panne"] if col not in data.columns]
+        if missing:
+            raise ValueError(f"Colonnes manquantes pour l'entraînement: {missing}")
+
+        columns = FEATURES + ["panne", "type_panne"]
+        data = data[columns + (["timestamp"] if "timestamp" in data.columns else [])].dropna(subset=columns)
+        with self._lock:
+            job = TrainingJob(self._next_id, "incrémental" if warm_start else "complet", len(data))
+            self._next_id += 1
+            self._jobs[job.id] = job
+            self._trim_history()
+
+        self._executor.submit(self._run, job, data, warm_start)
+        return job.id
+
+    def status(self, job_id):
+        """État d'une tâche (dict), None si inconnue"""
+        job = self._jobs.get(job_id)
+        return job.to_dict() if job is not None else None
+
+    def jobs(self):
+        """Tâches de la plus récente à la plus ancienne"""
+        with self._lock:
+            records = [job.to_dict() for job in reversed(self._jobs.values())]
+        return pd.DataFrame(records, columns=None if records else JOB_COLUMNS)
+
+    def active(self):
+        """Tâche en attente ou en cours la plus ancienne (None si aucune)"""
+        with self._lock:
+            for job in self._jobs.values():
+                if not job.finished:
+                    return job.to_dict()
+        return None
+
+    def wait(self, job_id, timeout=None):
+        """Attend la fin d'une tâche et retourne son état"""
+        job = self._jobs[job_id]
+        job.done.wait(timeout)
+        return job.to_dict()
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    def _trim_history(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_jobs)]:
+            del self._jobs[job_id]
+
+    # ------------------------------------------------------------------
+    # Exécution
+    # ------------------------------------------------------------------
+    def _run(self, job, data, warm_start):
+        job.status = "en cours"
+        job.started_at = datetime.now()
+        requested_mode = job.mode
+        try:
+            X = data[FEATURES].to_numpy(dtype=float)
+            pannes = data["panne"].to_numpy() == 1
+
+            job.message = "Détecteur d'anomalies (fenêtre glissante)"
+            timestamps = pd.to_datetime(data["timestamp"]).to_numpy() if "timestamp" in data.columns else None
+            iso = self._fit_detector(X, timestamps, reset=not warm_start)
+            job.progress = 0.2
+
+            job.message = "Classifieur de pannes"
+            clf, added = self._fit_classifier(job, X[pannes], data["type_panne"].to_numpy()[pannes],
+                                              warm_start)
+
+            job.message = "Publication des modèles"
+            registry = self.service.registry
+            if registry is not None:
+                # Nouvelle version du registre, mise en service (et rechargée
+                # à chaud par les autres processus qui surveillent le registre)
+                version = registry.publish(iso, clf, data=data, source=f"administration ({job.mode})")
+                self.service.load_from_registry(version)
+            else:
+                compiled = self._save(iso, clf)
+                self.service.swap_models(iso, clf, compiled)
+
+            job.result = {"version": self.service.model_version, "mode_demande": requested_mode,
+                          "arbres": len(clf.estimators_),
+                          "arbres_ajoutes": added, "fenetre": self._window_size,
+                          "version_registre": self.service.registry_version}
+            job.progress = 1.0
+            job.message = "Modèles en service"
+            job.status = "terminé"
+        except Exception as e:
+            job.error = str(e)
+            job.message = "Échec de l'entraînement"
+            job.status = "échec"
+        finally:
+            job.finished_at = datetime.now()
+            job.done.set()
+
+    def _fit_detector(self, X, timestamps=None, reset=False):
+        """
+        Ajoute X à la fenêtre glissante et réentraîne l'IsolationForest dessus
+
+        Avec des horodatages, seules les lignes postérieures à la plus
+        récente de la fenêtre sont ajoutées : soumettre plusieurs fois les
+        mêmes mesures n'y crée pas de doublons.
+        """
+        if reset:
+            self._window.clear()
+            self._window_size = 0
+            self._window_end = None
+        if timestamps is not None and len(timestamps):
+            if self._window_end is not None:
+                X = X[timestamps > self._window_end]
+            latest = timestamps.max()
+            self._window_end = latest if self._window_end is None else max(self._window_end, latest)
+        if len(X):
+            self._window.append(X)
+            self._window_size += len(X)
+
+        # Retire les mesures les plus anciennes au-delà de window_rows
+        while self._window_size > self.window_rows:
+            excess = self._window_size - self.window_rows
+            oldest = self._window[0]
+            if len(oldest) <= excess:
+                self._window.popleft()
+                self._window_size -= len(oldest)
+            else:
+                self._window[0] = oldest[excess:]
+                self._window_size -= excess
+
+        window = pd.DataFrame(np.concatenate(list(self._window)), columns=FEATURES)
+        iso = IsolationForest(contamination=self.contamination, random_state=42, n_jobs=self.n_jobs)
+        return iso.fit(window)
+
+    def _fit_classifier(self, job, X, y, warm_start):
+        """
+        Complète (ou recrée) le RandomForest par paquets de tree_step arbres
+
+        Returns:
+            tuple: (classifieur, nombre d'arbres entraînés)
+        """
+        if len(y) == 0:
+            raise ValueError("Aucune panne étiquetée dans les données")
+
+        current = self.service.classifier
+        incremental = (warm_start and isinstance(current, RandomForestClassifier)
+                       and set(np.unique(y)) == set(current.classes_))
+        if warm_start and not incremental:
+            # Forêt absente ou types de panne différents : réentraînement complet
+            job.mode = "complet"
+            job.message = "Classifieur de pannes (complet : types de panne modifiés)"
+        if incremental:
+            # Copie : le modèle en service n'est jamais modifié
+            clf = copy.deepcopy(current)
+            clf.set_params(warm_start=True, n_jobs=self.n_jobs)
+            start, target = len(clf.estimators_), len(clf.estimators_) + self.extra_trees
+        else:
+            clf = RandomForestClassifier(random_state=42, warm_start=True, n_jobs=self.n_jobs)
+            start, target = 0, self.n_estimators
+
+        X = pd.DataFrame(X, columns=FEATURES)
+        n_trees = start
+        while n_trees < target:
+            n_trees = min(n_trees + self.tree_step, target)
+            clf.set_params(n_estimators=n_trees)
+            clf.fit(X, y)
+            job.progress = 0.2 + 0.7 * (n_trees - start) / (target - start)
+
+        if len(clf.estimators_) > self.max_trees:
+            clf.estimators_ = clf.estimators_[-self.max_trees:]
+            clf.set_params(n_estimators=self.max_trees)
+        clf.set_params(warm_start=False)
+        return clf, target - start
+
+    def _save(self, iso, clf):
+        """Écrit les modèles par remplacement atomique ; retourne les versions compilées"""
+        os.makedirs(self.models_dir, exist_ok=True)
+        for model, name in [(iso, "anomaly_detector.pkl"), (clf, "classifier.pkl")]:
+            path = os.path.join(self.models_dir, name)
+            joblib.dump(model, path + ".tmp")
+            os.replace(path + ".tmp", path)
+
+        path = os.path.join(self.models_dir, "compiled_models.npz")
+        compiled = export_compiled_models(iso, clf, path + ".tmp.npz")
+        os.replace(path + ".tmp.npz", path)
+        return compiled
@@ -2,10 +2,270 @@
 Service de visualisation des données
 """
 import plotly.graph_objects as go
-import plotly.express as px
 import pandas as pd
 import numpy as np
 
+def lttb_indices(x, y, n_out):
+    """
+    Sous-échantillonnage Largest-Triangle-Three-Buckets
+
+    Conserve le premier et le dernier point, puis dans chaque seau le
+    point formant le plus grand triangle avec le point retenu précédent et
+    la moyenne du seau suivant : la forme visuelle de la courbe (pics,
+    creux) est préservée.
+
+    Args:
+        x (np.ndarray): Abscisses croissantes (float)
+        y (np.ndarray): Ordonnées
+        n_out (int): Nombre de points à conserver
+
+    Returns:
+        np.ndarray: Indices des points retenus (croissants)
+    """
+    n_points = len(y)
+    if n_out >= n_points or n_out < 3:
+        return np.arange(n_points)
+
+    edges = np.linspace(1, n_points - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n_points - 1
+
+    previous = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], max(edges[i + 1], edges[i] + 1)
+        next_start = edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n_points
+        next_x = x[next_start:next_stop].mean()
+        next_y = y[next_start:next_stop].mean()
+
+        area = np.abs((x[previous] - next_x) * (y[start:stop] - y[previous])
+                      - (x[previous] - x[start:stop]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+
+    return selected
+
+
+def minmax_indices(y, n_out):
+    """
+    Sous-échantillonnage min/max entièrement vectorisé
+
+    Découpe la série en n_out / 2 seaux de même taille et garde le minimum
+    et le maximum de chacun (plus le premier et le dernier point).
+
+    Returns:
+        np.ndarray: Indices des points retenus (croissants)
+    """
+    n_points = len(y)
+    n_buckets = max(n_out // 2, 1)
+    if n_out >= n_points:
+        return np.arange(n_points)
+
+    size = -(-n_points // n_buckets)
+    values = np.asarray(y, dtype=float)
+    padded_low = np.full(n_buckets * size, np.inf)
+    padded_high = np.full(n_buckets * size, -np.inf)
+    padded_low[:n_points] = np.where(np.isnan(values), np.inf, values)
+    padded_high[:n_points] = np.where(np.isnan(values), -np.inf, values)
+
+    offsets = np.arange(n_buckets) * size
+    lows = offsets + padded_low.reshape(n_buckets, size).argmin(axis=1)
+    highs = offsets + padded_high.reshape(n_buckets, size).argmax(axis=1)
+
+    indices = np.concatenate([[0, n_points - 1], lows, highs])
+    return np.unique(indices[indices < n_points])
+
+
+# Histogrammes à bornes fixes : (min, max, largeur de classe)
+HISTOGRAM_BINS = {
+    "tension": (150.0, 260.0, 1.0),
+    "courant": (0.0, 35.0, 0.5),
+    "puissance": (0.0, 8.0, 0.1)
+}
+
+
+def bin_edges(column):
+    """Bornes des classes d'une colonne de HISTOGRAM_BINS"""
+    low, high, width = HISTOGRAM_BINS[column]
+    return np.linspace(low, high, int(round((high - low) / width)) + 1)
+
+
+def bin_codes(values, edges):
+    """
+    Classe de chaque valeur (bornes régulières : calcul direct, sans
+    recherche) ; les valeurs hors bornes vont dans la première ou la
+    dernière classe, NaN -> -1
+    """
+    values = np.asarray(values, dtype=float)
+    n_bins = len(edges) - 1
+    width = (edges[-1] - edges[0]) / n_bins
+    codes = np.clip(((values - edges[0]) / width).astype(np.int64), 0, n_bins - 1)
+    codes[np.isnan(values)] = -1
+    return codes
+
+
+def histogram_counts(values, edges):
+    """Effectifs par classe via np.bincount"""
+    codes = bin_codes(values, edges)
+    return np.bincount(codes[codes >= 0], minlength=len(edges) - 1)
+
+
+class ChartAggregates:
+    """
+    Agrégats des graphiques tenus à jour au fil des mesures
+
+    Un anneau de seaux horaires couvrant max_hours heures contient, par
+    seau, les effectifs des histogrammes (bornes fixes) et les sommes par
+    zone (mesures, anomalies, tension, courant). Une fenêtre de N heures
+    est la somme des seaux qu'elle recoupe, de l'heure contenant son début
+    à l'heure en cours (partielle) : N + 1 seaux quand la dernière mesure
+    n'est pas en début d'heure. Les figures ne dépendent que du nombre de
+    classes et de zones. La granularité est l'heure : l'heure la plus
+    ancienne de la fenêtre est comptée en entier.
+    """
+
+    ZONE_FIELDS = ["count", "anomalies", "tension_sum", "courant_sum"]
+
+    def __init__(self, max_hours=72, bucket_seconds=3600, columns=("tension", "courant")):
+        """
+        Args:
+            max_hours (int): Fenêtre maximale interrogeable (heures)
+            bucket_seconds (int): Durée d'un seau (secondes)
+            columns (tuple): Colonnes histogrammées (clés de HISTOGRAM_BINS)
+        """
+        self.bucket_seconds = bucket_seconds
+        self.n_buckets = int(np.ceil(max_hours * 3600 / bucket_seconds)) + 1
+        self.bucket_id = np.full(self.n_buckets, -1, dtype=np.int64)
+
+        self.edges = {column: bin_edges(column) for column in columns}
+        self.histograms = {column: np.zeros((self.n_buckets, len(edges) - 1), dtype=np.int64)
+                           for column, edges in self.edges.items()}
+
+        self.zone_names = []
+        self._zone_codes = {}
+        self.zones = {field: np.zeros((self.n_buckets, 8)) for field in self.ZONE_FIELDS}
+
+        self.last_timestamp = None
+
+    def _zone_code_array(self, zones):
+        inverse, uniques = pd.factorize(zones)
+        codes = []
+        for zone in uniques:
+            if zone not in self._zone_codes:
+                self._zone_codes[zone] = len(self.zone_names)
+                self.zone_names.append(zone)
+            codes.append(self._zone_codes[zone])
+
+        width = self.zones["count"].shape[1]
+        if len(self.zone_names) > width:
+            extra = max(len(self.zone_names) - width, width)
+            for field in self.ZONE_FIELDS:
+                self.zones[field] = np.hstack([self.zones[field], np.zeros((self.n_buckets, extra))])
+        return np.array(codes, dtype=np.int64)[inverse]
+
+    def update(self, batch):
+        """
+        Ajoute un batch de mesures
+
+        Args:
+            batch (pd.DataFrame): timestamp, zone, colonnes histogrammées,
+                et optionnellement anomalie
+        """
+        if batch.empty:
+            return
+
+        seconds = pd.to_datetime(batch["timestamp"]).to_numpy().astype("datetime64[ns]").astype(np.int64) / 1e9
+        buckets = (seconds // self.bucket_seconds).astype(np.int64)
+
+        # Seules les heures encore dans l'anneau sont retenues ; un seau
+        # occupé par une heure plus ancienne est vidé
+        newest = max(buckets.max(), self.bucket_id.max())
+        keep = buckets > newest - self.n_buckets
+        buckets = buckets[keep]
+        slots = buckets % self.n_buckets
+
+        newest_per_slot = self.bucket_id.copy()
+        unique_buckets = np.unique(buckets)
+        np.maximum.at(newest_per_slot, unique_buckets % self.n_buckets, unique_buckets)
+        stale = np.flatnonzero(newest_per_slot != self.bucket_id)
+        self.bucket_id[stale] = newest_per_slot[stale]
+        for counts in self.histograms.values():
+            counts[stale] = 0
+        for values in self.zones.values():
+            values[stale] = 0
+
+        current = self.bucket_id[slots] == buckets
+        slots = slots[current]
+        rows = np.flatnonzero(keep)[current]
+
+        # Effectifs : un seul bincount sur l'indice aplati (seau, classe)
+        for column, counts in self.histograms.items():
+            codes = bin_codes(batch[column].to_numpy(dtype=float)[rows], self.edges[column])
+            valid = codes >= 0
+            flat = slots[valid] * counts.shape[1] + codes[valid]
+            counts += np.bincount(flat, minlength=counts.size).reshape(counts.shape)
+
+        zones = self._zone_code_array(batch["zone"].to_numpy()[rows])
+        n_zones = self.zones["count"].shape[1]
+        flat = slots * n_zones + zones
+        size = self.n_buckets * n_zones
+        anomalies = (batch["anomalie"].to_numpy()[rows] == 1 if "anomalie" in batch.columns
+                     else np.zeros(len(rows), dtype=bool))
+
+        self.zones["count"] += np.bincount(flat, minlength=size).reshape(self.n_buckets, n_zones)
+        self.zones["anomalies"] += np.bincount(flat, weights=anomalies,
+                                               minlength=size).reshape(self.n_buckets, n_zones)
+        for column in ["tension", "courant"]:
+            values = np.nan_to_num(batch[column].to_numpy(dtype=float)[rows])
+            self.zones[f"{column}_sum"] += np.bincount(flat, weights=values,
+                                                       minlength=size).reshape(self.n_buckets, n_zones)
+
+        latest = float(seconds.max())
+        if self.last_timestamp is None or latest > self.last_timestamp:
+            self.last_timestamp = latest
+
+    def _window_slots(self, hours):
+        if self.last_timestamp is None:
+            return np.arange(0)
+        end_bucket = int(self.last_timestamp // self.bucket_seconds)
+        # Seau contenant le début de la fenêtre : l'heure en cours n'en
+        # couvre qu'une partie
+        start_bucket = int((self.last_timestamp - hours * 3600) // self.bucket_seconds)
+        start_bucket = max(start_bucket, end_bucket - self.n_buckets + 1)
+        bucket_ids = np.arange(start_bucket, end_bucket + 1)
+        slots = bucket_ids % self.n_buckets
+        return slots[self.bucket_id[slots] == bucket_ids]
+
+    def histogram(self, column, hours=24):
+        """
+        Histogramme des N dernières heures
+
+        Returns:
+            tuple: (effectifs, bornes)
+        """
+        return self.histograms[column][self._window_slots(hours)].sum(axis=0), self.edges[column]
+
+    def zone_stats(self, hours=24):
+        """
+        Moyennes et anomalies par zone sur les N dernières heures
+
+        Returns:
+            pd.DataFrame: zone, tension, courant (moyennes), anomalie (somme)
+        """
+        slots = self._window_slots(hours)
+        n_zones = len(self.zone_names)
+        totals = {field: values[slots, :n_zones].sum(axis=0) for field, values in self.zones.items()}
+        present = totals["count"] > 0
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return pd.DataFrame({
+                "zone": np.array(self.zone_names, dtype=object)[present],
+                "tension": (totals["tension_sum"] / totals["count"])[present],
+                "courant": (totals["courant_sum"] / totals["count"])[present],
+                "anomalie": totals["anomalies"][present].astype(np.int64)
+            })
+
+
 class VisualizationService:
     def __init__(self):
         self.colors = {
@@ -15,35 +275,82 @@ class VisualizationService:
             "Ligne coupée": "#9b59b6"
         }
     
-    def create_timeseries_plot(self, df, time_col="timestamp", value_col="tension"):
+    def downsample(self, df, time_col="timestamp", value_col="tension", max_points=2000,
+                   method="lttb"):
+        """
+        Réduit une série à max_points points en conservant les anomalies
+
+        Args:
+            df (pd.DataFrame): Mesures triées par temps
+            method (str): "lttb" (forme de la courbe) ou "minmax" (enveloppe)
+
+        Returns:
+            tuple: (positions des points de la courbe, positions des anomalies)
+        """
+        y = df[value_col].to_numpy(dtype=float)
+        anomalies = (np.flatnonzero(df["anomalie"].to_numpy() == 1) if "anomalie" in df.columns
+                     else np.arange(0))
+
+        if len(y) <= max_points:
+            return np.arange(len(y)), anomalies
+
+        if method == "minmax":
+            positions = minmax_indices(y, max_points)
+        else:
+            # Abscisses réelles si horodatées, sinon rang de la mesure
+            if time_col in df.columns and pd.api.types.is_datetime64_any_dtype(df[time_col]):
+                x = df[time_col].to_numpy().astype("datetime64[ns]").astype(np.int64).astype(float)
+            else:
+                x = np.arange(len(y), dtype=float)
+            positions = lttb_indices(x, y, max_points)
+
+        # Trop d'anomalies : leur enveloppe min/max est conservée
+        if len(anomalies) > max_points:
+            anomalies = anomalies[minmax_indices(y[anomalies], max_points)]
+
+        return np.union1d(positions, anomalies), anomalies
+
+    def create_timeseries_plot(self, df, time_col="timestamp", value_col="tension",
+                               max_points=2000, use_webgl=False, method="lttb"):
         """
         Créer un graphique temporel
+
+        Au-delà de max_points mesures, la série est sous-échantillonnée
+        côté serveur (les anomalies sont toujours tracées). use_webgl
+        utilise Scattergl, rendu par le GPU du navigateur.
         """
         fig = go.Figure()
+        scatter = go.Scattergl if use_webgl else go.Scatter
+        
+        positions, anomaly_positions = self.downsample(df, time_col, value_col, max_points, method)
+        plotted = df.iloc[positions] if len(positions) < len(df) else df
         
         # Ajouter la courbe principale
-        fig.add_trace(go.Scatter(
-            x=df[time_col],
-            y=df[value_col],
-            mode='lines+markers',
+        fig.add_trace(scatter(
+            x=plotted[time_col],
+            y=plotted[value_col],
+            mode='lines+markers' if len(plotted) <= 500 else 'lines',
             name=value_col,
             line=dict(color='#3498db', width=2)
         ))
         
         # Ajouter les zones d'anomalies
-        if "anomalie" in df.columns:
-            anomalies = df[df["anomalie"] == 1]
-            if not anomalies.empty:
-                fig.add_trace(go.Scatter(
-                    x=anomalies[time_col],
-                    y=anomalies[value_col],
-                    mode='markers',
-                    name='Anomalies',
-                    marker=dict(color='red', size=10, symbol='x')
-                ))
+        if len(anomaly_positions):
+            anomalies = df.iloc[anomaly_positions]
+            fig.add_trace(scatter(
+                x=anomalies[time_col],
+                y=anomalies[value_col],
+                mode='markers',
+                name='Anomalies',
+                marker=dict(color='red', size=10, symbol='x')
+            ))
+        
+        title = f"Évolution de la {value_col} dans le temps"
+        if len(plotted) < len(df):
+            title += f" ({len(plotted):,} points affichés sur {len(df):,})"
         
         fig.update_layout(
-            title=f"Évolution de la {value_col} dans le temps",
+            title=title,
             xaxis_title="Temps",
             yaxis_title=value_col,
             template="plotly_white",
@@ -52,38 +359,60 @@ class VisualizationService:
         
         return fig
     
-    def create_distribution_plot(self, df, column="tension"):
+    def create_distribution_plot(self, df=None, column="tension", counts=None, edges=None):
         """
         Créer un histogramme de distribution
+
+        Les effectifs sont calculés côté serveur sur des classes fixes
+        (ou fournis déjà agrégés via counts/edges) : la figure ne contient
+        qu'une barre par classe, quel que soit le nombre de mesures.
         """
-        fig = px.histogram(
-            df, 
-            x=column,
-            nbins=30,
-            title=f"Distribution de la {column}",
-            color_discrete_sequence=['#3498db']
-        )
+        if counts is None:
+            edges = bin_edges(column) if column in HISTOGRAM_BINS else np.histogram_bin_edges(
+                df[column].dropna(), bins=30)
+            counts = histogram_counts(df[column].to_numpy(dtype=float), edges)
+        
+        # Classes vides aux extrémités retirées
+        nonzero = np.flatnonzero(counts)
+        first, last = (nonzero[0], nonzero[-1] + 1) if len(nonzero) else (0, len(counts))
+        centers = (edges[:-1] + edges[1:]) / 2
+        
+        fig = go.Figure(go.Bar(
+            x=centers[first:last],
+            y=counts[first:last],
+            width=np.diff(edges)[first:last],
+            marker_color='#3498db'
+        ))
         
         fig.update_layout(
+            title=f"Distribution de la {column}",
             xaxis_title=column,
             yaxis_title="Fréquence",
-            template="plotly_white"
+            template="plotly_white",
+            bargap=0
         )
         
         return fig
     
-    def create_zone_comparison(self, df):
+    def create_zone_comparison(self, df=None, zone_stats=None):
         """
         Comparaison entre les zones géographiques
+
+        zone_stats (agrégats déjà calculés, cf. ChartAggregates.zone_stats)
+        évite le groupby sur les mesures brutes.
         """
-        if "zone" not in df.columns:
-            return None
+        if zone_stats is None:
+            if "zone" not in df.columns:
+                return None
             
-        zone_stats = df.groupby("zone").agg({
-            "tension": "mean",
-            "courant": "mean",
-            "anomalie": "sum"
-        }).reset_index()
+            zone_stats = df.groupby("zone").agg({
+                "tension": "mean",
+                "courant": "mean",
+                "anomalie": "sum"
+            }).reset_index()
+        
+        if zone_stats.empty:
+            return None
         
         fig = go.Figure()
         
@@ -0,0 +1,17 @@
+"""
+Fixtures partagées des tests
+"""
+import pytest
+from scripts.generate_data import generate_data
+from scripts.train_models import train_models
+
+@pytest.fixture
+def training_data(tmp_path, monkeypatch):
+    """1000 mesures reproductibles, dans un dossier de travail temporaire"""
+    monkeypatch.chdir(tmp_path)
+    return generate_data(n_samples=1000, seed=0)
+
+@pytest.fixture
+def trained_models(training_data):
+    """Détecteur et classifieur entraînés, écrits dans models/ du dossier temporaire"""
+    return train_models(training_data)
@@ -0,0 +1,54 @@
+"""
+Tests du moteur d'alertes par table de règles
+"""
+import pytest
+import numpy as np
+import pandas as pd
+from services.alert_engine import AlertEngine, generate_alerts
+
+def make_predictions():
+    return pd.DataFrame({
+        "zone": ["Nord", "Sud", "Est", "Nord", "Sud", "Ouest"],
+        "panne_predite": ["Court-circuit", "Surcharge", "Ligne coupée", "Surcharge", "OK", "Ligne coupée"],
+        "anomalie": [1, 1, 1, 1, 0, 1],
+        "confiance": [0.9, 0.5, 0.95, 0.8, np.nan, 0.4],
+        "tension": [180.0, 200.0, 185.0, 210.0, 230.0, 220.0]
+    })
+
+def test_default_rules():
+    """Règles intégrées : Court-circuit critique, Surcharge élevée, sinon modérée"""
+    alerts = generate_alerts(make_predictions())
+
+    assert list(alerts.columns) == ["zone", "panne_predite", "criticite"]
+    assert list(alerts["criticite"]) == ["Critique", "Élevée", "Modérée", "Élevée", "Modérée"]
+    assert alerts["criticite"].cat.ordered
+
+def test_rule_table_first_match_wins():
+    """Conditions de zone et de plages ; la première règle correspondante l'emporte"""
+    engine = AlertEngine(rules=[
+        {"panne": "Ligne coupée", "confiance_min": 0.9, "criticite": "Critique"},
+        {"zone": ["Nord", "Est"], "tension_max": 190, "criticite": "Critique"},
+        {"panne": ["Surcharge", "Ligne coupée"], "criticite": "Élevée"},
+        {"criticite": "Modérée"}
+    ])
+    alerts = engine.generate(make_predictions())
+
+    assert list(alerts["criticite"]) == ["Critique", "Élevée", "Critique", "Élevée", "Élevée"]
+
+def test_sort_and_colors_use_level_order():
+    """Tri stable du plus grave au moins grave ; couleur par niveau"""
+    engine = AlertEngine()
+    alerts = engine.sort(engine.generate(make_predictions()))
+
+    assert list(alerts["criticite"]) == ["Critique", "Élevée", "Élevée", "Modérée", "Modérée"]
+    assert list(alerts.index) == [0, 1, 3, 2, 5]
+    assert engine.row_colors(alerts)[0] == "#ffcccc"
+
+def test_invalid_rule_rejected():
+    with pytest.raises(ValueError):
+        AlertEngine(rules=[{"panne": "Surcharge", "criticite": "Urgente"}])
+    with pytest.raises(ValueError):
+        AlertEngine(rules=[{"poste": "P1", "criticite": "Critique"}])
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,67 @@
+"""
+Tests du regroupement des alertes en épisodes
+"""
+import pytest
+import numpy as np
+import pandas as pd
+from services.alert_manager import AlertManager
+
+START = pd.Timestamp("2024-01-01")
+
+def make_scored(minutes, zone="Nord", panne="Surcharge", anomalie=1, scores=None):
+    n = len(minutes)
+    return pd.DataFrame({
+        "timestamp": START + pd.to_timedelta(minutes, unit="m"),
+        "zone": zone,
+        "anomalie": anomalie,
+        "panne_predite": panne,
+        "anomalie_score": scores if scores is not None else np.full(n, -0.6),
+        "confiance": np.full(n, 0.8)
+    })
+
+def test_consecutive_anomalies_form_one_episode():
+    """Dix minutes d'anomalies : un seul épisode ouvert avec début, fin, pic et nombre"""
+    manager = AlertManager(gap_seconds=120)
+    manager.update(make_scored(range(10), scores=-0.5 - np.arange(10) / 100))
+
+    episodes = manager.episodes()
+    assert len(episodes) == 1
+    episode = episodes.iloc[0]
+    assert episode["statut"] == "En cours"
+    assert episode["nb_mesures"] == 10
+    assert episode["debut"] == START and episode["fin"] == START + pd.Timedelta(minutes=9)
+    assert episode["pic_score"] == pytest.approx(-0.59)
+    assert episode["criticite"] == "Élevée"
+
+def test_gap_and_silence_close_episodes():
+    """Un silence plus long que gap_seconds clôt l'épisode ; les types restent séparés"""
+    manager = AlertManager(gap_seconds=120)
+    manager.update(pd.concat([
+        make_scored([0, 1, 2]),
+        make_scored([10, 11]),
+        make_scored([1, 2], panne="Court-circuit")
+    ]))
+    manager.update(make_scored([20], anomalie=0))
+
+    episodes = manager.episodes()
+    assert len(episodes) == 3
+    assert (episodes["statut"] == "Clos").all()
+    assert episodes.iloc[0]["criticite"] == "Critique"
+    assert sorted(episodes["nb_mesures"]) == [2, 2, 3]
+
+def test_incremental_updates_match_single_batch():
+    """Mises à jour ligne par ligne ou en un batch : mêmes épisodes"""
+    data = pd.concat([make_scored(range(0, 30, 3)), make_scored(range(5, 9), zone="Sud")])
+    data = data.sort_values("timestamp", ignore_index=True)
+
+    batch = AlertManager(gap_seconds=240)
+    batch.update(data)
+    incremental = AlertManager(gap_seconds=240)
+    for i in range(len(data)):
+        incremental.update(data.iloc[i:i + 1])
+
+    pd.testing.assert_frame_equal(batch.episodes(), incremental.episodes())
+    assert len(batch.episodes()) == 2
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,60 @@
+"""
+Tests pour le moteur d'inférence compilé
+"""
+import pytest
+import numpy as np
+from scripts.generate_data import generate_data
+from scripts.train_models import FEATURES
+from services.compiled_forest import load_compiled_models
+from services.prediction_service import PredictionService
+
+@pytest.fixture
+def trained(trained_models):
+    """Modèles entraînés et exportés dans un dossier temporaire"""
+    iso, clf = trained_models
+    df = generate_data(n_samples=500, seed=1)
+    return iso, clf, df[FEATURES]
+
+def test_compiled_models_are_identical(trained):
+    """Scores, probabilités et classes identiques bit à bit à sklearn"""
+    iso, clf, X = trained
+    compiled_iso, compiled_clf = load_compiled_models("models/compiled_models.npz")
+
+    assert np.array_equal(compiled_iso.score_samples(X), iso.score_samples(X))
+    assert np.array_equal(compiled_clf.predict_proba(X), clf.predict_proba(X))
+    assert (compiled_clf.predict(X) == clf.predict(X)).all()
+
+    # Valeurs manquantes : même branche que sklearn
+    X_missing = X.copy()
+    X_missing.iloc[::5, 1] = np.nan
+    assert np.array_equal(compiled_iso.score_samples(X_missing), iso.score_samples(X_missing))
+
+def test_wrong_feature_count_is_rejected(trained):
+    """Un nombre de colonnes différent des features lève une erreur explicite"""
+    _, _, X = trained
+    compiled_iso, compiled_clf = load_compiled_models("models/compiled_models.npz")
+
+    assert np.array_equal(compiled_iso.score_samples(X.to_numpy()[0]),
+                          compiled_iso.score_samples(X.iloc[:1]))
+    with pytest.raises(ValueError):
+        compiled_iso.score_samples(X.to_numpy()[:, :2])
+    with pytest.raises(ValueError):
+        compiled_clf.predict_proba(np.ones((4, len(FEATURES) + 1)))
+
+def test_prediction_service_compiled(trained):
+    """Le service compilé donne les mêmes prédictions que le service sklearn"""
+    _, _, X = trained
+    expected = PredictionService().predict_batch(X)
+    service = PredictionService(use_compiled=True)
+    service.compiled_max_rows = len(X)
+    compiled = service.predict_batch(X)
+
+    assert np.array_equal(compiled["anomaly_score"], expected["anomaly_score"])
+    assert (compiled["panne_type"] == expected["panne_type"]).all()
+
+    fast = PredictionService(low_latency=True, use_compiled=True)
+    point = X.iloc[0].to_dict()
+    assert fast.predict(point)["anomaly_score"] == expected["anomaly_score"].iloc[0]
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -3,11 +3,13 @@ Tests pour la génération de données
 """
 import pytest
 import pandas as pd
-from scripts.generate_data import generate_data
+from scripts.generate_data import generate_data, generate_to_disk
 
-def test_generate_data():
+def test_generate_data(tmp_path):
     """Test de génération de données"""
-    df = generate_data(n_samples=100)
+    output = tmp_path / "data.csv"
+    df = generate_data(n_samples=100, output=str(output))
+    assert output.exists()
     
     # Vérifier la taille
     assert len(df) == 100
@@ -28,7 +30,7 @@ def test_generate_data():
 
 def test_data_distribution():
     """Test de distribution des données"""
-    df = generate_data(n_samples=1000)
+    df = generate_data(n_samples=1000, output=None)
     
     # Vérifier que nous avons des pannes (probabilité ~8%)
     panne_count = df["panne"].sum()
@@ -38,7 +40,29 @@ def test_data_distribution():
     zones = df["zone"].unique()
     assert len(zones) > 0
 
+def test_seeded_reproducibility():
+    """Une même graine produit le même jeu ; zones, taux de panne et horodatage configurables"""
+    kwargs = dict(n_samples=2000, seed=7, zones=["A", "B"], fault_rate=0.5,
+                  start="2024-01-01", period_seconds=60, output=None)
+    df = generate_data(**kwargs)
+
+    pd.testing.assert_frame_equal(df, generate_data(**kwargs))
+    assert set(df["zone"]) == {"A", "B"}
+    assert 0.4 < df["panne"].mean() < 0.6
+    assert df["timestamp"].iloc[-1] == pd.Timestamp("2024-01-01") + pd.Timedelta(minutes=1999)
+
+def test_generate_to_disk_chunks(tmp_path):
+    """L'écriture par blocs est indépendante du nombre de processus"""
+    sequential = tmp_path / "sequential.csv"
+    parallel = tmp_path / "parallel.csv"
+
+    assert generate_to_disk(2500, str(sequential), chunk_size=1000, seed=3) == 2500
+    generate_to_disk(2500, str(parallel), chunk_size=1000, seed=3, n_jobs=2)
+
+    df = pd.read_csv(sequential, parse_dates=["timestamp"])
+    assert len(df) == 2500
+    assert df["timestamp"].is_monotonic_increasing
+    pd.testing.assert_frame_equal(df, pd.read_csv(parallel, parse_dates=["timestamp"]))
+
 if __name__ == "__main__":
-    test_generate_data()
-    test_data_distribution()
-    print("✅ Tous les tests passent!")
\ No newline at end of file
+    pytest.main([__file__])
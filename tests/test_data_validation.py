@@ -0,0 +1,83 @@
+"""
+Tests de la validation des données et du rapport de qualité
+"""
+import warnings
+import pytest
+import numpy as np
+import pandas as pd
+from scripts.data_validation import (DataValidator, load_validation_ranges, validate_sonelgaz_data,
+                                     validate_with_report)
+
+def make_frame(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "timestamp": pd.date_range("2024-01-01", periods=n_rows, freq="5s"),
+        "zone": rng.choice(["Nord", "Sud", "Est"], n_rows).astype(object),
+        "tension": rng.normal(220, 20, n_rows),
+        "courant": rng.normal(15, 10, n_rows)
+    })
+    df.loc[::50, "tension"] = np.nan
+    df.loc[::70, "zone"] = None
+    return df
+
+def test_validation_rejects_out_of_range_rows():
+    """Mêmes lignes retenues que l'ancienne validation (masques puis dropna)"""
+    df = make_frame(5000)
+    expected = df[df["tension"].between(180, 250) & df["courant"].between(0, 30)]
+
+    result, report = validate_with_report(df)
+    pd.testing.assert_frame_equal(result.drop(columns="puissance"), expected)
+    assert np.allclose(result["puissance"], expected["tension"] * expected["courant"] / 1000)
+
+    assert report["rows"] == 5000
+    assert report["valid_rows"] == len(expected)
+    assert report["missing"]["tension"] == 100
+    assert report["missing"]["zone"] == df["zone"].isna().sum()
+    assert report["out_of_range"]["tension"] == (~df["tension"].between(180, 250)).sum() - 100
+    assert report["out_of_range"]["courant"] == (~df["courant"].between(0, 30)).sum()
+    assert report["std"]["tension"] == pytest.approx(expected["tension"].std())
+    assert "tension: 100 valeurs manquantes" in report["issues"]
+
+def test_filtered_rows_are_a_copy():
+    """Lignes rejetées : puissance ajoutée sur une copie, sans avertissement ni effet sur l'entrée"""
+    df = make_frame(500).drop(columns="timestamp")
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", pd.errors.SettingWithCopyWarning)
+        result, _ = validate_with_report(df)
+
+    assert result["puissance"].notna().all()
+    assert "puissance" not in df.columns and "timestamp" not in df.columns
+
+def test_chunked_report_matches_full():
+    """Rapport cumulé sur des blocs = rapport en une fois"""
+    df = make_frame(20000)
+    full = validate_with_report(df)[1]
+
+    validator = DataValidator()
+    for start in range(0, len(df), 3000):
+        validator.validate(df.iloc[start:start + 3000])
+    cumulated = validator.report()
+
+    for key in ["rows", "valid_rows", "missing", "out_of_range", "issues"]:
+        assert cumulated[key] == full[key]
+    for col in ["tension", "courant"]:
+        assert cumulated["std"][col] == pytest.approx(full["std"][col])
+
+def test_ranges_from_config():
+    """Section validation de config.yaml ; variance trop faible signalée"""
+    config = {"validation": {"tension_min": 200, "puissance_max": 5, "min_std": 1.0}}
+    assert load_validation_ranges(config) == {"tension": (200, 250), "courant": (0, 30),
+                                              "puissance": (-np.inf, 5)}
+
+    df = pd.DataFrame({"zone": ["Nord"] * 4, "tension": [190.0, 230.0, 230.2, 230.1],
+                       "courant": [10.0, 10.0, 10.0, 10.0]})
+    result, report = DataValidator.from_config(config).validate(df)
+    assert len(result) == 3
+    assert "courant: variance trop faible (0.00)" in report["issues"]
+    assert len(validate_sonelgaz_data(df)) == 4
+
+    with pytest.raises(ValueError):
+        validate_sonelgaz_data(df.drop(columns="zone"))
+
+if __name__ == "__main__":
+    pytest.main([__file__])
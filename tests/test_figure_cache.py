@@ -0,0 +1,48 @@
+"""
+Tests du cache de figures
+"""
+import pytest
+import plotly.graph_objects as go
+from services.figure_cache import FigureCache
+
+def make_figure(n_points):
+    return go.Figure(go.Scatter(x=list(range(n_points)), y=list(range(n_points))))
+
+def test_hits_and_misses():
+    """Même version : figure réutilisée sans reconstruction"""
+    cache = FigureCache()
+    builds = []
+
+    def builder():
+        builds.append(1)
+        return make_figure(10)
+
+    first = cache.get_or_create(("tension", 1), builder)
+    assert cache.get_or_create(("tension", 1), builder) is first
+    cache.get_or_create(("tension", 2), builder)
+
+    stats = cache.stats()
+    assert len(builds) == 2
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 2)
+
+def test_lru_eviction_by_entries_and_memory():
+    """Les figures les moins récemment utilisées sont évincées"""
+    cache = FigureCache(max_entries=2)
+    for version in range(3):
+        cache.get_or_create(("fig", version), lambda: make_figure(10))
+    cache.get_or_create(("fig", 1), lambda: make_figure(10))  # 1 devient la plus récente
+    cache.get_or_create(("fig", 3), lambda: make_figure(10))
+
+    assert cache.stats()["evictions"] == 2
+    assert cache.get_or_create(("fig", 1), lambda: None) is not None
+
+    size = len(make_figure(1000).to_json())
+    cache = FigureCache(max_bytes=int(size * 2.5))
+    for version in range(5):
+        cache.get_or_create(("big", version), lambda: make_figure(1000))
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] <= cache.max_bytes
+
+if __name__ == "__main__":
+    pytest.main([__file__])
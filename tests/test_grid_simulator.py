@@ -0,0 +1,70 @@
+"""
+Tests du simulateur de réseau
+"""
+import socket
+import pytest
+import numpy as np
+import pandas as pd
+from services.grid_simulator import GridSimulator, SimulatedScadaServer
+from services.scada_connector import ScadaPoller
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def make_simulator(**kwargs):
+    params = dict(n_stations=5, sample_seconds=60, start="2024-01-01", seed=3,
+                  fault_rate_per_hour=0.2)
+    params.update(kwargs)
+    return GridSimulator(**params)
+
+def test_reproducible_time_series():
+    """Même graine, mêmes séries ; pas de temps régulier par poste"""
+    data = make_simulator().run(24 * 3600)
+    pd.testing.assert_frame_equal(data, make_simulator().run(24 * 3600))
+
+    assert len(data) == 24 * 60 * 5
+    station = data[data["station"] == data["station"].iloc[0]]
+    assert (station["timestamp"].diff().dropna() == pd.Timedelta(minutes=1)).all()
+
+def test_daily_load_and_correlation():
+    """Pointe du soir au-dessus du creux nocturne ; bruit corrélé dans le temps"""
+    data = make_simulator(fault_rate_per_hour=0).run(48 * 3600)
+    hourly = data.groupby(data["timestamp"].dt.hour)["courant"].mean()
+    assert hourly[20] > 1.3 * hourly[3]
+
+    courant = data[data["station"] == data["station"].iloc[0]]["courant"].to_numpy()
+    assert np.corrcoef(courant[:-1], courant[1:])[0, 1] > 0.9
+
+def test_fault_episodes_span_several_steps():
+    """Les mesures en panne correspondent aux épisodes simulés"""
+    simulator = make_simulator()
+    data = simulator.run(24 * 3600)
+    episodes = simulator.fault_episodes()
+
+    assert len(episodes) > 0
+    assert set(data.loc[data["panne"] == 1, "type_panne"]) <= {"Court-circuit", "Surcharge", "Ligne coupée"}
+
+    longest = episodes.loc[(episodes["end"] - episodes["start"]).idxmax()]
+    during = data[(data["station"] == longest["station"])
+                  & (data["timestamp"] >= longest["start"]) & (data["timestamp"] < longest["end"])]
+    assert len(during) > 1
+    assert (during["type_panne"] == longest["type_panne"]).all()
+
+def test_simulated_scada_server():
+    """Le simulateur sert de serveur OPC-UA lisible par le collecteur"""
+    server = SimulatedScadaServer(make_simulator(sample_seconds=1),
+                                  endpoint=f"opc.tcp://127.0.0.1:{free_port()}", speed=10).start()
+    try:
+        poller = ScadaPoller(server.stations_config())
+        data = poller.poll()
+        poller.close()
+    finally:
+        server.stop()
+
+    assert len(data) == 5
+    assert data["tension"].between(150, 260).all()
+
+if __name__ == "__main__":
+    pytest.main([__file__])
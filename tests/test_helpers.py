@@ -0,0 +1,72 @@
+"""
+Tests des fonctions utilitaires
+"""
+import pytest
+import numpy as np
+import pandas as pd
+from utils.helpers import DataFingerprint, fingerprint_dataframe, generate_data_hash
+
+def make_frame(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2024-01-01", periods=n_rows, freq="5s"),
+        "zone": rng.choice(["Nord", "Sud", "Est"], n_rows),
+        "tension": rng.normal(230, 5, n_rows),
+        "anomalie": rng.integers(0, 2, n_rows)
+    })
+
+def test_fingerprint_detects_changes():
+    """Toute modification d'une valeur, texte ou numérique, change l'empreinte"""
+    df = make_frame(1000)
+    reference = fingerprint_dataframe(df)
+    assert fingerprint_dataframe(df.copy()) == reference
+
+    modified = df.copy()
+    modified.loc[500, "tension"] += 0.01
+    assert fingerprint_dataframe(modified) != reference
+
+    modified = df.copy()
+    modified.loc[10, "zone"] = "Ouest"
+    assert fingerprint_dataframe(modified) != reference
+
+def test_incremental_matches_full():
+    """Ajouts successifs et blocs de taille quelconque : même empreinte qu'en une fois"""
+    df = make_frame(10000)
+    full = fingerprint_dataframe(df)
+
+    incremental = DataFingerprint(chunk_rows=777)
+    for start in range(0, len(df), 2500):
+        incremental.update(df.iloc[start:start + 2500])
+    assert incremental.hexdigest() == full
+
+    before = incremental.copy()
+    incremental.update(make_frame(1, seed=1))
+    assert before.hexdigest() == full != incremental.hexdigest()
+
+def test_timezone_aware_timestamps():
+    """Dates avec fuseau : empreinte calculée, sensible aux valeurs et au fuseau"""
+    df = make_frame(1000)
+    df["timestamp"] = df["timestamp"].dt.tz_localize("Africa/Algiers")
+    reference = fingerprint_dataframe(df)
+
+    incremental = DataFingerprint(chunk_rows=300).update(df.iloc[:500]).update(df.iloc[500:])
+    assert incremental.hexdigest() == reference
+
+    modified = df.copy()
+    modified.loc[10, "timestamp"] += pd.Timedelta(seconds=1)
+    assert fingerprint_dataframe(modified) != reference
+    df["timestamp"] = df["timestamp"].dt.tz_convert("UTC")
+    assert fingerprint_dataframe(df) != reference
+
+def test_schema_change_rejected():
+    fingerprint = DataFingerprint().update(make_frame(10))
+    with pytest.raises(ValueError):
+        fingerprint.update(make_frame(10).drop(columns="zone"))
+
+def test_generate_data_hash_unchanged():
+    """L'ancienne empreinte MD5 reste disponible"""
+    df = make_frame(100).drop(columns="timestamp")
+    assert generate_data_hash(df) == generate_data_hash(df.copy())
+
+if __name__ == "__main__":
+    pytest.main([__file__])
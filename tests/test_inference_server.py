@@ -0,0 +1,80 @@
+"""
+Tests pour le micro-batching et l'endpoint d'inférence local
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+import pytest
+from scripts.generate_data import generate_data
+from services.prediction_service import PredictionService
+from services.inference_server import InferenceClient, InferenceServer, MicroBatcher
+
+@pytest.fixture
+def service(trained_models):
+    return PredictionService()
+
+def test_concurrent_requests_are_batched(service):
+    """Les requêtes concurrentes sont regroupées et donnent les résultats de predict()"""
+    batcher = MicroBatcher(service, max_batch_size=64, max_latency_ms=50).start()
+    points = generate_data(n_samples=200, seed=1, output=None)[["tension", "courant"]].to_dict("records")
+    try:
+        with ThreadPoolExecutor(max_workers=32) as executor:
+            results = list(executor.map(lambda point: batcher.predict(point, timeout=10), points))
+    finally:
+        batcher.stop()
+
+    stats = batcher.summary()
+    assert stats["points"] == 200
+    assert stats["batches"] < 200
+    assert stats["mean_batch_size"] > 1
+
+    for point, result in zip(points[:20], results):
+        expected = service.predict(point)
+        assert result["data_point"] == point
+        assert result["anomaly_score"] == pytest.approx(expected["anomaly_score"])
+        assert result["panne_type"] == expected["panne_type"]
+
+def test_invalid_point_is_isolated(service):
+    """Un point invalide n'empêche pas le scoring des autres"""
+    batcher = MicroBatcher(service, max_latency_ms=1)
+    try:
+        results = batcher.predict_many([{"tension": "abc", "courant": 1}, {"tension": 230, "courant": 10}],
+                                       timeout=10)
+    finally:
+        batcher.stop()
+
+    assert results[0]["status"] == "error"
+    assert results[1]["status"] == "success"
+
+def test_cancelled_request_does_not_stop_batcher(service):
+    """Une requête annulée est ignorée et les suivantes sont servies"""
+    batcher = MicroBatcher(service, max_latency_ms=1)
+    cancelled = Future()
+    cancelled.cancel()
+    batcher._queue.put(([{"tension": 230.0, "courant": 10.0}], cancelled, 0.0))
+    try:
+        result = batcher.predict({"tension": 230.0, "courant": 10.0}, timeout=10)
+    finally:
+        batcher.stop()
+
+    assert result["status"] == "success"
+    assert batcher.summary()["requests"] == 1
+
+def test_http_endpoint(service):
+    """Prédictions et état via l'endpoint HTTP local"""
+    server = InferenceServer(MicroBatcher(service, max_latency_ms=1), port=0).start()
+    try:
+        client = InferenceClient(server.url)
+        single = client.predict({"tension": 180.0, "courant": 25.0})
+        many = client.predict_many([{"tension": 230.0, "courant": 10.0}] * 3)
+        health = client.health()
+    finally:
+        server.stop()
+
+    assert single["status"] == "success"
+    assert single["anomaly_score"] == pytest.approx(
+        service.predict({"tension": 180.0, "courant": 25.0})["anomaly_score"])
+    assert len(many) == 3
+    assert health["status"] == "ok"
+    assert health["batching"]["points"] == 4
+
+if __name__ == "__main__":
+    pytest.main([__file__])
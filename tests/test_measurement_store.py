@@ -0,0 +1,68 @@
+"""
+Tests pour le magasin de mesures partitionné
+"""
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from services.measurement_store import MeasurementStore
+
+START = datetime(2024, 1, 1)
+
+def make_measurements(n_rows, step_minutes=10):
+    """Mesures espacées de step_minutes sur trois zones"""
+    timestamps = [START + timedelta(minutes=step_minutes * i) for i in range(n_rows)]
+    return pd.DataFrame({
+        "timestamp": timestamps,
+        "zone": [["Nord", "Sud", "Est"][i % 3] for i in range(n_rows)],
+        "tension": np.linspace(200, 240, n_rows),
+        "courant": np.linspace(5, 15, n_rows)
+    })
+
+@pytest.fixture
+def store(tmp_path):
+    store = MeasurementStore(root=str(tmp_path / "store"))
+    store.append(make_measurements(600))  # ~4 jours
+    return store
+
+def test_partitions_by_day_and_zone(store):
+    """Une partition par couple (jour, zone)"""
+    partitions = store.partitions()
+    assert ("2024-01-01", "Nord") in partitions
+    assert len({day for day, _ in partitions}) == 5
+    assert store.zones() == ["Est", "Nord", "Sud"]
+
+def test_query_time_range_and_zones(store):
+    """La requête retourne exactement la fenêtre [start, end) demandée"""
+    data = make_measurements(600)
+    start, end = START + timedelta(hours=30), START + timedelta(hours=60)
+
+    result = store.query(start, end, zones=["Nord", "Sud"])
+    expected = data[(data["timestamp"] >= start) & (data["timestamp"] < end)
+                    & data["zone"].isin(["Nord", "Sud"])]
+
+    assert len(result) == len(expected)
+    assert result["timestamp"].is_monotonic_increasing
+    np.testing.assert_allclose(result["tension"], expected["tension"])
+
+def test_append_only_and_last_hours(store):
+    """Les ajouts successifs s'accumulent ; query_last part de la mesure la plus récente"""
+    later = make_measurements(6)
+    later["timestamp"] += timedelta(days=10)
+    store.append(later)
+
+    assert store.time_range() == (pd.Timestamp(START), pd.Timestamp(later["timestamp"].max()))
+    assert len(store.query()) == 606
+    assert len(store.query_last(1)) == 6
+
+def test_iter_batches_bounded(store):
+    """Lecture par lots : même fenêtre que query, lots de taille bornée"""
+    start, end = START + timedelta(hours=30), START + timedelta(hours=60)
+    batches = list(store.iter_batches(start, end, columns=["tension"], batch_rows=20))
+
+    assert all(len(batch) <= 20 for batch in batches)
+    result = pd.concat(batches).sort_values("timestamp")
+    np.testing.assert_allclose(result["tension"], store.query(start, end)["tension"])
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,103 @@
+"""
+Tests pour le registre versionné des modèles
+"""
+import time
+import pytest
+import numpy as np
+from scripts.generate_data import generate_data
+from scripts.train_models import train_models, FEATURES
+from services.model_registry import ModelRegistry
+from services.prediction_service import PredictionService
+
+@pytest.fixture
+def registry(training_data):
+    """Registre contenant une version entraînée"""
+    registry = ModelRegistry("models/registry", keep_versions=2)
+    train_models(training_data, registry=registry)
+    return registry
+
+def test_publish_and_load(registry):
+    """Version active, métadonnées et modèles projetés en mémoire"""
+    assert registry.versions() == ["v0001"]
+    assert registry.active_version() == "v0001"
+
+    metadata = registry.metadata("v0001")
+    assert metadata["features"] == FEATURES
+    assert metadata["rows"] == 1000
+    assert metadata["data_fingerprint"]
+
+    iso, clf, (compiled_iso, compiled_clf), _ = registry.load()
+    X = generate_data(n_samples=200, seed=1, output=None)[FEATURES]
+    assert isinstance(compiled_iso.trees.threshold.base, np.memmap)
+    assert np.array_equal(compiled_iso.score_samples(X), iso.score_samples(X))
+    assert (compiled_clf.predict(X) == clf.predict(X)).all()
+
+    # Même service, qu'il lise le registre ou les fichiers historiques
+    point = {"tension": 180.0, "courant": 25.0}
+    service = PredictionService(registry=registry, use_compiled=True)
+    assert service.registry_version == "v0001"
+    assert service.predict(point)["anomaly_score"] == pytest.approx(
+        PredictionService().predict(point)["anomaly_score"])
+
+def test_versions_are_pruned(registry):
+    """Les versions au-delà de keep_versions sont supprimées, pas la version active"""
+    registry.activate("v0001")
+    iso, clf, _, _ = registry.load()
+    registry.publish(iso, clf, activate=False)
+    registry.publish(iso, clf, activate=False)
+
+    assert registry.versions() == ["v0001", "v0003"]
+    assert registry.active_version() == "v0001"
+    with pytest.raises(ValueError):
+        registry.activate("v0002")
+
+def test_concurrent_publishers_get_distinct_versions(registry):
+    """Plusieurs registres (processus) publiant en même temps ne se marchent pas dessus"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    iso, clf, _, _ = registry.load()
+    publishers = [ModelRegistry(registry.path, keep_versions=10) for _ in range(4)]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        versions = list(executor.map(lambda other: other.publish(iso, clf, activate=False), publishers))
+
+    assert sorted(versions) == ["v0002", "v0003", "v0004", "v0005"]
+    assert registry.versions() == ["v0001"] + sorted(versions)
+    assert all(registry.metadata(version)["version"] == version for version in versions)
+
+def test_hot_reload(registry):
+    """Le service recharge la nouvelle version active"""
+    service = PredictionService(registry=registry, hot_reload=True, reload_interval=0.05)
+    try:
+        iso, clf, _, _ = registry.load()
+        version = registry.publish(iso, clf, source="test")
+
+        deadline = time.time() + 5
+        while service.registry_version != version and time.time() < deadline:
+            time.sleep(0.05)
+        assert service.registry_version == version
+    finally:
+        service.stop_watching()
+
+def test_watch_retries_failed_reload(registry):
+    """Un rechargement en erreur est retenté sans nouveau changement du pointeur"""
+    calls = []
+
+    def callback(version):
+        calls.append(version)
+        if len(calls) == 1:
+            raise OSError("version illisible")
+
+    stop = registry.watch(callback, interval=0.02)
+    try:
+        iso, clf, _, _ = registry.load()
+        version = registry.publish(iso, clf)
+
+        deadline = time.time() + 5
+        while len(calls) < 2 and time.time() < deadline:
+            time.sleep(0.02)
+    finally:
+        stop.set()
+    assert calls[:2] == [version, version]
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,42 @@
+"""
+Tests du banc de recherche d'hyperparamètres
+"""
+import pytest
+import numpy as np
+from scripts.generate_data import generate_data
+from scripts.model_search import expand_grid, search_models
+
+DETECTOR_GRID = {"n_estimators": [20, 40]}
+CLASSIFIER_GRID = {"n_estimators": [10, 20], "max_depth": [4]}
+
+def test_expand_grid():
+    assert expand_grid({"a": [1, 2], "b": ["x"]}) == [{"a": 1, "b": "x"}, {"a": 2, "b": "x"}]
+
+def test_search_reports_quality_latency_and_size():
+    """Une ligne par configuration, mêmes résultats en séquentiel et en parallèle"""
+    data = generate_data(n_samples=4000, seed=0, output=None)
+    detectors, classifiers = search_models(data, DETECTOR_GRID, CLASSIFIER_GRID, n_jobs=1)
+
+    assert len(detectors) == 2 and len(classifiers) == 2
+    for column in ["precision", "recall", "f1", "latence_ms", "taille_ko", "f1_par_ms"]:
+        assert column in detectors.columns
+    for panne_type in ["Court-circuit", "Surcharge", "Ligne coupée"]:
+        assert f"f1_{panne_type}" in classifiers.columns
+    assert detectors["f1"].between(0, 1).all()
+    assert (detectors["latence_ms"] > 0).all() and (classifiers["taille_ko"] > 0).all()
+    assert detectors["f1_par_ms"].is_monotonic_decreasing
+
+    # Seuil plus bas : moins d'anomalies signalées, donc un rappel au plus égal
+    strict, _ = search_models(data, DETECTOR_GRID, {"n_estimators": [10]}, anomaly_threshold=-0.6)
+    assert (strict.sort_values("n_estimators")["recall"].to_numpy()
+            <= detectors.sort_values("n_estimators")["recall"].to_numpy()).all()
+
+    parallel_detectors, parallel_classifiers = search_models(data, DETECTOR_GRID, CLASSIFIER_GRID,
+                                                             n_jobs=2)
+    key = ["n_estimators", "precision", "recall"]
+    np.testing.assert_allclose(parallel_detectors.sort_values("n_estimators")[key].to_numpy(float),
+                               detectors.sort_values("n_estimators")[key].to_numpy(float))
+    assert sorted(parallel_classifiers["accuracy"]) == pytest.approx(sorted(classifiers["accuracy"]))
+
+if __name__ == "__main__":
+    pytest.main([__file__])
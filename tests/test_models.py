@@ -4,11 +4,14 @@ Tests pour les modèles IA
 import pytest
 import pandas as pd
 import numpy as np
-from scripts.train_models import train_models
+from scripts.train_models import train_models, train_models_from_store, StratifiedReservoir, FEATURES
+from scripts.generate_data import generate_to_disk
+from services.measurement_store import MeasurementStore
 from sklearn.metrics import accuracy_score, f1_score
 
-def test_model_training():
+def test_model_training(tmp_path, monkeypatch):
     """Test d'entraînement des modèles"""
+    monkeypatch.chdir(tmp_path)
     # Générer des données de test
     zones = ["Nord", "Sud", "Est", "Ouest", "Centre"]
     data = []
@@ -49,5 +52,47 @@ def test_model_training():
     
     print("✅ Test d'entraînement réussi!")
 
+def test_stratified_reservoir_keeps_rare_classes():
+    """Strates rares conservées en entier, fréquentes plafonnées ; lots quelconques"""
+    rng = np.random.default_rng(0)
+    labels = np.where(rng.random(50000) < 0.01, "rare", "frequent")
+    values = np.arange(50000, dtype=float)[:, None]
+
+    reservoir = StratifiedReservoir(capacity=2000, seed=0)
+    for start in range(0, 50000, 7000):
+        reservoir.update(values[start:start + 7000], labels[start:start + 7000])
+
+    counts = reservoir.counts()
+    n_rare = int((labels == "rare").sum())
+    assert counts["rare"] == (n_rare, n_rare)
+    assert counts["frequent"] == (2000, 50000 - n_rare)
+
+    rows, sampled_labels = reservoir.sample()
+    assert len(np.unique(rows)) == len(rows) == 2000 + n_rare
+    assert np.all(labels[rows[:, 0].astype(int)] == sampled_labels)
+    # Échantillon uniforme : la moyenne des indices fréquents est proche du centre
+    assert abs(rows[sampled_labels == "frequent"].mean() - 25000) < 1500
+
+def test_training_from_store(tmp_path, monkeypatch):
+    """Entraînement par lots depuis le magasin, rapport par phase"""
+    monkeypatch.chdir(tmp_path)
+    store = MeasurementStore(str(tmp_path / "store"))
+    generate_to_disk(20000, store.root, chunk_size=5000, period_seconds=60)
+
+    iso, clf, report = train_models_from_store(store, anomaly_sample_size=5000,
+                                               class_sample_size=300, batch_rows=4000, n_jobs=1)
+
+    assert report["rows_read"] == 20000
+    assert report["anomaly_sample"] == 5000
+    assert all(kept == min(seen, 300) for kept, seen in report["class_samples"].values())
+    assert set(report["phases"]) == {"lecture et échantillonnage", "détecteur", "classifieur", "export"}
+
+    data = store.query()
+    pannes = data[data["panne"] == 1]
+    predicted = clf.predict(pannes[FEATURES])
+    assert accuracy_score(pannes["type_panne"], predicted) > 0.6
+    assert f1_score(pannes["type_panne"], predicted, average="macro") > 0.6
+    assert len(iso.predict(data[FEATURES].head(10))) == 10
+
 if __name__ == "__main__":
-    test_model_training()
\ No newline at end of file
+    pytest.main([__file__])
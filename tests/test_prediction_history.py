@@ -0,0 +1,57 @@
+"""
+Tests pour l'historique des prédictions en tampon circulaire
+"""
+import pytest
+import numpy as np
+from datetime import datetime, timedelta
+from services.prediction_history import PredictionHistory
+
+START = datetime(2024, 1, 1)
+
+def fill(history, n, offset=0):
+    """Ajoute n prédictions espacées d'une minute"""
+    for i in range(offset, offset + n):
+        history.append(START + timedelta(minutes=i), 230.0, 10.0, -0.4 - i / 1000,
+                       i % 4 == 0, "Surcharge" if i % 4 == 0 else "OK", 0.9 if i % 4 == 0 else 0.0)
+
+def test_ring_buffer_overwrites_oldest():
+    """Au-delà de la capacité, seules les dernières prédictions sont conservées"""
+    history = PredictionHistory(capacity=10)
+    fill(history, 25)
+
+    records = history.records()
+    assert len(history) == 10
+    assert [r["timestamp"] for r in records] == [START + timedelta(minutes=i) for i in range(15, 25)]
+
+def test_window_query_across_wraparound():
+    """La recherche par fenêtre fonctionne quand le tampon a bouclé"""
+    history = PredictionHistory(capacity=10)
+    fill(history, 17)
+
+    window = history.window(since=START + timedelta(minutes=12))
+    assert len(window["timestamp"]) == 4
+
+    stats = history.statistics(since=START + timedelta(minutes=12))
+    assert stats["total_predictions"] == 4
+    assert stats["anomalies_detected"] == 1
+    assert stats["panne_types"] == {"OK": 3, "Surcharge": 1}
+
+def test_extend_matches_append():
+    """Un ajout par batch équivaut à des ajouts unitaires"""
+    single = PredictionHistory(capacity=8)
+    batch = PredictionHistory(capacity=8)
+    fill(single, 3)
+    fill(batch, 3)
+
+    n = 7
+    timestamps = [(START + timedelta(minutes=i)).timestamp() for i in range(3, 3 + n)]
+    fill(single, n, offset=3)
+    batch.extend(timestamps, np.full(n, 230.0), np.full(n, 10.0),
+                 -0.4 - np.arange(3, 3 + n) / 1000, np.arange(3, 3 + n) % 4 == 0,
+                 ["Surcharge" if i % 4 == 0 else "OK" for i in range(3, 3 + n)],
+                 np.where(np.arange(3, 3 + n) % 4 == 0, 0.9, 0.0))
+
+    assert batch.records() == single.records()
+
+if __name__ == "__main__":
+    pytest.main([__file__])
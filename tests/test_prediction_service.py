@@ -0,0 +1,108 @@
+"""
+Tests pour le service de prédiction
+"""
+import pytest
+import pandas as pd
+from scripts.generate_data import generate_data
+from services.prediction_history import PredictionHistory
+from services.prediction_service import PredictionService
+
+@pytest.fixture
+def service(trained_models):
+    """Service de prédiction avec des modèles entraînés dans un dossier temporaire"""
+    return PredictionService()
+
+def test_predict_batch_matches_predict(service):
+    """Le batch vectorisé doit donner les mêmes résultats que predict()"""
+    df = generate_data(n_samples=200, seed=1)[["tension", "courant"]]
+
+    batch = service.predict_batch(df)
+
+    assert len(batch) == len(df)
+    assert (batch["status"] == "success").all()
+    assert batch["is_anomaly"].any()
+
+    for idx, row in df.iterrows():
+        single = service.predict(row.to_dict())
+        assert batch.loc[idx, "anomaly_score"] == pytest.approx(single["anomaly_score"])
+        assert batch.loc[idx, "is_anomaly"] == single["is_anomaly"]
+        assert batch.loc[idx, "panne_type"] == single["panne_type"]
+        assert batch.loc[idx, "confidence"] == pytest.approx(single["confidence"])
+
+def test_low_latency_matches_predict(service):
+    """Le chemin faible latence doit donner les mêmes résultats que predict()"""
+    points = generate_data(n_samples=100, seed=2)[["tension", "courant"]].to_dict("records")
+
+    for point in points:
+        service.low_latency = False
+        expected = service.predict(point)
+        service.low_latency = True
+        fast = service.predict(point)
+
+        assert fast["status"] == "success"
+        assert fast["anomaly_score"] == pytest.approx(expected["anomaly_score"])
+        assert fast["is_anomaly"] == expected["is_anomaly"]
+        assert fast["panne_type"] == expected["panne_type"]
+        assert fast["confidence"] == pytest.approx(expected["confidence"])
+
+def test_predict_batch_without_model(service):
+    """Sans modèle, toutes les lignes sont marquées en erreur"""
+    service.anomaly_detector = None
+
+    batch = service.predict_batch(pd.DataFrame({"tension": [230.0], "courant": [10.0]}))
+
+    assert (batch["status"] == "error").all()
+    assert (batch["panne_type"] == "Erreur").all()
+
+def test_max_history_size_follows_history(trained_models):
+    """La capacité exposée est celle du tampon d'historique"""
+    service = PredictionService(history_size=50)
+    assert service.max_history_size == service.history.capacity == 50
+
+    service.history = PredictionHistory(10)
+    assert service.max_history_size == 10
+
+def test_concurrent_micro_batching(service):
+    """Appels concurrents regroupés : mêmes résultats et historique complet"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    points = generate_data(n_samples=400, seed=3)[["tension", "courant"]].to_dict("records")
+    batched = PredictionService(micro_batching=True, max_latency_ms=20, low_latency=True)
+    try:
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(batched.predict, points))
+    finally:
+        batched.batcher.stop()
+
+    assert batched.batcher.summary()["batches"] < len(points)
+    assert len(batched.predictions_history) == len(points)
+    assert batched.get_statistics()["total_predictions"] == len(points)
+    for point, result in zip(points[:50], results):
+        assert result["anomaly_score"] == pytest.approx(service.predict(point)["anomaly_score"])
+
+    # Chemin faible latence sans regroupement : un buffer par thread
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        fast = list(executor.map(service.predict_fast, points))
+    for point, result in zip(points, fast):
+        assert result["data_point"] == point
+        assert result["anomaly_score"] == pytest.approx(service.predict(point)["anomaly_score"])
+
+    # Horodatages pris sous le verrou : historique trié malgré la concurrence
+    timestamps = [record["timestamp"] for record in service.predictions_history]
+    assert timestamps == sorted(timestamps)
+
+def test_micro_batching_timeout_falls_back(service, monkeypatch):
+    """Regroupeur bloqué : predict() répond par le chemin direct après le délai"""
+    batched = PredictionService(micro_batching=True)
+    batched.batcher.stop()
+    monkeypatch.setattr(batched.batcher, "start", lambda: batched.batcher)
+    batched.batch_timeout = 0.05
+
+    point = {"tension": 180.0, "courant": 25.0}
+    result = batched.predict(point)
+
+    assert result["status"] == "success"
+    assert result["anomaly_score"] == pytest.approx(service.predict(point)["anomaly_score"])
+
+if __name__ == "__main__":
+    pytest.main([__file__])
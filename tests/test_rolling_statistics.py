@@ -0,0 +1,49 @@
+"""
+Tests pour les statistiques glissantes par minute
+"""
+import pytest
+import numpy as np
+from datetime import datetime, timedelta
+from services.rolling_statistics import RollingStatistics
+
+NOW = datetime(2024, 1, 1, 12, 0)
+
+def test_window_merges_minute_buckets():
+    """Une fenêtre ne compte que les minutes qu'elle couvre"""
+    stats = RollingStatistics(max_hours=72)
+    for minutes_ago in (0, 30, 90, 180):
+        stats.update(NOW - timedelta(minutes=minutes_ago), True, "Surcharge", 0.8, -0.6)
+    stats.update(NOW, False, "OK", 0.0, -0.4)
+
+    one_hour = stats.statistics(hours=1, now=NOW)
+    assert one_hour["total_predictions"] == 3
+    assert one_hour["anomalies_detected"] == 2
+    assert one_hour["panne_types"] == {"Surcharge": 2, "OK": 1}
+    assert one_hour["avg_confidence"] == pytest.approx(1.6 / 3)
+
+    assert stats.statistics(hours=4, now=NOW)["total_predictions"] == 5
+
+def test_batch_update_matches_single_updates():
+    """update_batch équivaut à une suite d'update"""
+    rng = np.random.default_rng(0)
+    n = 2000
+    seconds = NOW.timestamp() - rng.uniform(0, 80 * 3600, n)
+    is_anomaly = rng.random(n) < 0.1
+    types = np.where(is_anomaly, "Court-circuit", "OK").astype(object)
+    confidence = np.where(is_anomaly, rng.random(n), np.nan)
+
+    single = RollingStatistics(max_hours=72)
+    for i in np.argsort(seconds):
+        single.update(datetime.fromtimestamp(seconds[i]), is_anomaly[i], types[i], confidence[i])
+    batch = RollingStatistics(max_hours=72)
+    batch.update_batch(seconds, is_anomaly, types, confidence)
+
+    for hours in (1, 24, 72):
+        expected = single.statistics(hours, now=NOW)
+        result = batch.statistics(hours, now=NOW)
+        assert result["total_predictions"] == expected["total_predictions"]
+        assert result["panne_types"] == expected["panne_types"]
+        assert result["avg_confidence"] == pytest.approx(expected["avg_confidence"])
+
+if __name__ == "__main__":
+    pytest.main([__file__])
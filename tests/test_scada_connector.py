@@ -0,0 +1,131 @@
+"""
+Tests du connecteur SCADA contre un serveur OPC-UA local
+"""
+import socket
+import time
+import pytest
+import pandas as pd
+from opcua import Server, ua
+from services.scada_connector import ScadaConnector, ScadaPoller, get_scada_data
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@pytest.fixture
+def opcua_server():
+    """Serveur OPC-UA en mémoire exposant tension (i=1001) et courant (i=1002)"""
+    endpoint = f"opc.tcp://127.0.0.1:{free_port()}"
+    server = Server()
+    server.set_endpoint(endpoint)
+    idx = server.register_namespace("urn:sonelgaz:test")
+    poste = server.get_objects_node().add_object(idx, "Poste_Nord_01")
+    tension = poste.add_variable(ua.NodeId(1001, idx), "tension", 230.0)
+    courant = poste.add_variable(ua.NodeId(1002, idx), "courant", 10.0)
+    server.start()
+    yield endpoint, idx, tension, courant
+    server.stop()
+
+def test_batched_read_reuses_session(opcua_server):
+    """Plusieurs lectures groupées sur la même session"""
+    endpoint, idx, tension, courant = opcua_server
+    connector = ScadaConnector(endpoint)
+    node_ids = [f"ns={idx};i=1001", f"ns={idx};i=1002"]
+
+    assert connector.read_values(node_ids) == [230.0, 10.0]
+    client = connector.client
+
+    tension.set_value(221.5)
+    assert connector.read_values(node_ids) == [221.5, 10.0]
+    assert connector.client is client
+
+    connector.disconnect()
+
+def test_subscription_pushes_values(opcua_server):
+    """Les changements de valeur arrivent dans le buffer"""
+    endpoint, idx, tension, courant = opcua_server
+    connector = ScadaConnector(endpoint)
+    node_id = f"ns={idx};i=1002"
+
+    connector.subscribe([node_id], period_ms=50)
+    courant.set_value(17.5)
+
+    deadline = time.time() + 5
+    while connector.latest_values.get(node_id, (None,))[0] != 17.5 and time.time() < deadline:
+        time.sleep(0.05)
+
+    assert connector.latest_values[node_id][0] == 17.5
+    assert any(value == 17.5 for _, _, value in connector.drain())
+    assert len(connector.buffer) == 0
+
+    connector.disconnect()
+
+def test_reconnect_backoff():
+    """Un serveur injoignable n'est pas recontacté avant la fin du backoff"""
+    connector = ScadaConnector(f"opc.tcp://127.0.0.1:{free_port()}", timeout=1,
+                               initial_backoff=60)
+
+    with pytest.raises(ConnectionError):
+        connector.connect()
+    with pytest.raises(ConnectionError, match="Reconnexion"):
+        connector.connect()
+
+    assert connector.connection_failures == 1
+
+def test_poller_reads_all_stations(opcua_server):
+    """Un cycle retourne un DataFrame avec un poste par ligne et compte les échecs"""
+    endpoint, idx, tension, courant = opcua_server
+    stations = [
+        {"name": "Poste_Nord_01", "zone": "Nord",
+         "tension": f"ns={idx};i=1001", "courant": f"ns={idx};i=1002"},
+        {"name": "Poste_Nord_02", "zone": "Nord",
+         "tension": f"ns={idx};i=1001", "courant": f"ns={idx};i=1002"},
+        {"name": "Poste_Fantome", "zone": "Sud",
+         "tension": f"ns={idx};i=9001", "courant": f"ns={idx};i=9002"}
+    ]
+    poller = ScadaPoller(stations, endpoint=endpoint)
+
+    data = poller.poll()
+
+    assert list(data["station"]) == ["Poste_Nord_01", "Poste_Nord_02"]
+    assert list(data.columns) == ["station", "zone", "tension", "courant", "puissance", "timestamp"]
+    assert data["puissance"].iloc[0] == pytest.approx(2.3)
+    assert pd.api.types.is_datetime64_any_dtype(data["timestamp"])
+    assert poller.station_stats["Poste_Fantome"]["failures"] == 1
+    assert poller.station_stats["Poste_Nord_01"]["failures"] == 0
+    assert poller.last_cycle_seconds is not None
+    assert poller.endpoint_stats[endpoint]["stations"] == 3
+    assert poller.endpoint_stats[endpoint]["last_duration_ms"] > 0
+
+    poller.close()
+
+def test_stale_subscription_values_are_reread(opcua_server):
+    """Une valeur poussée trop ancienne est relue sur le serveur"""
+    endpoint, idx, tension, courant = opcua_server
+    station = {"name": "Poste_Nord_01", "zone": "Nord",
+               "tension": f"ns={idx};i=1001", "courant": f"ns={idx};i=1002"}
+    poller = ScadaPoller([station], endpoint=endpoint, use_subscription=True, stale_seconds=60)
+    connector = poller.connectors[endpoint]
+    poller.poll()
+
+    # Abonnement silencieux depuis deux minutes sur une valeur désormais fausse
+    connector.latest_values[station["tension"]] = (999.0, time.time() - 120)
+    tension.set_value(225.0)
+
+    assert connector.fresh_value(station["tension"], 60) is None
+    assert poller.poll()["tension"].iloc[0] == 225.0
+
+    poller.close()
+
+def test_get_scada_data_propagates_errors(monkeypatch):
+    """Un échec de lecture remonte à l'appelant (métriques du pipeline)"""
+    def failing_poller(scada_config):
+        raise ConnectionError("SCADA injoignable")
+
+    monkeypatch.setattr("services.scada_connector.get_poller", failing_poller)
+    with pytest.raises(ConnectionError):
+        get_scada_data({"endpoint": "opc.tcp://127.0.0.1:1"})
+
+if __name__ == "__main__":
+    pytest.main([__file__])
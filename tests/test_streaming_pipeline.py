@@ -0,0 +1,67 @@
+"""
+Tests pour le pipeline de traitement en flux
+"""
+import time
+import pytest
+from scripts.generate_data import generate_data
+from scripts.data_validation import validate_sonelgaz_data
+from services.prediction_service import PredictionService
+from services.streaming_pipeline import StreamingPipeline, ReplaySource
+
+@pytest.fixture
+def service(trained_models):
+    return PredictionService()
+
+def wait_for_sequence(pipeline, sequence, timeout=30):
+    deadline = time.time() + timeout
+    while pipeline.snapshot().sequence < sequence and time.time() < deadline:
+        time.sleep(0.05)
+    return pipeline.snapshot()
+
+def test_pipeline_materializes_scored_batches(service):
+    """Tous les batchs de la source sont scorés, classés et matérialisés"""
+    data = generate_data(n_samples=1000, seed=1)
+    pipeline = StreamingPipeline(ReplaySource(data, batch_size=100), service,
+                                 poll_interval=0.01, queue_size=2).start()
+
+    snapshot = wait_for_sequence(pipeline, 10)
+    pipeline.stop()
+
+    assert snapshot.sequence == 10
+    assert len(snapshot.data) == len(validate_sonelgaz_data(data))
+    for col in ["anomalie_score", "anomalie", "panne_predite", "confiance"]:
+        assert col in snapshot.data.columns
+    assert len(snapshot.alerts) == snapshot.data["anomalie"].sum()
+    assert snapshot.episodes["nb_mesures"].sum() == snapshot.data["anomalie"].sum()
+    assert pipeline.metrics["alertes"]["processed"] == 10
+    assert all(depth == 0 for depth in pipeline.queue_depths().values())
+
+def test_pipeline_window_is_bounded(service):
+    """Les lots les plus anciens sortent de la fenêtre matérialisée"""
+    data = generate_data(n_samples=1000, seed=1)
+    pipeline = StreamingPipeline(ReplaySource(data, batch_size=100), service,
+                                 poll_interval=0.01, max_rows=300).start()
+
+    snapshot = wait_for_sequence(pipeline, 10)
+    pipeline.stop()
+
+    assert len(snapshot.data) <= 300 + 100
+
+def test_aggregates_cover_rows_outside_window(service):
+    """KPI et graphiques comptent toutes les mesures, même sorties de la fenêtre"""
+    data = generate_data(n_samples=1000, seed=1, start="2024-01-01", period_seconds=60, output=None)
+    pipeline = StreamingPipeline(ReplaySource(data, batch_size=100), service, poll_interval=0.01,
+                                 max_rows=300, aggregate_hours=72).start()
+
+    snapshot = wait_for_sequence(pipeline, 10)
+    pipeline.stop()
+
+    assert len(snapshot.data) <= 300 + 100
+    kpi = pipeline.statistics(72)
+    assert kpi["total_predictions"] == 1000
+    assert 0 < kpi["anomalies_detected"] < 1000
+    assert pipeline.histogram("tension", 72)[0].sum() == 1000
+    assert pipeline.zone_stats(72)["zone"].nunique() == data["zone"].nunique()
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,71 @@
+"""
+Tests des statistiques en une passe (moments fusionnables, t-digest)
+"""
+import pytest
+import numpy as np
+import pandas as pd
+from utils.helpers import calculate_statistics
+from utils.streaming_stats import StreamingStatistics, TDigest
+
+def make_frame(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "tension": rng.normal(230, 5, n_rows),
+        "courant": rng.exponential(10, n_rows),
+        "puissance": rng.normal(2, 1, n_rows)
+    })
+    df.loc[::37, "courant"] = np.nan
+    return df
+
+def test_chunks_and_partitions_match_full_moments():
+    """Blocs successifs et fusion de partitions : mêmes moments que pandas"""
+    df = make_frame(50000)
+    columns = list(df.columns)
+
+    chunked = StreamingStatistics(columns)
+    for start in range(0, len(df), 7000):
+        chunked.update(df.iloc[start:start + 7000])
+
+    left = StreamingStatistics(columns).update(df.iloc[:20000])
+    right = StreamingStatistics(columns).update(df.iloc[20000:])
+    merged = left.merge(right)
+
+    for stats in (chunked.summary(), merged.summary()):
+        for col in columns:
+            assert stats[col]["mean"] == pytest.approx(df[col].mean(), rel=1e-12)
+            assert stats[col]["std"] == pytest.approx(df[col].std(), rel=1e-9)
+            assert stats[col]["min"] == df[col].min()
+            assert stats[col]["max"] == df[col].max()
+
+def test_tdigest_quantiles_accuracy():
+    """Erreur de rang faible, y compris dans les queues, après fusion"""
+    values = np.random.default_rng(1).lognormal(0, 1, 200000)
+    digest = TDigest()
+    for chunk in np.array_split(values, 4):
+        digest.merge(TDigest().update(chunk))
+
+    assert len(digest.means) <= 100
+    for q in [0.001, 0.01, 0.25, 0.5, 0.75, 0.99, 0.999]:
+        rank = (values <= digest.quantile(q)).mean()
+        assert abs(rank - q) < max(0.002, q * 0.5 if q < 0.5 else (1 - q) * 0.5)
+    assert digest.quantile(0) == values.min()
+    assert digest.quantile(1) == values.max()
+
+def test_calculate_statistics_format():
+    """Format inchangé : colonnes absentes ignorées, colonnes vides en NaN"""
+    df = make_frame(5000)
+    df["vide"] = np.nan
+    stats = calculate_statistics(df, columns=["tension", "courant", "absente", "vide"], chunk_rows=1000)
+
+    assert set(stats) == {"tension", "courant", "vide"}
+    assert set(stats["tension"]) == {"mean", "std", "min", "max", "median"}
+    assert stats["courant"]["median"] == pytest.approx(df["courant"].median(), rel=0.02)
+    assert set(stats["vide"]) == set(stats["tension"])
+    assert all(np.isnan(value) for value in stats["vide"].values())
+
+    empty = calculate_statistics(df.iloc[:0])
+    assert set(empty) == {"tension", "courant", "puissance"}
+    assert all(np.isnan(value) for value in empty["tension"].values())
+
+if __name__ == "__main__":
+    pytest.main([__file__])
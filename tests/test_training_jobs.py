@@ -0,0 +1,115 @@
+"""
+Tests pour les entraînements en tâche de fond
+"""
+import threading
+import pytest
+from scripts.generate_data import generate_data
+from services.prediction_service import PredictionService
+from services.training_jobs import TrainingJobManager
+
+@pytest.fixture
+def manager(trained_models):
+    """Gestionnaire branché sur un service dont les modèles sont déjà entraînés"""
+    manager = TrainingJobManager(PredictionService(), window_rows=1500, extra_trees=20,
+                                 max_trees=130, tree_step=10)
+    yield manager
+    manager.shutdown()
+
+def test_incremental_job_adds_trees_and_swaps(manager):
+    """Le mode incrémental complète la forêt existante puis publie les modèles"""
+    service = manager.service
+    old_classifier = service.classifier
+    version = service.model_version
+
+    job_id = manager.submit(generate_data(n_samples=1000, seed=1, output=None))
+    job = manager.wait(job_id, timeout=120)
+
+    assert job["statut"] == "terminé", job["erreur"]
+    assert job["mode"] == job["mode_demande"] == "incrémental"
+    assert job["progression"] == 1.0
+    assert job["arbres_ajoutes"] == 20
+    assert job["fenetre"] == 1000
+    assert service.model_version == version + 1
+    assert len(service.classifier.estimators_) == 120
+    # Le modèle en service n'a pas été modifié pendant l'entraînement
+    assert len(old_classifier.estimators_) == 100
+
+    # Fenêtre glissante et plafond du nombre d'arbres
+    job = manager.wait(manager.submit(generate_data(n_samples=1000, seed=2, output=None)), timeout=120)
+    assert job["fenetre"] == 1500
+    assert len(service.classifier.estimators_) == 130
+
+    # Les modèles écrits sur disque sont les modèles publiés
+    reloaded = PredictionService()
+    point = {"tension": 180.0, "courant": 25.0}
+    assert reloaded.predict(point)["anomaly_score"] == pytest.approx(service.predict(point)["anomaly_score"])
+
+def test_resubmitted_measurements_are_not_duplicated(manager):
+    """Les mesures déjà dans la fenêtre du détecteur n'y sont pas ajoutées à nouveau"""
+    data = generate_data(n_samples=600, seed=6, start="2024-01-01", output=None)
+
+    job = manager.wait(manager.submit(data.iloc[:400]), timeout=120)
+    assert job["fenetre"] == 400
+    job = manager.wait(manager.submit(data), timeout=120)
+    assert job["fenetre"] == 600
+    job = manager.wait(manager.submit(data), timeout=120)
+    assert job["statut"] == "terminé"
+    assert job["fenetre"] == 600
+
+def test_predictions_continue_during_training(manager):
+    """Les prédictions restent servies pendant l'entraînement et le remplacement"""
+    service = manager.service
+    data = generate_data(n_samples=300, seed=3, output=None)[["tension", "courant"]]
+    errors = []
+    stop = threading.Event()
+
+    def score():
+        while not stop.is_set():
+            results = service.predict_batch(data)
+            if not (results["status"] == "success").all():
+                errors.append(results)
+
+    scorer = threading.Thread(target=score)
+    scorer.start()
+    job = manager.wait(manager.submit(generate_data(n_samples=1000, seed=4, output=None),
+                                      warm_start=False), timeout=120)
+    stop.set()
+    scorer.join()
+
+    assert job["statut"] == "terminé"
+    assert job["mode"] == "complet"
+    assert len(service.classifier.estimators_) == 100
+    assert not errors
+    assert list(manager.jobs()["id"]) == [job["id"]]
+
+def test_changed_classes_fall_back_to_full_mode(manager):
+    """Types de panne différents : réentraînement complet, signalé comme tel"""
+    data = generate_data(n_samples=1000, seed=7, output=None)
+    data = data[data["type_panne"] != "Surcharge"]
+
+    job = manager.wait(manager.submit(data), timeout=120)
+
+    assert job["statut"] == "terminé", job["erreur"]
+    assert job["mode_demande"] == "incrémental"
+    assert job["mode"] == "complet"
+    assert len(manager.service.classifier.estimators_) == 100
+
+def test_failed_job_keeps_models(manager):
+    """Un entraînement en échec laisse les modèles en service"""
+    service = manager.service
+    version = service.model_version
+    data = generate_data(n_samples=200, seed=5, output=None)
+    data["panne"] = 0
+
+    job = manager.wait(manager.submit(data), timeout=60)
+
+    assert job["statut"] == "échec"
+    assert job["erreur"]
+    assert service.model_version == version
+    assert manager.active() is None
+
+    with pytest.raises(ValueError):
+        manager.submit(data.drop(columns=["type_panne"]))
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,101 @@
+"""
+Tests du sous-échantillonnage des courbes
+"""
+import pytest
+import numpy as np
+import pandas as pd
+from services.visualization_service import (VisualizationService, ChartAggregates, lttb_indices,
+                                           minmax_indices, bin_edges, histogram_counts)
+
+def make_series(n_rows, n_anomalies=20):
+    rng = np.random.default_rng(0)
+    anomalie = np.zeros(n_rows, dtype=int)
+    anomalie[rng.choice(n_rows, n_anomalies, replace=False)] = 1
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2024-01-01", periods=n_rows, freq="5s"),
+        "tension": 230 + np.sin(np.arange(n_rows) / 500) * 5 + rng.normal(0, 1, n_rows),
+        "anomalie": anomalie
+    })
+
+def test_lttb_keeps_endpoints_and_extremes():
+    """LTTB garde les extrémités et le pic isolé"""
+    y = np.zeros(10000)
+    y[4321] = 50.0
+    indices = lttb_indices(np.arange(10000, dtype=float), y, 100)
+
+    assert len(indices) == 100
+    assert indices[0] == 0 and indices[-1] == 9999
+    assert 4321 in indices
+    assert (np.diff(indices) > 0).all()
+
+def test_minmax_keeps_bucket_extremes():
+    """min/max garde le minimum et le maximum global"""
+    y = np.random.default_rng(1).normal(size=100001)
+    indices = minmax_indices(y, 200)
+    assert len(indices) <= 202
+    assert y.argmin() in indices and y.argmax() in indices
+
+def test_timeseries_plot_downsamples_and_keeps_anomalies():
+    """Fenêtre complète réduite au budget de points, toutes les anomalies tracées"""
+    df = make_series(200000)
+    fig = VisualizationService().create_timeseries_plot(df, max_points=1000, use_webgl=True)
+
+    line, anomalies = fig.data
+    assert line.type == "scattergl"
+    assert len(line.x) <= 1000 + 20
+    assert len(anomalies.x) == 20
+    assert set(anomalies.x) <= set(line.x)
+
+def make_measurements(n_rows, freq="1min"):
+    rng = np.random.default_rng(2)
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2024-01-01", periods=n_rows, freq=freq),
+        "zone": rng.choice(["Nord", "Sud", "Est"], n_rows),
+        "tension": rng.normal(225, 10, n_rows),
+        "courant": rng.normal(10, 3, n_rows),
+        "anomalie": (rng.random(n_rows) < 0.1).astype(int)
+    })
+
+def test_histogram_counts_match_numpy():
+    """bincount sur classes fixes = np.histogram (valeurs hors bornes ramenées aux extrémités)"""
+    values = np.random.default_rng(3).normal(225, 10, 10000)
+    edges = bin_edges("tension")
+    expected, _ = np.histogram(np.clip(values, edges[0], edges[-1] - 1e-9), bins=edges)
+    np.testing.assert_array_equal(histogram_counts(values, edges), expected)
+
+def test_chart_aggregates_window():
+    """Les agrégats incrémentaux d'une fenêtre égalent le calcul direct sur les heures concernées"""
+    df = make_measurements(5 * 24 * 60)
+    aggregates = ChartAggregates(max_hours=72)
+    for start in range(0, len(df), 1000):
+        aggregates.update(df.iloc[start:start + 1000])
+
+    window = df[df["timestamp"] >= (df["timestamp"].max() - pd.Timedelta(hours=24)).floor("h")]
+    counts, edges = aggregates.histogram("courant", hours=24)
+    np.testing.assert_array_equal(counts, histogram_counts(window["courant"], edges))
+
+    zones = aggregates.zone_stats(hours=24).set_index("zone").sort_index()
+    expected = window.groupby("zone").agg({"tension": "mean", "courant": "mean", "anomalie": "sum"})
+    pd.testing.assert_frame_equal(zones, expected, check_dtype=False, check_names=False)
+
+def test_chart_aggregates_window_starting_mid_hour():
+    """Dernière mesure en cours d'heure : la fenêtre couvre au moins les heures demandées"""
+    df = make_measurements(10 * 60 + 6)  # Une mesure par minute de 00:00 à 10:05
+    aggregates = ChartAggregates(max_hours=72)
+    aggregates.update(df)
+
+    for hours, first_hour in [(1, 9), (2, 8), (0.5, 9)]:
+        counts, _ = aggregates.histogram("tension", hours=hours)
+        assert counts.sum() == (10 - first_hour) * 60 + 6
+        assert counts.sum() >= hours * 60
+        zones = aggregates.zone_stats(hours=hours)
+        assert zones["anomalie"].sum() == df["anomalie"].iloc[first_hour * 60:].sum()
+
+def test_distribution_plot_payload_is_binned():
+    """Une barre par classe non vide, quelle que soit la taille des données"""
+    fig = VisualizationService().create_distribution_plot(make_measurements(100000), "tension")
+    assert len(fig.data[0].x) <= len(bin_edges("tension")) - 1
+    assert fig.data[0].y.sum() == 100000
+
+if __name__ == "__main__":
+    pytest.main([__file__])
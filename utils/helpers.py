@@ -5,9 +5,13 @@ import json
 import yaml
 import pickle
 import hashlib
+import zlib
 from datetime import datetime
+import numpy as np
 import pandas as pd
 
+from utils.streaming_stats import StreamingStatistics
+
 def load_config(config_path="config.yaml"):
     """
     Charger la configuration YAML
@@ -29,6 +33,100 @@ def generate_data_hash(df):
     data_str = df.to_json()
     return hashlib.md5(data_str.encode()).hexdigest()
 
+class DataFingerprint:
+    """
+    Empreinte incrémentale d'un DataFrame
+
+    Chaque colonne est hachée directement depuis son buffer mémoire avec
+    CRC32 (zlib), par blocs de chunk_rows lignes, sans sérialisation ni
+    copie pour les types numériques et dates. Les colonnes texte ou
+    catégorielles sont remplacées par le hachage 64 bits de chaque valeur
+    (pd.util.hash_array, calculé une fois par valeur distincte). CRC32 se
+    poursuivant bloc après bloc, ajouter des lignes avec update() donne la
+    même empreinte que hacher le DataFrame complet en une fois. L'index
+    n'est pas pris en compte.
+    """
+
+    def __init__(self, chunk_rows=1000000):
+        """
+        Args:
+            chunk_rows (int): Lignes hachées par bloc (mémoire bornée pour
+                les colonnes texte)
+        """
+        self.chunk_rows = chunk_rows
+        self.columns = None
+        self.dtypes = None
+        self.n_rows = 0
+        self._crcs = {}
+
+    def _column_buffer(self, series):
+        """Octets représentant une tranche de colonne"""
+        if series.dtype.kind in "biufcmM" and not isinstance(series.dtype, pd.CategoricalDtype):
+            if series.dtype.kind in "mM":
+                # Entiers sous-jacents (UTC pour les dates avec fuseau, dont
+                # to_numpy() rend des objets)
+                values = series.array.asi8
+            else:
+                values = series.to_numpy()
+            return memoryview(np.ascontiguousarray(values)).cast("B")
+        # Une valeur de hachage par valeur distincte, puis par ligne via les codes
+        # (le code -1 des valeurs manquantes pointe sur le hachage de None)
+        codes, uniques = pd.factorize(series)
+        hashes = pd.util.hash_array(np.append(np.asarray(uniques, dtype=object), None))
+        return memoryview(np.ascontiguousarray(hashes[codes])).cast("B")
+
+    def update(self, df):
+        """
+        Ajoute des lignes à l'empreinte
+
+        Args:
+            df (pd.DataFrame): Lignes ajoutées (mêmes colonnes et types)
+
+        Returns:
+            DataFingerprint: self (chaînable)
+        """
+        columns = [str(col) for col in df.columns]
+        dtypes = [str(dtype) for dtype in df.dtypes]
+        if self.columns is None:
+            self.columns, self.dtypes = columns, dtypes
+            self._crcs = {col: 0 for col in columns}
+        elif columns != self.columns or dtypes != self.dtypes:
+            raise ValueError("Colonnes ou types différents de ceux de l'empreinte")
+
+        for start in range(0, len(df), self.chunk_rows):
+            chunk = df.iloc[start:start + self.chunk_rows]
+            for col, name in zip(chunk.columns, columns):
+                self._crcs[name] = zlib.crc32(self._column_buffer(chunk[col]), self._crcs[name])
+
+        self.n_rows += len(df)
+        return self
+
+    def hexdigest(self):
+        """Empreinte courante (schéma, nombre de lignes et CRC de chaque colonne)"""
+        summary = json.dumps({
+            "columns": self.columns,
+            "dtypes": self.dtypes,
+            "rows": self.n_rows,
+            "crc": [self._crcs[col] for col in self.columns or []]
+        })
+        return hashlib.blake2b(summary.encode(), digest_size=16).hexdigest()
+
+    def copy(self):
+        """Copie indépendante (pour comparer avant/après un ajout)"""
+        other = DataFingerprint(self.chunk_rows)
+        other.columns = list(self.columns) if self.columns is not None else None
+        other.dtypes = list(self.dtypes) if self.dtypes is not None else None
+        other.n_rows = self.n_rows
+        other._crcs = dict(self._crcs)
+        return other
+
+def fingerprint_dataframe(df, chunk_rows=1000000):
+    """
+    Empreinte rapide d'un DataFrame (alternative à generate_data_hash
+    pour les gros volumes)
+    """
+    return DataFingerprint(chunk_rows).update(df).hexdigest()
+
 def format_timestamp(timestamp=None):
     """
     Formater un timestamp pour l'affichage
@@ -38,25 +136,21 @@ def format_timestamp(timestamp=None):
     
     return timestamp.strftime("%Y-%m-%d %H:%M:%S")
 
-def calculate_statistics(df, columns=None):
+def calculate_statistics(df, columns=None, chunk_rows=1000000):
     """
     Calculer les statistiques descriptives
+
+    Une seule passe par bloc de chunk_rows lignes pour toutes les
+    colonnes (StreamingStatistics) ; la médiane est approchée par t-digest.
     """
     if columns is None:
         columns = ["tension", "courant", "puissance"]
-    
-    stats = {}
-    for col in columns:
-        if col in df.columns:
-            stats[col] = {
-                "mean": df[col].mean(),
-                "std": df[col].std(),
-                "min": df[col].min(),
-                "max": df[col].max(),
-                "median": df[col].median()
-            }
-    
-    return stats
+
+    stats = StreamingStatistics([col for col in columns if col in df.columns])
+    for start in range(0, len(df), chunk_rows):
+        stats.update(df.iloc[start:start + chunk_rows])
+
+    return stats.summary()
 
 def export_to_csv(df, filename):
     """
@@ -0,0 +1,233 @@
+"""
+Statistiques descriptives en une passe, fusionnables entre blocs et partitions
+"""
+import numpy as np
+
+
+def _k_scale(q, compression):
+    """Fonction d'échelle k1 du t-digest (résolution fine dans les queues)"""
+    return compression / (2 * np.pi) * np.arcsin(2 * np.clip(q, 0, 1) - 1)
+
+
+def _cluster_ranks(n_values, compression):
+    """Rangs de début des clusters de n_values valeurs triées (un par unité de k)"""
+    half = int(np.ceil(compression / 4))
+    q = (np.sin(2 * np.pi * np.arange(-half, half + 1) / compression) + 1) / 2
+    return np.unique(np.clip(np.round(q * n_values).astype(np.int64), 0, n_values - 1))
+
+
+class TDigest:
+    """
+    Quantiles approchés d'un flux de valeurs (t-digest fusionnant)
+
+    Les valeurs sont résumées par des centroïdes (moyenne, poids) ; la
+    taille d'un centroïde est bornée par la fonction d'échelle k1, si bien
+    que les queues de distribution restent précises. Un bloc de valeurs
+    est trié (tri vectorisé de NumPy, plus rapide ici que np.partition
+    à plusieurs rangs) puis découpé en clusters aux rangs de l'échelle ;
+    la fusion de deux digests ne trie que leurs centroïdes. min et max
+    sont conservés exactement.
+    """
+
+    def __init__(self, compression=100):
+        """
+        Args:
+            compression (float): Nombre de centroïdes visé x 2 (précision)
+        """
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+    def _compress(self, means, weights):
+        """Regroupe des centroïdes triés par unité de l'échelle k"""
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        cumulative = np.cumsum(weights)
+        q_mid = (cumulative - weights / 2) / cumulative[-1]
+        cluster = np.floor(_k_scale(q_mid, self.compression)).astype(np.int64)
+
+        starts = np.flatnonzero(np.r_[True, cluster[1:] != cluster[:-1]])
+        merged_weights = np.add.reduceat(weights, starts)
+        merged_means = np.add.reduceat(means * weights, starts) / merged_weights
+        return merged_means, merged_weights
+
+    def update(self, values):
+        """
+        Ajoute un bloc de valeurs (les NaN sont ignorés)
+
+        Returns:
+            TDigest: self (chaînable)
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return self
+
+        # Clusters du bloc : tranches du bloc trié entre rangs de l'échelle
+        starts = _cluster_ranks(values.size, self.compression)
+        values = np.sort(values)
+        weights = np.diff(np.append(starts, values.size)).astype(float)
+        means = np.add.reduceat(values, starts) / weights
+
+        self.min = min(self.min, float(values[0]))
+        self.max = max(self.max, float(values[-1]))
+        self.means, self.weights = self._compress(np.concatenate([self.means, means]),
+                                                  np.concatenate([self.weights, weights]))
+        return self
+
+    def merge(self, other):
+        """Fusionne un autre digest (bloc ou partition différente)"""
+        if other.weights.size == 0:
+            return self
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.means, self.weights = self._compress(np.concatenate([self.means, other.means]),
+                                                  np.concatenate([self.weights, other.weights]))
+        return self
+
+    def quantile(self, q):
+        """
+        Quantile(s) approché(s)
+
+        Args:
+            q (float ou array-like): Niveau(x) entre 0 et 1
+
+        Returns:
+            float ou np.ndarray: NaN si le digest est vide
+        """
+        q = np.asarray(q, dtype=float)
+        if self.weights.size == 0:
+            return np.full(q.shape, np.nan) if q.ndim else float("nan")
+
+        # Chaque centroïde est placé au milieu de sa masse cumulée ; min et max aux bornes
+        total = self.weights.sum()
+        positions = np.r_[0.0, (np.cumsum(self.weights) - self.weights / 2) / total, 1.0]
+        values = np.r_[self.min, self.means, self.max]
+        result = np.interp(q, positions, values)
+        return float(result) if result.ndim == 0 else result
+
+
+class StreamingStatistics:
+    """
+    Moments et quantiles de plusieurs colonnes, par blocs fusionnables
+
+    Chaque bloc est réduit en une fois pour toutes les colonnes (effectif,
+    moyenne, somme des carrés des écarts M2, min, max ; NaN ignorés),
+    puis combiné à l'état courant par la formule de Chan (généralisation
+    de Welford à deux ensembles). Les médianes et autres quantiles sont
+    approchés par un TDigest par colonne. Deux instances calculées sur
+    des partitions différentes se fusionnent avec merge().
+    """
+
+    def __init__(self, columns, compression=100):
+        """
+        Args:
+            columns (list): Colonnes numériques suivies
+            compression (float): Précision des digests de quantiles
+                (None = moments seuls, sans tri des blocs)
+        """
+        self.columns = list(columns)
+        n_columns = len(self.columns)
+        self.count = np.zeros(n_columns)
+        self.mean = np.zeros(n_columns)
+        self.m2 = np.zeros(n_columns)
+        self.min = np.full(n_columns, np.inf)
+        self.max = np.full(n_columns, -np.inf)
+        self.digests = [TDigest(compression) for _ in self.columns] if compression else []
+
+    def _combine(self, count, mean, m2, minimum, maximum):
+        """Formule de Chan : combine l'état courant avec les moments d'un autre ensemble"""
+        total = self.count + count
+        with np.errstate(invalid="ignore", divide="ignore"):
+            delta = mean - self.mean
+            ratio = np.where(total > 0, count / total, 0.0)
+            self.mean = np.where(count > 0, self.mean + delta * ratio, self.mean)
+            self.m2 = np.where(count > 0, self.m2 + m2 + delta ** 2 * self.count * ratio, self.m2)
+        self.count = total
+        self.min = np.fmin(self.min, minimum)
+        self.max = np.fmax(self.max, maximum)
+
+    def update(self, df):
+        """
+        Ajoute un bloc de lignes (les colonnes absentes sont ignorées)
+
+        Returns:
+            StreamingStatistics: self (chaînable)
+        """
+        present = [i for i, col in enumerate(self.columns) if col in df.columns]
+        if not present or len(df) == 0:
+            return self
+
+        # Tableau en ordre colonne : chaque réduction parcourt une colonne contiguë
+        values = np.full((len(df), len(self.columns)), np.nan, order="F")
+        values[:, present] = df[[self.columns[i] for i in present]].to_numpy(dtype=float)
+
+        count = np.full(len(self.columns), float(len(df)))
+        missing = np.isnan(values)
+        has_missing = missing.any()
+        if has_missing:
+            count -= missing.sum(axis=0)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            totals = np.where(missing, 0.0, values).sum(axis=0) if has_missing else values.sum(axis=0)
+            mean = np.where(count > 0, totals / count, 0.0)
+            deviations = values - mean
+            if has_missing:
+                deviations[missing] = 0.0
+            m2 = np.einsum("ij,ij->j", deviations, deviations)
+            minimum = np.fmin.reduce(values, axis=0)  # fmin/fmax ignorent les NaN
+            maximum = np.fmax.reduce(values, axis=0)
+        minimum = np.where(count > 0, minimum, np.inf)
+        maximum = np.where(count > 0, maximum, -np.inf)
+
+        self._combine(count, mean, m2, minimum, maximum)
+        if self.digests:
+            for i in present:
+                self.digests[i].update(values[:, i])
+        return self
+
+    def merge(self, other):
+        """Fusionne les statistiques d'une autre partition (mêmes colonnes)"""
+        if other.columns != self.columns:
+            raise ValueError("Colonnes différentes entre les statistiques à fusionner")
+        self._combine(other.count, other.mean, other.m2, other.min, other.max)
+        for digest, other_digest in zip(self.digests, other.digests):
+            digest.merge(other_digest)
+        return self
+
+    def quantile(self, column, q):
+        """Quantile approché d'une colonne"""
+        return self.digests[self.columns.index(column)].quantile(q)
+
+    def summary(self):
+        """
+        Statistiques par colonne (format de calculate_statistics)
+
+        Returns:
+            dict: {colonne: {"mean", "std", "min", "max", "median"}} (sans
+                "median" si compression est None) ; NaN pour une colonne
+                sans aucune valeur, comme pandas
+        """
+        stats = {}
+        for i, col in enumerate(self.columns):
+            if self.count[i] == 0:
+                stats[col] = {"mean": float("nan"), "std": float("nan"),
+                              "min": float("nan"), "max": float("nan")}
+                if self.digests:
+                    stats[col]["median"] = float("nan")
+                continue
+            stats[col] = {
+                "mean": float(self.mean[i]),
+                "std": float(np.sqrt(self.m2[i] / (self.count[i] - 1))) if self.count[i] > 1 else float("nan"),
+                "min": float(self.min[i]),
+                "max": float(self.max[i])
+            }
+            if self.digests:
+                stats[col]["median"] = self.digests[i].quantile(0.5)
+        return stats